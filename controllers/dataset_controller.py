@@ -0,0 +1,108 @@
+"""Serviço único de datasets: cada coleção é lida uma vez por processo e compartilhada pelas páginas."""
+import os
+import threading
+import time
+
+import pandas as pd
+
+from controllers.equipes_controller import cache_equipes, cache_estatisticas, listar_equipes_firestore
+from controllers.membros_controller import cache_membros
+from controllers.patrimonio_controller import cache_patrimonios
+from models.membro_model import CSV_MEMBROS, carregar_membros_csv
+from utils.versao_dados import carimbar_versao, obter_versao
+
+
+# Após uma falha do Firestore, serve o CSV por este tempo antes de tentar de novo
+ESPERA_APOS_FALHA = 30
+
+_lock = threading.Lock()
+_falhas: dict[str, float] = {}
+_csv_membros: tuple[float, pd.DataFrame] | None = None
+_equipes: tuple[tuple, pd.DataFrame] | None = None
+_FRAMES = {"membros": cache_membros, "patrimonios": cache_patrimonios}
+
+
+def _em_espera(fonte: str) -> bool:
+    with _lock:
+        return time.monotonic() - _falhas.get(fonte, float("-inf")) < ESPERA_APOS_FALHA
+
+
+def _registrar_falha(fonte: str) -> None:
+    with _lock:
+        _falhas[fonte] = time.monotonic()
+
+
+def _membros_csv() -> pd.DataFrame:
+    """CSV de membros lido uma vez por modificação do arquivo."""
+    global _csv_membros
+    try:
+        mtime = os.path.getmtime(CSV_MEMBROS)
+    except OSError:
+        return pd.DataFrame()
+    with _lock:
+        if _csv_membros is not None and _csv_membros[0] == mtime:
+            return _csv_membros[1].copy()
+    df = carimbar_versao(carregar_membros_csv(), f"csv-{mtime}")
+    with _lock:
+        _csv_membros = (mtime, df)
+    return df.copy()
+
+
+def obter_membros() -> pd.DataFrame:
+    """Frame de membros (Firestore; CSV como contingência), com "PROJETO ATUAL" garantido."""
+    df = pd.DataFrame()
+    if not _em_espera("membros"):
+        try:
+            df = cache_membros.obter()
+        except Exception:
+            _registrar_falha("membros")
+    if df.empty:
+        df = _membros_csv()
+    if not df.empty and "PROJETO ATUAL" not in df.columns:
+        df["PROJETO ATUAL"] = ""
+    return df
+
+
+def _ler_frame(frame, fonte: str) -> pd.DataFrame:
+    if _em_espera(fonte):
+        return pd.DataFrame()
+    try:
+        return frame.obter()
+    except Exception:
+        _registrar_falha(fonte)
+        return pd.DataFrame()
+
+
+def obter_equipes() -> pd.DataFrame:
+    """Equipes a partir das estatísticas materializadas (uma leitura por equipe).
+
+    Sem estatísticas gravadas, as métricas são derivadas do frame de membros compartilhado.
+    """
+    global _equipes
+    estatisticas = _ler_frame(cache_estatisticas, "estatisticas")
+    cadastradas = _ler_frame(cache_equipes, "equipes")
+    membros = obter_membros() if estatisticas.empty else pd.DataFrame()
+    chave = (obter_versao(estatisticas), obter_versao(cadastradas), obter_versao(membros))
+    with _lock:
+        if _equipes is not None and _equipes[0] == chave:
+            return _equipes[1].copy()
+    df = listar_equipes_firestore(
+        df_cadastradas=cadastradas, df_estatisticas=estatisticas, df_membros=membros,
+    )
+    df = carimbar_versao(df, "+".join(chave))
+    with _lock:
+        _equipes = (chave, df)
+    return df.copy()
+
+
+def obter_patrimonios() -> pd.DataFrame:
+    """Frame de patrimônios (a contingência no CSV já fica em `listar_patrimonios`)."""
+    return cache_patrimonios.obter()
+
+
+def versao_atual(fonte: str) -> str | None:
+    """Versão do frame compartilhado de `fonte` ("membros" ou "patrimonios"), sem copiá-lo.
+
+    None quando o frame ainda não foi carregado ou está vazio (contingência no CSV).
+    """
+    return _FRAMES[fonte].versao()
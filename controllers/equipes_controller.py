@@ -1,9 +1,16 @@
-from typing import Dict, List, Tuple
+from collections import Counter
+from typing import Dict, Iterable, List, Tuple
 import os
 import pandas as pd
 
+from google.cloud.firestore import Increment
+
+from utils.cache_frames import registrar_frame
+from utils.fila_escrita import FilaEscrita, obter_fila
 from utils.firebase_utils import init_firestore
+from utils.instrumentacao import contar, medir
 from models.equipes_model import (
+    formatar_campos_equipe,
     formatar_equipe_para_firestore,
     slugify_equipe_nome,
 )
@@ -13,97 +20,267 @@ db = init_firestore()
 
 COLLECTION_MEMBROS = "membros_gp"
 COLLECTION_EQUIPES = "equipes_gp"
+# Contadores por equipe mantidos a cada escrita de membro (ver `diferenca_estatisticas`)
+COLLECTION_ESTATISTICAS = "equipes_estatisticas_gp"
+CAMPOS_ESTATISTICA = ("STATUS", "EQUIPE DE PROJETO", "ORIENTADOR")
+LIMITE_LOTE = 500
 CSV_PATH = os.path.join("data", "membros_gp", "tratados", "membros_gp_tratados_.csv")
 
 
-def _split_equipes(value: str) -> List[str]:
-    if not value:
-        return []
-    # Campo pode vir com múltiplas equipes separadas por ';'
-    return [e.strip() for e in str(value).split(";") if e.strip()]
+COLUNAS_EQUIPES = ["EQUIPE", "Membros Ativos", "Membros Inativos", "Total", "Status", "Orientadores"]
 
 
-def _status_normalizado(status: str) -> str:
-    s = str(status or "").strip().lower()
-    if s == "ativo":
-        return "Ativo"
-    if s == "inativo":
-        return "Inativo"
-    return "Pendente"
+def _texto_limpo(serie: pd.Series) -> pd.Series:
+    return serie.where(serie.notna(), "").astype(str).str.strip()
 
 
-def _agrupar_equipes_por_membros() -> pd.DataFrame:
+def _agrupar_equipes_por_membros(df_membros: pd.DataFrame) -> pd.DataFrame:
     """Agrupa membros por equipe, retornando métricas por equipe.
 
-    Colunas: EQUIPE, Membros Ativos, Membros Inativos, Total, Orientadores
+    Calculado sobre o frame de membros já carregado (sem nova leitura do Firestore).
+    Colunas: EQUIPE, Membros Ativos, Membros Inativos, Total, Status, Orientadores
     """
-    membros = db.collection(COLLECTION_MEMBROS).stream()
-    stats: Dict[str, Dict[str, object]] = {}
+    if df_membros.empty or "EQUIPE DE PROJETO" not in df_membros.columns:
+        return pd.DataFrame(columns=COLUNAS_EQUIPES)
+
+    base = pd.DataFrame({
+        # Campo pode vir com múltiplas equipes separadas por ';'
+        "EQUIPE": _texto_limpo(df_membros["EQUIPE DE PROJETO"]).str.split(";"),
+        "STATUS": _texto_limpo(df_membros.get("STATUS", pd.Series("", index=df_membros.index))).str.lower(),
+        "ORIENTADOR": _texto_limpo(df_membros.get("ORIENTADOR", pd.Series("", index=df_membros.index))),
+    }).explode("EQUIPE")
+    base["EQUIPE"] = base["EQUIPE"].fillna("").str.strip()
+    base = base[base["EQUIPE"] != ""]
+    if base.empty:
+        return pd.DataFrame(columns=COLUNAS_EQUIPES)
+
+    grupos = base.groupby("EQUIPE", sort=False)
+    df = pd.DataFrame({
+        "Membros Ativos": base["STATUS"].eq("ativo").groupby(base["EQUIPE"], sort=False).sum(),
+        "Membros Inativos": base["STATUS"].eq("inativo").groupby(base["EQUIPE"], sort=False).sum(),
+        "Total": grupos.size(),
+    }).astype(int)
+    orientadores = base[base["ORIENTADOR"] != ""].drop_duplicates(["EQUIPE", "ORIENTADOR"])
+    df["Orientadores"] = (
+        orientadores.sort_values("ORIENTADOR").groupby("EQUIPE")["ORIENTADOR"].agg(", ".join)
+        .reindex(df.index, fill_value="")
+    )
+    df["Status"] = df["Membros Ativos"].ge(2).map({True: "Ativa", False: "Inativa"})
+    df = df.rename_axis("EQUIPE").reset_index()[COLUNAS_EQUIPES]
+    return df.sort_values(by=["Membros Ativos", "Total"], ascending=[False, False]).reset_index(drop=True)
+
+
+def _texto(valor) -> str:
+    if valor is None or (isinstance(valor, float) and pd.isna(valor)):
+        return ""
+    return str(valor).strip()
+
+
+def _inteiro(valor) -> int:
+    try:
+        return 0 if pd.isna(valor) else int(valor)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _contagens_membro(membro: Dict[str, object] | None) -> Counter:
+    """Contribuição de um membro às estatísticas: {(equipe, campo[, orientador]): n}."""
+    contagens: Counter = Counter()
+    if not membro:
+        return contagens
+    status = _texto(membro.get("STATUS")).lower()
+    orientador = _texto(membro.get("ORIENTADOR"))
+    for equipe in _texto(membro.get("EQUIPE DE PROJETO")).split(";"):
+        equipe = equipe.strip()
+        if not equipe:
+            continue
+        contagens[(equipe, "TOTAL")] += 1
+        if status == "ativo":
+            contagens[(equipe, "ATIVOS")] += 1
+        elif status == "inativo":
+            contagens[(equipe, "INATIVOS")] += 1
+        if orientador:
+            contagens[(equipe, "ORIENTADORES", orientador)] += 1
+    return contagens
+
 
-    for doc in membros:
-        d = doc.to_dict() or {}
-        equipes = _split_equipes(d.get("EQUIPE DE PROJETO", ""))
-        if not equipes:
+def diferenca_estatisticas(pares: Iterable[Tuple[Dict[str, object] | None, Dict[str, object] | None]]) -> Counter:
+    """Variação das estatísticas de equipe para pares (membro antes, membro depois).
+
+    None representa membro inexistente (criação ou remoção).
+    """
+    total: Counter = Counter()
+    for antes, depois in pares:
+        total.update(_contagens_membro(depois))
+        total.subtract(_contagens_membro(antes))
+    return Counter({chave: n for chave, n in total.items() if n})
+
+
+def _estatisticas_por_equipe(diferenca: Counter) -> Dict[str, Dict[str, object]]:
+    """Agrupa a variação por documento de equipe (slug): {slug: {"EQUIPE", campo: n, "ORIENTADORES": {nome: n}}}."""
+    docs: Dict[str, Dict[str, object]] = {}
+    for (equipe, campo, *orientador), n in diferenca.items():
+        slug = slugify_equipe_nome(equipe)
+        if not slug:
             continue
-        status = _status_normalizado(d.get("STATUS", ""))
-        orientador = str(d.get("ORIENTADOR", "")).strip()
-        for equipe in equipes:
-            if equipe not in stats:
-                stats[equipe] = {
-                    "EQUIPE": equipe,
-                    "Membros Ativos": 0,
-                    "Membros Inativos": 0,
-                    "Total": 0,
-                    "_orientadores": set(),
-                }
-            item = stats[equipe]
-            item["Total"] = int(item["Total"]) + 1
-            if status == "Ativo":
-                item["Membros Ativos"] = int(item["Membros Ativos"]) + 1
-            elif status == "Inativo":
-                item["Membros Inativos"] = int(item["Membros Inativos"]) + 1
-            if orientador:
-                item["_orientadores"].add(orientador)
-
-    # Converte para DataFrame e computa Status e Orientadores
-    lista: List[Dict[str, object]] = []
-    for v in stats.values():
-        ativos = int(v.get("Membros Ativos", 0))
-        status_eq = "Ativa" if ativos >= 2 else "Inativa"
-        orientadores = ", ".join(sorted(v.get("_orientadores", set())))
-        lista.append(
-            {
-                "EQUIPE": v["EQUIPE"],
-                "Membros Ativos": ativos,
-                "Membros Inativos": int(v.get("Membros Inativos", 0)),
-                "Total": int(v.get("Total", 0)),
-                "Status": status_eq,
-                "Orientadores": orientadores,
-            }
-        )
-
-    if not lista:
-        return pd.DataFrame(columns=[
-            "EQUIPE",
-            "Membros Ativos",
-            "Membros Inativos",
-            "Total",
-            "Status",
-            "Orientadores",
-        ])
-    return pd.DataFrame(lista).sort_values(by=["Membros Ativos", "Total"], ascending=[False, False]).reset_index(drop=True)
-
-
-def listar_equipes_firestore() -> pd.DataFrame:
-    """Lista equipes combinando a coleção de equipes com as métricas derivadas dos membros."""
-    # Deriva métricas a partir dos membros
-    df_stats = _agrupar_equipes_por_membros()
-
-    # Carrega equipes cadastradas explicitamente (podem existir mesmo sem membros)
-    docs = list(db.collection(COLLECTION_EQUIPES).stream())
+        doc = docs.setdefault(slug, {"EQUIPE": equipe})
+        if orientador:
+            mapa = doc.setdefault("ORIENTADORES", {})
+            mapa[orientador[0]] = mapa.get(orientador[0], 0) + n
+        else:
+            doc[campo] = doc.get(campo, 0) + n
+    return docs
+
+
+def _incrementos(variacao: Dict[str, object]) -> Dict[str, object]:
+    payload: Dict[str, object] = {"EQUIPE": variacao["EQUIPE"]}
+    for campo, n in variacao.items():
+        if campo == "ORIENTADORES":
+            payload[campo] = {nome: Increment(k) for nome, k in n.items()}
+        elif campo != "EQUIPE":
+            payload[campo] = Increment(n)
+    return payload
+
+
+def _aplicar_estatisticas_no_frame(docs: Dict[str, Dict[str, object]]) -> None:
+    atuais = cache_estatisticas.registros(docs)
+    for slug, variacao in docs.items():
+        atual = atuais.get(slug, {})
+        orientadores = atual.get("ORIENTADORES")
+        orientadores = dict(orientadores) if isinstance(orientadores, dict) else {}
+        for nome, n in variacao.get("ORIENTADORES", {}).items():
+            orientadores[nome] = _inteiro(orientadores.get(nome)) + n
+        registro = {"ID": slug, "EQUIPE": variacao["EQUIPE"], "ORIENTADORES": orientadores}
+        for campo in ("ATIVOS", "INATIVOS", "TOTAL"):
+            registro[campo] = _inteiro(atual.get(campo)) + int(variacao.get(campo, 0))
+        cache_estatisticas.inserir(registro)
+
+
+def gravar_estatisticas(diferenca: Counter, batch=None) -> int:
+    """Grava a variação das estatísticas com `Increment` (no `batch` informado ou em lotes próprios).
+
+    Retorna o número de documentos de estatística escritos; com `batch`, quem confirma o
+    lote é que conta essas escritas.
+    """
+    docs = _estatisticas_por_equipe(diferenca)
+    if not docs:
+        return 0
+    colecao = db.collection(COLLECTION_ESTATISTICAS)
+    itens = list(docs.items())
+    if batch is not None:
+        for slug, variacao in itens:
+            batch.set(colecao.document(slug), _incrementos(variacao), merge=True)
+    else:
+        for inicio in range(0, len(itens), LIMITE_LOTE):
+            lote = db.batch()
+            for slug, variacao in itens[inicio:inicio + LIMITE_LOTE]:
+                lote.set(colecao.document(slug), _incrementos(variacao), merge=True)
+            lote.commit()
+            contar(escritas=len(itens[inicio:inicio + LIMITE_LOTE]))
+    _aplicar_estatisticas_no_frame(docs)
+    return len(itens)
+
+
+def enfileirar_estatisticas(diferenca: Counter) -> List[str]:
+    """Versão assíncrona de `gravar_estatisticas` (fila de escrita); retorna os ids das edições."""
+    docs = _estatisticas_por_equipe(diferenca)
+    ids = [
+        fila_equipes().enfileirar(COLLECTION_ESTATISTICAS, slug, _incrementos(variacao), modo="merge")
+        for slug, variacao in docs.items()
+    ]
+    _aplicar_estatisticas_no_frame(docs)
+    return ids
+
+
+def reconstruir_estatisticas() -> int:
+    """Recalcula a coleção de estatísticas a partir de todos os membros (carga inicial ou correção).
+
+    Retorna o número de equipes gravadas.
+    """
+    contagens: Counter = Counter()
+    for doc in db.collection(COLLECTION_MEMBROS).stream():
+        contagens.update(_contagens_membro(doc.to_dict() or {}))
+    docs = _estatisticas_por_equipe(contagens)
+    colecao = db.collection(COLLECTION_ESTATISTICAS)
+    obsoletos = [doc.reference for doc in colecao.stream() if doc.id not in docs]
+    operacoes = [("set", colecao.document(slug), variacao) for slug, variacao in docs.items()]
+    operacoes += [("delete", ref, None) for ref in obsoletos]
+    for inicio in range(0, len(operacoes), LIMITE_LOTE):
+        lote = db.batch()
+        for tipo, ref, dados in operacoes[inicio:inicio + LIMITE_LOTE]:
+            if tipo == "set":
+                lote.set(ref, {"ATIVOS": 0, "INATIVOS": 0, "TOTAL": 0, "ORIENTADORES": {}, **dados})
+            else:
+                lote.delete(ref)
+        lote.commit()
+    cache_estatisticas.invalidar()
+    return len(docs)
+
+
+@medir(leituras_por_linha=True)
+def listar_estatisticas_equipes() -> pd.DataFrame:
+    """Documentos da coleção de estatísticas (uma leitura por equipe)."""
+    lista = []
+    for doc in db.collection(COLLECTION_ESTATISTICAS).stream():
+        item = doc.to_dict() or {}
+        item["ID"] = doc.id
+        lista.append(item)
+    return pd.DataFrame(lista)
+
+
+def _equipes_por_estatisticas(df_estatisticas: pd.DataFrame) -> pd.DataFrame:
+    """Converte os documentos de estatísticas nas colunas de `COLUNAS_EQUIPES`."""
+    linhas = []
+    for registro in df_estatisticas.to_dict("records"):
+        total = _inteiro(registro.get("TOTAL"))
+        equipe = _texto(registro.get("EQUIPE"))
+        if total <= 0 or not equipe:
+            continue
+        ativos = _inteiro(registro.get("ATIVOS"))
+        orientadores = registro.get("ORIENTADORES")
+        orientadores = orientadores if isinstance(orientadores, dict) else {}
+        linhas.append({
+            "EQUIPE": equipe,
+            "Membros Ativos": ativos,
+            "Membros Inativos": _inteiro(registro.get("INATIVOS")),
+            "Total": total,
+            "Status": "Ativa" if ativos >= 2 else "Inativa",
+            "Orientadores": ", ".join(sorted(nome for nome, n in orientadores.items() if _inteiro(n) > 0)),
+        })
+    if not linhas:
+        return pd.DataFrame(columns=COLUNAS_EQUIPES)
+    df = pd.DataFrame(linhas, columns=COLUNAS_EQUIPES)
+    return df.sort_values(by=["Membros Ativos", "Total"], ascending=[False, False]).reset_index(drop=True)
+
+
+@medir()
+def listar_equipes_firestore(
+    df_cadastradas: pd.DataFrame | None = None,
+    df_estatisticas: pd.DataFrame | None = None,
+    df_membros: pd.DataFrame | None = None,
+) -> pd.DataFrame:
+    """Lista equipes combinando a coleção de equipes com as estatísticas materializadas.
+
+    Sem argumentos, usa os frames compartilhados. Enquanto a coleção de estatísticas
+    estiver vazia (antes de `reconstruir_estatisticas`), as métricas são derivadas dos membros.
+    """
+    if df_cadastradas is None:
+        df_cadastradas = cache_equipes.obter()
+    if df_estatisticas is None:
+        df_estatisticas = cache_estatisticas.obter()
+
+    df_stats = _equipes_por_estatisticas(df_estatisticas)
+    if df_stats.empty:
+        if df_membros is None:
+            from controllers.membros_controller import cache_membros  # import pontual para evitar ciclos
+
+            df_membros = cache_membros.obter()
+        df_stats = _agrupar_equipes_por_membros(df_membros)
+
+    # Equipes cadastradas explicitamente (podem existir mesmo sem membros)
     equipes_explicit: Dict[str, Dict[str, object]] = {}
-    for doc in docs:
-        d = doc.to_dict() or {}
+    for d in df_cadastradas.to_dict("records"):
+        d = {k: v for k, v in d.items() if not (isinstance(v, float) and pd.isna(v))}
         nome = d.get("NOME") or d.get("nome")
         if not nome:
             continue
@@ -113,9 +290,9 @@ def listar_equipes_firestore() -> pd.DataFrame:
         return df_stats
 
     # Une por nome de equipe
-    linhas: Dict[str, Dict[str, object]] = {}
-    for _, row in df_stats.iterrows():
-        linhas[row["EQUIPE"]] = dict(row)
+    linhas: Dict[str, Dict[str, object]] = {
+        row["EQUIPE"]: row for row in df_stats.to_dict("records")
+    }
 
     for nome, data in equipes_explicit.items():
         if nome in linhas:
@@ -139,6 +316,12 @@ def listar_equipes_firestore() -> pd.DataFrame:
     return pd.DataFrame(linhas.values()).sort_values(by=["Membros Ativos", "Total"], ascending=[False, False]).reset_index(drop=True)
 
 
+def _aplicar_no_frame(slug: str, dados_fmt: Dict[str, object]) -> None:
+    if not cache_equipes.atualizar(slug, dados_fmt):
+        cache_equipes.inserir({**dados_fmt, "ID": slug})
+
+
+@medir(escritas=1)
 def salvar_equipe_firestore(dados: Dict[str, object]) -> Tuple[str, Dict[str, object]]:
     """Cria/atualiza uma equipe na coleção de equipes.
 
@@ -149,43 +332,66 @@ def salvar_equipe_firestore(dados: Dict[str, object]) -> Tuple[str, Dict[str, ob
     if not slug:
         raise ValueError("Nome da equipe é obrigatório")
     db.collection(COLLECTION_EQUIPES).document(slug).set(dados_fmt)
+    _aplicar_no_frame(slug, dados_fmt)
     return slug, dados_fmt
 
 
-def deletar_equipe(nome_ou_slug: str, cascade: bool = False, desassociar: bool = False) -> None:
+@medir(escritas=1)
+def atualizar_equipe_campos(nome: str, campos: Dict[str, object]) -> str:
+    """Grava somente os campos alterados da equipe (`set` com merge; cria o doc se faltar).
+
+    Retorna o slug do documento.
+    """
+    dados_fmt = formatar_campos_equipe({**campos, "NOME": nome})
+    slug = slugify_equipe_nome(dados_fmt.get("NOME", ""))
+    if not slug:
+        raise ValueError("Nome da equipe é obrigatório")
+    db.collection(COLLECTION_EQUIPES).document(slug).set(dados_fmt, merge=True)
+    _aplicar_no_frame(slug, dados_fmt)
+    return slug
+
+
+def enfileirar_atualizacao_equipe(nome: str, campos: Dict[str, object]) -> str:
+    """Versão assíncrona de `atualizar_equipe_campos` (fila de escrita); retorna o id da edição."""
+    dados_fmt = formatar_campos_equipe({**campos, "NOME": nome})
+    slug = slugify_equipe_nome(dados_fmt.get("NOME", ""))
+    if not slug:
+        raise ValueError("Nome da equipe é obrigatório")
+    _aplicar_no_frame(slug, dados_fmt)
+    return fila_equipes().enfileirar(COLLECTION_EQUIPES, slug, dados_fmt, modo="merge")
+
+
+def fila_equipes() -> FilaEscrita:
+    return obter_fila(db)
+
+
+@medir()
+def deletar_equipe(nome_ou_slug: str, cascade: bool = False, desassociar: bool = False) -> dict[str, list[str]]:
     """Remove a equipe da coleção de equipes.
 
     - cascade=True: remove também os membros associados à equipe.
     - desassociar=True: apenas remove a referência da equipe nos membros (não deleta membros).
+
+    Retorna o resultado da operação nos membros ({"removidos"/"alterados": [...], "falhas": [...]}).
     """
     slug = slugify_equipe_nome(nome_ou_slug)
     # Apaga doc de equipe (se existir)
     db.collection(COLLECTION_EQUIPES).document(slug).delete()
+    contar(escritas=1)
+    cache_equipes.remover([slug])
 
     if not (cascade or desassociar):
-        return
+        return {"falhas": []}
 
-    # Opera sobre membros da equipe
-    from controllers.membros_controller import deletar_membro  # import pontual para evitar ciclos
+    # Opera apenas sobre os membros da equipe (índice EQUIPES_SLUGS)
+    from controllers.membros_controller import deletar_membros_da_equipe, desassociar_equipe  # import pontual para evitar ciclos
 
-    membros = db.collection(COLLECTION_MEMBROS).stream()
-    for doc in membros:
-        d = doc.to_dict() or {}
-        equipes = _split_equipes(d.get("EQUIPE DE PROJETO", ""))
-        if not equipes:
-            continue
-        nome_alvo = nome_ou_slug.strip()
-        if nome_alvo not in equipes:
-            continue
-        if cascade:
-            deletar_membro(doc.id)
-        elif desassociar:
-            # Remove apenas a equipe do campo, mantendo demais
-            novas = [e for e in equipes if e != nome_alvo]
-            novo_valor = ";".join(novas)
-            db.collection(COLLECTION_MEMBROS).document(doc.id).update({"EQUIPE DE PROJETO": novo_valor})
+    if cascade:
+        return deletar_membros_da_equipe(slug)
+    return desassociar_equipe(slug)
 
 
+@medir(leituras_por_linha=True)
 def listar_equipes_cadastradas() -> pd.DataFrame:
     """Lista apenas as equipes explicitamente cadastradas na coleção de equipes."""
     docs = db.collection(COLLECTION_EQUIPES).stream()
@@ -195,3 +401,14 @@ def listar_equipes_cadastradas() -> pd.DataFrame:
         item["ID"] = doc.id
         lista.append(item)
     return pd.DataFrame(lista)
+
+
+# Frame da coleção de equipes cadastradas, compartilhado no processo e indexado pelo slug (ID)
+cache_equipes = registrar_frame("equipes", listar_equipes_cadastradas, chave="ID", ttl=60)
+# Frame da coleção de estatísticas por equipe, também indexado pelo slug
+cache_estatisticas = registrar_frame("estatisticas_equipes", listar_estatisticas_equipes, chave="ID", ttl=60)
+
+
+if __name__ == "__main__":
+    # Carga inicial/correção: python -m controllers.equipes_controller
+    print(f"Estatísticas reconstruídas para {reconstruir_estatisticas()} equipes.")
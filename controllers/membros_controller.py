@@ -1,12 +1,28 @@
 from utils.firebase_utils import init_firestore
+from utils.cache_frames import registrar_frame
+from utils.carga_inicial import garantir_carga_inicial
+from controllers.equipes_controller import (
+    CAMPOS_ESTATISTICA,
+    diferenca_estatisticas,
+    enfileirar_estatisticas,
+    gravar_estatisticas,
+)
 from utils.data_cleaning import clean_members_dataframe
-from models.membro_model import formatar_membro_para_firestore
+from utils.fila_escrita import FilaEscrita, obter_fila
+from utils.firestore_async import consultar_valores, excluir_em_lotes, gravar_em_lotes
+from utils.instrumentacao import contar, medir
+from utils.metadados import marcar_concluido, migracao_concluida
+from models.membro_model import formatar_campos_membro, formatar_membro_para_firestore, slugs_equipes
 import pandas as pd
 import os
 import re
+import time
+from collections import OrderedDict
 from datetime import datetime
 from typing import Sequence
 
+from google.cloud.firestore import FieldPath
+
 db = init_firestore()
 
 COLLECTION = "membros_gp"
@@ -40,20 +56,36 @@ CAMPOS_PADRAO = list(
     )
 )
 
+# Limite de valores aceitos pelo operador "in" do Firestore
+LIMITE_CONSULTA_IN = 30
+LIMITE_LOTE = 500
+
+# Marcador (em metadados_gp) de que todos os membros têm o índice EQUIPES_SLUGS
+MIGRACAO_INDICE_EQUIPES = "indice_equipes_membros"
+
 _SINCRONIZACAO_REALIZADA = False
 
+# Cache curto de documentos lidos individualmente (perfil do membro)
+TTL_CACHE_MEMBRO = 60
+MAX_CACHE_MEMBRO = 256
+_CACHE_MEMBROS: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+
 def importar_csv_para_firestore():
     if os.path.exists(CSV_PATH):
         df = pd.read_csv(CSV_PATH)
         df = clean_members_dataframe(df)
+        pares = []
         for _, row in df.iterrows():
-            salvar_membro_firestore(row.to_dict())
+            # Coleção vazia: não há estado anterior a consultar para as estatísticas
+            dados_fmt = _gravar_membro(row.to_dict())
+            if dados_fmt is not None:
+                pares.append((None, dados_fmt))
+        gravar_estatisticas(diferenca_estatisticas(pares))
 
 def verificar_e_persistir_dados():
-    membros = list(db.collection(COLLECTION).stream())
-    if not membros:
-        importar_csv_para_firestore()
+    garantir_carga_inicial(db, COLLECTION, importar_csv_para_firestore)
 
+@medir(leituras_por_linha=True)
 def listar_membros_firestore():
     global _SINCRONIZACAO_REALIZADA
     verificar_e_persistir_dados()
@@ -75,66 +107,319 @@ def listar_membros_firestore():
         lista.append(item)
     return pd.DataFrame(lista)
 
+# Frame de membros compartilhado no processo; as escritas abaixo o atualizam localmente
+cache_membros = registrar_frame("membros", listar_membros_firestore, chave="CPF", ttl=60)
+
+
+def _consulta_membros(status: str | None = None):
+    consulta = db.collection(COLLECTION)
+    if status:
+        consulta = consulta.where("STATUS", "==", status)
+    return consulta
+
+
+@medir(leituras_por_linha=True)
+def listar_membros_pagina(
+    tamanho: int,
+    apos=None,
+    status: str | None = None,
+) -> tuple[pd.DataFrame, object | None]:
+    """Lê uma página de membros ordenada pelo ID do documento (CPF).
+
+    `apos` é o cursor devolvido pela página anterior (None para a primeira).
+    Retorna (df_pagina, cursor_seguinte); o cursor é None quando não há mais páginas.
+    """
+    consulta = _consulta_membros(status).order_by(FieldPath.document_id()).limit(tamanho)
+    if apos is not None:
+        consulta = consulta.start_after(apos)
+    docs = list(consulta.stream())
+    lista = []
+    for doc in docs:
+        item = doc.to_dict()
+        item["CPF"] = doc.id
+        lista.append(item)
+    proximo = docs[-1] if len(docs) == tamanho else None
+    return pd.DataFrame(lista), proximo
+
+
+def contar_membros(status: str | None = None) -> int:
+    """Total de membros com o `status` (todos, se None), via consulta de agregação (count)."""
+    resultado = _consulta_membros(status).count().get()
+    return int(resultado[0][0].value)
+
+
+def obter_membro(cpf: str) -> dict | None:
+    """Lê um único membro pelo ID do documento (CPF), com cache de `TTL_CACHE_MEMBRO` segundos.
+
+    Retorna None se o documento não existir; erros de acesso ao Firestore são propagados.
+    """
+    chave = str(cpf).strip()
+    if not chave:
+        return None
+    agora = time.monotonic()
+    em_cache = _CACHE_MEMBROS.get(chave)
+    if em_cache is not None and agora - em_cache[0] < TTL_CACHE_MEMBRO:
+        return dict(em_cache[1])
+    doc = db.collection(COLLECTION).document(chave).get()
+    if not doc.exists:
+        _CACHE_MEMBROS.pop(chave, None)
+        return None
+    item = doc.to_dict() or {}
+    item["CPF"] = doc.id
+    _CACHE_MEMBROS[chave] = (agora, item)
+    _CACHE_MEMBROS.move_to_end(chave)
+    while len(_CACHE_MEMBROS) > MAX_CACHE_MEMBRO:
+        _CACHE_MEMBROS.popitem(last=False)
+    return dict(item)
+
+
+def _invalidar_cache_membro(cpf) -> None:
+    _CACHE_MEMBROS.pop(str(cpf).strip(), None)
+
+
+def _estado_membros(cpfs) -> dict[str, dict]:
+    """Estado atual dos membros (para a variação das estatísticas de equipe).
+
+    Usa o frame em memória; os ausentes dele são lidos do Firestore (`get_all`).
+    Membros inexistentes não aparecem no resultado.
+    """
+    cpfs = [str(cpf) for cpf in cpfs]
+    estado = cache_membros.registros(cpfs)
+    faltantes = [cpf for cpf in cpfs if cpf not in estado]
+    if faltantes:
+        refs = [db.collection(COLLECTION).document(cpf) for cpf in faltantes]
+        for doc in db.get_all(refs):
+            if doc.exists:
+                estado[doc.id] = doc.to_dict() or {}
+    return estado
+
+
+def _gravar_membro(dados, antes: dict | None = None, estatisticas: bool = False) -> dict | None:
+    doc_id = dados.get("CPF") or dados.get("MATRÍCULA")
+    if not doc_id:
+        return None
+    dados_fmt = formatar_membro_para_firestore(dados.copy())
+    batch = db.batch()
+    batch.set(db.collection(COLLECTION).document(str(doc_id)), dados_fmt)
+    escritas = 1
+    if estatisticas:
+        escritas += gravar_estatisticas(diferenca_estatisticas([(antes, dados_fmt)]), batch=batch)
+    batch.commit()
+    contar(escritas=escritas)
+    _invalidar_cache_membro(doc_id)
+    cache_membros.inserir({**dados_fmt, "CPF": str(doc_id)})
+    return dados_fmt
+
+
+@medir()
 def salvar_membro_firestore(dados):
     doc_id = dados.get("CPF") or dados.get("MATRÍCULA")
     if not doc_id:
         return
-    dados_fmt = formatar_membro_para_firestore(dados.copy())
-    db.collection(COLLECTION).document(str(doc_id)).set(dados_fmt)
+    antes = _estado_membros([doc_id]).get(str(doc_id))
+    _gravar_membro(dados, antes, estatisticas=True)
+
+@medir()
+def atualizar_membro_campos(cpf: str, campos: dict) -> None:
+    """Atualiza apenas os campos informados do membro (`update` parcial).
 
+    DATA CADASTRO nunca é sobrescrita; DATA ATUALIZACAO registra o momento da alteração.
+    Mudanças de STATUS, EQUIPE DE PROJETO ou ORIENTADOR atualizam as estatísticas de equipe no mesmo lote.
+    """
+    if not campos:
+        return
+    dados = formatar_campos_membro({campo: _sanitize_value(valor) for campo, valor in campos.items()})
+    ref = db.collection(COLLECTION).document(str(cpf))
+    if set(dados) & set(CAMPOS_ESTATISTICA):
+        antes = _estado_membros([cpf]).get(str(cpf))
+        batch = db.batch()
+        batch.update(ref, dados)
+        escritas = 1
+        if antes is not None:
+            escritas += gravar_estatisticas(diferenca_estatisticas([(antes, {**antes, **dados})]), batch=batch)
+        batch.commit()
+        contar(escritas=escritas)
+    else:
+        ref.update(dados)
+        contar(escritas=1)
+    _invalidar_cache_membro(cpf)
+    cache_membros.atualizar(cpf, dados)
+
+
+def enfileirar_atualizacao_membro(cpf: str, campos: dict) -> str:
+    """Versão assíncrona de `atualizar_membro_campos`: agenda o `update` na fila de escrita.
+
+    Retorna o id da edição para acompanhar a confirmação (ver `fila_membros`).
+    """
+    dados = formatar_campos_membro({campo: _sanitize_value(valor) for campo, valor in campos.items()})
+    if set(dados) & set(CAMPOS_ESTATISTICA):
+        antes = _estado_membros([cpf]).get(str(cpf))
+        if antes is not None:
+            enfileirar_estatisticas(diferenca_estatisticas([(antes, {**antes, **dados})]))
+    _invalidar_cache_membro(cpf)
+    cache_membros.atualizar(cpf, dados)
+    return fila_membros().enfileirar(COLLECTION, str(cpf), dados)
+
+
+def fila_membros() -> FilaEscrita:
+    return obter_fila(db)
+
+
+@medir()
 def salvar_dataframe_completo(df):
     for _, row in df.iterrows():
         salvar_membro_firestore(row.to_dict())
 
+@medir()
 def deletar_membro(cpf):
-    db.collection(COLLECTION).document(str(cpf)).delete()
-
-
-def deletar_membros(cpfs: list[str]) -> int:
+    antes = _estado_membros([cpf]).get(str(cpf))
+    batch = db.batch()
+    batch.delete(db.collection(COLLECTION).document(str(cpf)))
+    escritas = 1 + gravar_estatisticas(diferenca_estatisticas([(antes, None)]), batch=batch)
+    batch.commit()
+    contar(escritas=escritas)
+    _invalidar_cache_membro(cpf)
+    cache_membros.remover([cpf])
+
+
+@medir()
+def deletar_membros(cpfs: list[str]) -> dict[str, list[str]]:
+    """Remove membros em lotes paralelos; retorna {"removidos": [...], "falhas": [...]}."""
     if not cpfs:
-        return 0
-    removidos = 0
-    for cpf in cpfs:
-        try:
-            db.collection(COLLECTION).document(str(cpf)).delete()
-            removidos += 1
-        except Exception:
+        return {"removidos": [], "falhas": []}
+    estado = _estado_membros(cpfs)
+    return _excluir_membros(estado, cpfs)
+
+
+def _excluir_membros(estado: dict[str, dict], cpfs) -> dict[str, list[str]]:
+    resultado = excluir_em_lotes(COLLECTION, cpfs)
+    removidos = resultado["removidos"]
+    for cpf in removidos:
+        _invalidar_cache_membro(cpf)
+    gravar_estatisticas(diferenca_estatisticas((estado.get(cpf), None) for cpf in removidos))
+    cache_membros.remover(removidos)
+    return resultado
+
+
+def membros_da_equipe(slug: str) -> dict[str, dict]:
+    """Membros vinculados à equipe, por CPF.
+
+    Consulta `array_contains` no índice EQUIPES_SLUGS; enquanto o índice não estiver
+    concluído em todos os documentos (`indexar_equipes_membros`), percorre a coleção.
+    """
+    if migracao_concluida(db, MIGRACAO_INDICE_EQUIPES):
+        docs = db.collection(COLLECTION).where("EQUIPES_SLUGS", "array_contains", slug).stream()
+        return {doc.id: doc.to_dict() or {} for doc in docs}
+    membros = {}
+    for doc in db.collection(COLLECTION).stream():
+        dados = doc.to_dict() or {}
+        if slug in slugs_equipes(dados.get("EQUIPE DE PROJETO")):
+            membros[doc.id] = dados
+    return membros
+
+
+@medir()
+def deletar_membros_da_equipe(slug: str) -> dict[str, list[str]]:
+    """Remove, em lotes, todos os membros vinculados à equipe."""
+    membros = membros_da_equipe(slug)
+    return _excluir_membros(membros, list(membros))
+
+
+def desassociar_equipe(slug: str) -> dict[str, list[str]]:
+    """Retira a equipe do campo EQUIPE DE PROJETO dos membros vinculados (em lotes).
+
+    Retorna {"alterados": [...], "falhas": [...]} com os CPFs.
+    """
+    alteracoes: dict[str, dict] = {}
+    pares = {}
+    for cpf, dados in membros_da_equipe(slug).items():
+        equipes = [e.strip() for e in str(dados.get("EQUIPE DE PROJETO") or "").split(";") if e.strip()]
+        novas = [e for e in equipes if slugs_equipes(e) != [slug]]
+        campos = formatar_campos_membro({"EQUIPE DE PROJETO": ";".join(novas)})
+        alteracoes[cpf] = campos
+        pares[cpf] = (dados, {**dados, **campos})
+    resultado = gravar_em_lotes(COLLECTION, [("update", cpf, campos) for cpf, campos in alteracoes.items()])
+    gravados = set(resultado["gravados"])
+    gravar_estatisticas(diferenca_estatisticas(par for cpf, par in pares.items() if cpf in gravados))
+    for cpf in gravados:
+        _invalidar_cache_membro(cpf)
+        cache_membros.atualizar(cpf, alteracoes[cpf])
+    return {"alterados": resultado["gravados"], "falhas": resultado["falhas"]}
+
+
+def indexar_equipes_membros() -> int:
+    """Preenche EQUIPES_SLUGS nos membros que não o têm (ou o têm desatualizado) e marca a migração.
+
+    Retorna o número de documentos corrigidos.
+    """
+    pendentes = []
+    for doc in db.collection(COLLECTION).stream():
+        dados = doc.to_dict() or {}
+        slugs = slugs_equipes(dados.get("EQUIPE DE PROJETO"))
+        if dados.get("EQUIPES_SLUGS") != slugs:
+            pendentes.append((doc.reference, slugs))
+    for inicio in range(0, len(pendentes), LIMITE_LOTE):
+        batch = db.batch()
+        for ref, slugs in pendentes[inicio:inicio + LIMITE_LOTE]:
+            batch.update(ref, {"EQUIPES_SLUGS": slugs})
+        batch.commit()
+    marcar_concluido(db, MIGRACAO_INDICE_EQUIPES)
+    cache_membros.invalidar()
+    return len(pendentes)
+
+
+def substituir_valores_campo(campo: str, mapeamento: dict) -> dict:
+    """Reescreve `campo` em massa conforme {valor_antigo: valor_novo}.
+
+    As consultas `in` (em blocos de `LIMITE_CONSULTA_IN` valores) e os lotes de escrita
+    rodam em paralelo pela camada assíncrona. Retorna {"alterados": {valor_antigo: documentos
+    alterados}, "falhas": [valores antigos cuja consulta ou gravação falhou]}.
+    """
+    mapeamento = {antigo: novo for antigo, novo in mapeamento.items() if antigo != novo}
+    contagens = {antigo: 0 for antigo in mapeamento}
+    if not mapeamento:
+        return {"alterados": contagens, "falhas": []}
+    docs, falhas = consultar_valores(COLLECTION, campo, mapeamento)
+
+    alteracoes = {}
+    for doc in docs:
+        dados = doc.to_dict() or {}
+        antigo = dados.get(campo)
+        if antigo not in mapeamento:
             continue
-    return removidos
-
+        alteracoes[doc.id] = (antigo, dados, formatar_campos_membro({campo: mapeamento[antigo]}))
 
-def remover_projetos(projetos: list[str]) -> int:
+    resultado = gravar_em_lotes(
+        COLLECTION, [("update", cpf, campos) for cpf, (_, _, campos) in alteracoes.items()]
+    )
+    pares = []
+    for cpf in resultado["gravados"]:
+        antigo, dados, campos = alteracoes[cpf]
+        contagens[antigo] += 1
+        pares.append((dados, {**dados, **campos}))
+        _invalidar_cache_membro(cpf)
+        cache_membros.atualizar(cpf, campos)
+    if campo in CAMPOS_ESTATISTICA:
+        gravar_estatisticas(diferenca_estatisticas(pares))
+    falhas.extend(alteracoes[cpf][0] for cpf in resultado["falhas"])
+    return {"alterados": contagens, "falhas": list(dict.fromkeys(falhas))}
+
+
+def remover_projetos(projetos: list[str]) -> dict:
+    """Limpa PROJETO ATUAL dos membros dos `projetos`; retorna {"alterados": n, "falhas": [...]}."""
     if not projetos:
-        return 0
-    alterados = 0
-    for projeto in projetos:
-        try:
-            docs = db.collection(COLLECTION).where("PROJETO ATUAL", "==", projeto).stream()
-        except Exception:
-            continue
-        for doc in docs:
-            try:
-                db.collection(COLLECTION).document(doc.id).update({"PROJETO ATUAL": ""})
-                alterados += 1
-            except Exception:
-                continue
-    return alterados
+        return {"alterados": 0, "falhas": []}
+    resultado = substituir_valores_campo("PROJETO ATUAL", {projeto: "" for projeto in projetos})
+    return {"alterados": sum(resultado["alterados"].values()), "falhas": resultado["falhas"]}
 
 
-def substituir_valor_campo(campo: str, valor_antigo: str, valor_novo: str) -> int:
-    """Substitui valor de um campo em todos os documentos que o possuem."""
-    try:
-        docs = db.collection(COLLECTION).where(campo, "==", valor_antigo).stream()
-    except Exception:
-        return 0
-    alterados = 0
-    for doc in docs:
-        try:
-            db.collection(COLLECTION).document(doc.id).update({campo: valor_novo})
-            alterados += 1
-        except Exception:
-            continue
-    return alterados
+def substituir_valor_campo(campo: str, valor_antigo: str, valor_novo: str) -> dict:
+    """Substitui valor de um campo em todos os documentos que o possuem.
+
+    Retorna {"alterados": n, "falhas": [...]} (falhas: o valor, se a consulta ou gravação falhou).
+    """
+    resultado = substituir_valores_campo(campo, {valor_antigo: valor_novo})
+    return {"alterados": resultado["alterados"].get(valor_antigo, 0), "falhas": resultado["falhas"]}
 
 
 def _normalizar_chave(valor):
@@ -215,6 +500,7 @@ def _localizar_row_csv(lookup: dict[str, dict[str, pd.Series]], dados: dict, doc
     return None
 
 
+@medir()
 def sincronizar_campos_membros(campos_base: Sequence[str] | None = None) -> dict:
     campos = list(dict.fromkeys((campos_base or CAMPOS_PADRAO) + ["PROJETO ATUAL", "DATA CADASTRO"]))
 
@@ -230,9 +516,11 @@ def sincronizar_campos_membros(campos_base: Sequence[str] | None = None) -> dict
 
     documentos = list(db.collection(COLLECTION).stream())
     atualizados: list[str] = []
+    pares: list[tuple[dict, dict]] = []
 
     for doc in documentos:
         dados = doc.to_dict() or {}
+        original = dict(dados)
         if "CPF" not in dados or not dados.get("CPF"):
             dados["CPF"] = doc.id
         linha_csv = _localizar_row_csv(lookup, dados, doc.id) if lookup else None
@@ -261,11 +549,21 @@ def sincronizar_campos_membros(campos_base: Sequence[str] | None = None) -> dict
 
         if atualizou:
             dados_persistencia = {ch: _sanitize_value(val) for ch, val in dados.items()}
+            dados_persistencia["EQUIPES_SLUGS"] = slugs_equipes(dados_persistencia.get("EQUIPE DE PROJETO"))
             db.collection(COLLECTION).document(str(doc.id)).set(dados_persistencia, merge=True)
             atualizados.append(doc.id)
+            pares.append((original, dados_persistencia))
+
+    gravar_estatisticas(diferenca_estatisticas(pares))
+    contar(leituras=len(documentos), escritas=len(atualizados))
 
     return {
         "total_documentos": len(documentos),
         "atualizados": atualizados,
         "csv_utilizado": not df_csv.empty,
     }
+
+
+if __name__ == "__main__":
+    # Migração do índice de equipes: python -m controllers.membros_controller
+    print(f"Índice EQUIPES_SLUGS gravado em {indexar_equipes_membros()} membros.")
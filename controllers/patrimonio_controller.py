@@ -1,24 +1,42 @@
 from __future__ import annotations
 
+import threading
+from collections import OrderedDict
+from datetime import datetime
 from uuid import uuid4
 
+import numpy as np
 import pandas as pd
+from google.api_core.exceptions import NotFound
 
 from models.patrimonio_model import (
+    atualizar_campos_patrimonio_csv,
     carregar_patrimonios_csv,
     formatar_patrimonio_para_firestore,
+    padronizar_campos_parciais,
     padronizar_estado_label,
+    padronizar_estados,
     preparar_patrimonios_dataframe,
     remover_patrimonios_csv,
     salvar_ou_atualizar_patrimonio_csv,
     salvar_patrimonio_csv,
 )
+from utils.cache_frames import registrar_frame
+from utils.carga_inicial import garantir_carga_inicial
 from utils.firebase_utils import init_firestore
+from utils.firestore_async import LIMITE_LOTE, excluir_em_lotes
+from utils.instrumentacao import medir
+from utils.metadados import esquema_atualizado, registrar_versao_esquema
+from utils.versao_dados import obter_versao
 
 db = init_firestore()
 COLLECTION = "patrimonios_gp"
+# Versão 1: rótulos de ESTADO gravados já padronizados (ver `migrar_estados_patrimonio`)
+ESQUEMA_PATRIMONIOS = "esquema_patrimonios"
+VERSAO_ESQUEMA_PATRIMONIOS = 1
 
 
+@medir()
 def listar_patrimonios() -> pd.DataFrame:
     try:
         df = listar_patrimonios_firestore()
@@ -32,40 +50,56 @@ def listar_patrimonios() -> pd.DataFrame:
     return _normalizar_dataframe(df)
 
 
+@medir(leituras_por_linha=True)
 def listar_patrimonios_firestore() -> pd.DataFrame:
+    """Lê a coleção sem gravar nada; rótulos de ESTADO legados são padronizados só em memória."""
     _garantir_dados_firestore()
-    documentos = list(db.collection(COLLECTION).stream())
     linhas: list[dict] = []
-    atualizacoes: list[tuple[str, str]] = []
-    for doc in documentos:
+    for doc in db.collection(COLLECTION).stream():
         dados = doc.to_dict() or {}
         if "CODIGO" not in dados or dados["CODIGO"] in ("", None):
             dados["CODIGO"] = doc.id
-        estado_padrao = padronizar_estado_label(dados.get("ESTADO", ""))
-        if estado_padrao and estado_padrao != dados.get("ESTADO", ""):
-            dados["ESTADO"] = estado_padrao
-            atualizacoes.append((str(doc.id), estado_padrao))
         linhas.append(dados)
-    for doc_id, estado in atualizacoes:
-        try:
-            db.collection(COLLECTION).document(doc_id).update({"ESTADO": estado})
-        except Exception:
-            continue
     if not linhas:
         return pd.DataFrame()
     df = pd.DataFrame(linhas)
-    return _normalizar_dataframe(df)
-
-
+    migrado = esquema_atualizado(db, ESQUEMA_PATRIMONIOS, VERSAO_ESQUEMA_PATRIMONIOS)
+    return _normalizar_dataframe(df, estados_padronizados=migrado)
+
+
+def migrar_estados_patrimonio() -> int:
+    """Migração única: padroniza em lote os rótulos de ESTADO gravados e registra a versão do esquema.
+
+    Retorna o número de documentos corrigidos.
+    """
+    pendentes = []
+    for doc in db.collection(COLLECTION).stream():
+        estado = (doc.to_dict() or {}).get("ESTADO", "")
+        padrao = padronizar_estado_label(estado)
+        if padrao and padrao != estado:
+            pendentes.append((doc.reference, padrao))
+    for inicio in range(0, len(pendentes), LIMITE_LOTE):
+        batch = db.batch()
+        for ref, padrao in pendentes[inicio:inicio + LIMITE_LOTE]:
+            batch.update(ref, {"ESTADO": padrao})
+        batch.commit()
+    registrar_versao_esquema(db, ESQUEMA_PATRIMONIOS, VERSAO_ESQUEMA_PATRIMONIOS)
+    cache_patrimonios.invalidar()
+    return len(pendentes)
+
+
+@medir()
 def cadastrar_patrimonio(dados: dict) -> dict:
     registro = salvar_patrimonio_csv(dados)
     try:
         salvar_patrimonio_firestore(registro)
     except Exception:
         pass
+    cache_patrimonios.inserir(registro)
     return registro
 
 
+@medir(escritas=1)
 def salvar_patrimonio_firestore(dados: dict) -> dict:
     registro = formatar_patrimonio_para_firestore(dados)
     doc_id = registro.get("CODIGO") or registro.get("ITEM") or str(uuid4())
@@ -73,31 +107,71 @@ def salvar_patrimonio_firestore(dados: dict) -> dict:
     return registro
 
 
+@medir()
 def salvar_ou_atualizar_patrimonio(dados: dict) -> dict:
     registro = salvar_ou_atualizar_patrimonio_csv(dados)
     try:
         salvar_patrimonio_firestore(registro)
     except Exception:
         pass
+    cache_patrimonios.inserir(registro)
     return registro
 
 
-def deletar_patrimonios(codigos: list) -> int:
+def _doc_id_patrimonio(codigo) -> str:
+    try:
+        return str(int(float(codigo)))
+    except Exception:
+        return str(codigo)
+
+
+@medir(escritas=1)
+def atualizar_patrimonio_campos(codigo, campos: dict, atual: dict | None = None) -> dict:
+    """Atualiza só os campos editados no CSV e no Firestore, recalculando VALOR_TOTAL.
+
+    `atual` (linha antes da edição) completa quantidade/preço quando o item não está no CSV.
+    Retorna os campos efetivamente gravados no Firestore.
+    """
+    campos = {**campos, "DATA_ATUALIZACAO": datetime.now().strftime("%Y-%m-%d")}
+    registro = atualizar_campos_patrimonio_csv(codigo, campos)
+    dados = padronizar_campos_parciais(campos)
+    if "QUANTIDADE" in dados or "PRECO_ESTIMADO" in dados:
+        base = registro or padronizar_campos_parciais(
+            {c: (atual or {}).get(c) for c in ("QUANTIDADE", "PRECO_ESTIMADO")}
+        )
+        quantidade = dados.get("QUANTIDADE", base.get("QUANTIDADE", 0))
+        preco = dados.get("PRECO_ESTIMADO", base.get("PRECO_ESTIMADO", 0.0))
+        dados["VALOR_TOTAL"] = quantidade * preco
+    doc_ref = db.collection(COLLECTION).document(_doc_id_patrimonio(codigo))
+    try:
+        doc_ref.update(dados)
+    except NotFound:
+        if registro is None:
+            raise
+        salvar_patrimonio_firestore({**registro, "CODIGO": codigo})
+    cache_patrimonios.atualizar(_doc_id_patrimonio(codigo), dados)
+    return dados
+
+
+@medir()
+def deletar_patrimonios(codigos: list) -> dict[str, list[str]]:
+    """Remove patrimônios do CSV (uma regravação) e do Firestore (lotes paralelos).
+
+    Retorna {"removidos": [...], "falhas": [...]} conforme o resultado no Firestore.
+    """
     if not codigos:
-        return 0
-    removidos_csv = remover_patrimonios_csv(codigos)
-    for codigo in codigos:
-        try:
-            db.collection(COLLECTION).document(str(codigo)).delete()
-        except Exception:
-            continue
-    return removidos_csv
+        return {"removidos": [], "falhas": []}
+    remover_patrimonios_csv(codigos)
+    resultado = excluir_em_lotes(COLLECTION, [_doc_id_patrimonio(c) for c in codigos])
+    cache_patrimonios.remover(resultado["removidos"])
+    return resultado
 
 
 def _garantir_dados_firestore():
-    docs = list(db.collection(COLLECTION).limit(1).stream())
-    if docs:
-        return
+    garantir_carga_inicial(db, COLLECTION, _importar_csv_para_firestore)
+
+
+def _importar_csv_para_firestore():
     df_csv = carregar_patrimonios_csv()
     if df_csv.empty:
         return
@@ -108,9 +182,10 @@ def _garantir_dados_firestore():
             continue
 
 
-def _normalizar_dataframe(df: pd.DataFrame) -> pd.DataFrame:
+def _normalizar_dataframe(df: pd.DataFrame, estados_padronizados: bool = False) -> pd.DataFrame:
     df = preparar_patrimonios_dataframe(df)
-    df["ESTADO"] = df["ESTADO"].apply(padronizar_estado_label)
+    if not estados_padronizados:
+        df["ESTADO"] = padronizar_estados(df["ESTADO"])
     df["ESTADO_NORMALIZADO"] = df["ESTADO"].astype(str).str.strip().str.title()
     df["ESTADO_NORMALIZADO"] = df["ESTADO_NORMALIZADO"].replace(
         {"Desgastado, Mas Funcional": "Desgastado, mas funcional"}
@@ -120,96 +195,210 @@ def _normalizar_dataframe(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
-def calcular_indicadores(df: pd.DataFrame) -> dict[str, float | int]:
-    if df.empty:
+def _codigos_patrimonio(df: pd.DataFrame) -> pd.Series:
+    if "CODIGO" not in df.columns:
+        return pd.Series([""] * len(df), index=df.index, dtype=str)
+    return df["CODIGO"].map(_doc_id_patrimonio)
+
+
+# Frame de patrimônios compartilhado no processo; linhas alteradas passam pela mesma normalização
+cache_patrimonios = registrar_frame(
+    "patrimonios", listar_patrimonios, chave=_codigos_patrimonio, ttl=120, preparar=_normalizar_dataframe
+)
+
+
+INDICADORES_VAZIOS = {
+    "total_registros": 0,
+    "quantidade_total": 0,
+    "valor_total": 0.0,
+    "valor_em_uso": 0.0,
+    "valor_danificado": 0.0,
+    "categorias_unicas": 0,
+}
+COLUNAS_TOP_ITENS = ["ITEM", "CATEGORIA", "MARCA", "MODELO", "QUANTIDADE", "PRECO_ESTIMADO", "VALOR_TOTAL", "ESTADO"]
+MAX_ANALISES = 8
+
+# Dimensões da tabela de células: (coluna do frame, rótulo exibido)
+_DIMENSOES = {
+    "categoria": ("CATEGORIA_NORMALIZADA", "Categoria"),
+    "estado": ("ESTADO_NORMALIZADO", "Estado"),
+    "situacao": ("SITUACAO_NORMALIZADA", "Situação"),
+}
+
+
+class AnalisePatrimonio:
+    """Indicadores e agrupamentos do inventário a partir de uma única passada sobre o frame.
+
+    Categoria, estado, situação e mês são fatorizados uma vez e combinados numa chave única;
+    um `bincount` por medida produz a tabela de células (uma linha por combinação presente),
+    da qual saem os indicadores e todos os agrupamentos sem voltar ao frame.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self._celulas = self._agregar(df)
+        self._derivados: dict[tuple, object] = {}
+
+    def _memo(self, chave: tuple, calcular):
+        if chave not in self._derivados:
+            self._derivados[chave] = calcular()
+        valor = self._derivados[chave]
+        return valor.copy() if hasattr(valor, "copy") else valor
+
+    @staticmethod
+    def _agregar(df: pd.DataFrame) -> pd.DataFrame:
+        chaves: list[tuple[str, np.ndarray, pd.Index]] = []
+        for nome, (coluna, _) in _DIMENSOES.items():
+            codigos, valores = pd.factorize(df[coluna] if coluna in df.columns else pd.Series("", index=df.index))
+            chaves.append((nome, codigos, pd.Index(valores)))
+        if "DATA_ATUALIZACAO" in df.columns:
+            datas = pd.to_datetime(df["DATA_ATUALIZACAO"], errors="coerce")
+            meses = (datas.dt.year * 12 + datas.dt.month - 1).fillna(-1).to_numpy(dtype=np.int64)
+        else:
+            meses = np.full(len(df), -1, dtype=np.int64)
+        codigos_mes, valores_mes = pd.factorize(meses)
+        rotulos_mes = pd.Index([f"{m // 12:04d}-{m % 12 + 1:02d}" if m >= 0 else None for m in valores_mes])
+        chaves.append(("MES", codigos_mes, rotulos_mes))
+
+        # Códigos -1 (nulos) viram 0; os demais são deslocados em 1
+        chave = np.zeros(len(df), dtype=np.int64)
+        tamanhos = []
+        for _, codigos, valores in chaves:
+            tamanho = len(valores) + 1
+            chave = chave * tamanho + (codigos + 1)
+            tamanhos.append(tamanho)
+        celulas, inverso = np.unique(chave, return_inverse=True)
+
+        medidas = {
+            "Itens": pd.to_numeric(df.get("QUANTIDADE", 0), errors="coerce"),
+            "Valor_Total": pd.to_numeric(df.get("VALOR_TOTAL", 0), errors="coerce"),
+        }
+        tabela = {
+            nome: np.bincount(inverso, weights=np.broadcast_to(np.nan_to_num(np.asarray(valores, dtype=float)), len(df)),
+                              minlength=len(celulas))
+            for nome, valores in medidas.items()
+        }
+        tabela["Registros"] = np.bincount(inverso, minlength=len(celulas))
+        codigos_preenchidos = df["CODIGO"].notna().to_numpy() if "CODIGO" in df.columns else np.zeros(len(df), bool)
+        tabela["Codigos"] = np.bincount(inverso, weights=codigos_preenchidos, minlength=len(celulas)).astype(np.int64)
+
+        restante = celulas
+        for (nome, _, valores), tamanho in zip(reversed(chaves), reversed(tamanhos)):
+            posicao = restante % tamanho
+            restante = restante // tamanho
+            rotulos = np.array([None, *valores], dtype=object)
+            tabela[nome] = rotulos[posicao]
+        return pd.DataFrame(tabela)
+
+    def indicadores(self) -> dict[str, float | int]:
+        return self._memo(("indicadores",), self._indicadores)
+
+    def _indicadores(self) -> dict[str, float | int]:
+        if self.df.empty:
+            return dict(INDICADORES_VAZIOS)
+        celulas = self._celulas
+        estados = celulas["estado"].astype(str)
         return {
-            "total_registros": 0,
-            "quantidade_total": 0,
-            "valor_total": 0.0,
-            "valor_em_uso": 0.0,
-            "valor_danificado": 0.0,
-            "categorias_unicas": 0,
+            "total_registros": int(len(self.df)),
+            "quantidade_total": int(celulas["Itens"].sum()),
+            "valor_total": float(celulas["Valor_Total"].sum()),
+            "valor_em_uso": float(celulas.loc[celulas["situacao"] == "Em Uso", "Valor_Total"].sum()),
+            "valor_danificado": float(
+                celulas.loc[estados.str.contains("Danificado", case=False, na=False), "Valor_Total"].sum()
+            ),
+            "categorias_unicas": int(celulas["categoria"].nunique()),
         }
-    valor_total = float(df["VALOR_TOTAL"].sum())
-    em_uso = df[df["SITUACAO_NORMALIZADA"] == "Em Uso"]["VALOR_TOTAL"].sum()
-    danificados = df[df["ESTADO_NORMALIZADO"].str.contains("Danificado", case=False, na=False)]["VALOR_TOTAL"].sum()
-    return {
-        "total_registros": int(len(df)),
-        "quantidade_total": int(df["QUANTIDADE"].sum()),
-        "valor_total": float(valor_total),
-        "valor_em_uso": float(em_uso),
-        "valor_danificado": float(danificados),
-        "categorias_unicas": int(df["CATEGORIA_NORMALIZADA"].nunique()),
-    }
 
+    def _por(self, dimensao: str, medidas: list[str], ordem: str) -> pd.DataFrame:
+        return self._memo(("por", dimensao), lambda: self._agrupar(dimensao, medidas, ordem))
+
+    def _agrupar(self, dimensao: str, medidas: list[str], ordem: str) -> pd.DataFrame:
+        if self.df.empty:
+            return pd.DataFrame()
+        rotulo = _DIMENSOES[dimensao][1]
+        return (
+            self._celulas.groupby(dimensao)[medidas]
+            .sum()
+            .reset_index()
+            .rename(columns={dimensao: rotulo})
+            .sort_values(by=ordem, ascending=False)
+        )
 
-def agrupar_por_categoria(df: pd.DataFrame, limite: int = 12) -> pd.DataFrame:
-    if df.empty:
-        return pd.DataFrame()
-    agrupado = (
-        df.groupby("CATEGORIA_NORMALIZADA")
-        .agg(
-            Itens=("QUANTIDADE", "sum"),
-            Valor_Total=("VALOR_TOTAL", "sum"),
+    def por_categoria(self, limite: int = 12) -> pd.DataFrame:
+        agrupado = self._por("categoria", ["Itens", "Valor_Total"], "Valor_Total")
+        return agrupado.head(limite) if limite else agrupado
+
+    def por_estado(self) -> pd.DataFrame:
+        return self._por("estado", ["Itens", "Valor_Total"], "Itens")
+
+    def por_situacao(self) -> pd.DataFrame:
+        return self._por("situacao", ["Itens"], "Itens")
+
+    def evolucao_mensal(self) -> pd.DataFrame:
+        return self._memo(("evolucao",), self._evolucao)
+
+    def _evolucao(self) -> pd.DataFrame:
+        base = self._celulas.dropna(subset=["MES"])
+        if self.df.empty or base.empty:
+            return pd.DataFrame()
+        return (
+            base.groupby("MES")
+            .agg(Atualizacoes=("Codigos", "sum"), Valor_Total=("Valor_Total", "sum"))
+            .reset_index()
+            .sort_values("MES")
         )
-        .reset_index()
-        .rename(columns={"CATEGORIA_NORMALIZADA": "Categoria"})
-        .sort_values(by="Valor_Total", ascending=False)
-    )
-    if limite:
-        return agrupado.head(limite)
-    return agrupado
+
+    def top_itens(self, limite: int = 10) -> pd.DataFrame:
+        if self.df.empty:
+            return pd.DataFrame()
+        disponiveis = [c for c in COLUNAS_TOP_ITENS if c in self.df.columns]
+        return self._memo(("top", limite), lambda: self.df.nlargest(limite, "VALOR_TOTAL")[disponiveis])
+
+
+_analises: OrderedDict[tuple, AnalisePatrimonio] = OrderedDict()
+_analises_lock = threading.Lock()
+
+
+def analisar_patrimonio(df: pd.DataFrame) -> AnalisePatrimonio:
+    """Análise do recorte, reaproveitada por impressão digital (versão, formato e índice)."""
+    chave = (obter_versao(df), df.shape)
+    with _analises_lock:
+        analise = _analises.get(chave)
+        if analise is not None and analise.df.index.equals(df.index):
+            _analises.move_to_end(chave)
+            return analise
+    analise = AnalisePatrimonio(df)
+    with _analises_lock:
+        _analises[chave] = analise
+        while len(_analises) > MAX_ANALISES:
+            _analises.popitem(last=False)
+    return analise
+
+
+def calcular_indicadores(df: pd.DataFrame) -> dict[str, float | int]:
+    return analisar_patrimonio(df).indicadores()
+
+
+def agrupar_por_categoria(df: pd.DataFrame, limite: int = 12) -> pd.DataFrame:
+    return analisar_patrimonio(df).por_categoria(limite)
 
 
 def agrupar_por_estado(df: pd.DataFrame) -> pd.DataFrame:
-    if df.empty:
-        return pd.DataFrame()
-    return (
-        df.groupby("ESTADO_NORMALIZADO")
-        .agg(
-            Itens=("QUANTIDADE", "sum"),
-            Valor_Total=("VALOR_TOTAL", "sum"),
-        )
-        .reset_index()
-        .rename(columns={"ESTADO_NORMALIZADO": "Estado"})
-        .sort_values(by="Itens", ascending=False)
-    )
+    return analisar_patrimonio(df).por_estado()
 
 
 def agrupar_por_situacao(df: pd.DataFrame) -> pd.DataFrame:
-    if df.empty:
-        return pd.DataFrame()
-    return (
-        df.groupby("SITUACAO_NORMALIZADA")
-        .agg(Itens=("QUANTIDADE", "sum"))
-        .reset_index()
-        .rename(columns={"SITUACAO_NORMALIZADA": "Situação"})
-        .sort_values(by="Itens", ascending=False)
-    )
+    return analisar_patrimonio(df).por_situacao()
 
 
 def evolucao_por_mes(df: pd.DataFrame) -> pd.DataFrame:
-    if df.empty or "DATA_ATUALIZACAO" not in df.columns:
-        return pd.DataFrame()
-    base = df.dropna(subset=["DATA_ATUALIZACAO"]).copy()
-    if base.empty:
-        return pd.DataFrame()
-    base["MES"] = base["DATA_ATUALIZACAO"].dt.to_period("M").astype(str)
-    agrupado = (
-        base.groupby("MES")
-        .agg(
-            Atualizacoes=("CODIGO", "count"),
-            Valor_Total=("VALOR_TOTAL", "sum"),
-        )
-        .reset_index()
-        .sort_values("MES")
-    )
-    return agrupado
+    return analisar_patrimonio(df).evolucao_mensal()
 
 
 def top_itens_por_valor(df: pd.DataFrame, limite: int = 10) -> pd.DataFrame:
-    if df.empty:
-        return pd.DataFrame()
-    colunas_padrao = ["ITEM", "CATEGORIA", "MARCA", "MODELO", "QUANTIDADE", "PRECO_ESTIMADO", "VALOR_TOTAL", "ESTADO"]
-    disponiveis = [c for c in colunas_padrao if c in df.columns]
-    return df.sort_values(by="VALOR_TOTAL", ascending=False).head(limite)[disponiveis]
+    return analisar_patrimonio(df).top_itens(limite)
+
+
+if __name__ == "__main__":
+    # Migração dos rótulos de ESTADO: python -m controllers.patrimonio_controller
+    print(f"ESTADO padronizado em {migrar_estados_patrimonio()} patrimônios.")
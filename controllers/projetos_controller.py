@@ -0,0 +1,68 @@
+"""Estatísticas de projetos derivadas do campo "PROJETO ATUAL" dos membros."""
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from utils.versao_dados import obter_versao
+
+
+COLUNAS_ESTATISTICAS = ["Projeto", "TOTAL_MEMBROS", "ATIVOS", "INATIVOS", "PENDENTES", "EQUIPES", "ORIENTADORES"]
+STATUS_CONTADOS = {"ATIVOS": "Ativo", "INATIVOS": "Inativo", "PENDENTES": "Pendente"}
+MAX_MEMO = 8
+
+_memo: OrderedDict[tuple, tuple[pd.Index, pd.DataFrame]] = OrderedDict()
+_lock = threading.Lock()
+
+
+def _distintos(df: pd.DataFrame, coluna: str) -> pd.Series:
+    """Valores distintos (não vazios) de `coluna` por projeto, sem agregadores Python."""
+    if coluna not in df.columns:
+        return pd.Series(dtype="int64")
+    pares = df[["PROJETO", coluna]]
+    pares = pares[pares[coluna].notna() & (pares[coluna].astype(str) != "")]
+    return pares.drop_duplicates().groupby("PROJETO", sort=False).size()
+
+
+def _calcular(df: pd.DataFrame) -> pd.DataFrame:
+    if df.empty or "PROJETO ATUAL" not in df.columns:
+        return pd.DataFrame(columns=COLUNAS_ESTATISTICAS)
+    base = df.assign(PROJETO=df["PROJETO ATUAL"].fillna("").astype(str).str.strip())
+    base = base[base["PROJETO"] != ""]
+    if base.empty:
+        return pd.DataFrame(columns=COLUNAS_ESTATISTICAS)
+
+    projetos = pd.Index(base["PROJETO"].unique(), name="PROJETO")
+    resultado = pd.DataFrame(index=projetos)
+    resultado["TOTAL_MEMBROS"] = _distintos(base, "CPF")
+    if "STATUS" in base.columns:
+        por_status = base.groupby(["PROJETO", "STATUS"], sort=False).size().unstack(fill_value=0)
+    else:
+        por_status = pd.DataFrame(index=projetos)
+    for coluna, status in STATUS_CONTADOS.items():
+        resultado[coluna] = por_status[status] if status in por_status.columns else 0
+    resultado["EQUIPES"] = _distintos(base, "EQUIPE DE PROJETO")
+    resultado["ORIENTADORES"] = _distintos(base, "ORIENTADOR")
+
+    resultado = resultado.fillna(0).astype("int64").rename_axis("Projeto").reset_index()
+    return resultado.sort_values(by=["TOTAL_MEMBROS", "ATIVOS"], ascending=[False, False], ignore_index=True)
+
+
+def estatisticas_projetos(df_membros: pd.DataFrame) -> pd.DataFrame:
+    """Membros, status, equipes e orientadores distintos por projeto.
+
+    Memorizado por versão do dataset e formato (como os motores de filtro), de modo que
+    reruns sobre o mesmo recorte não reagrupam os membros.
+    """
+    chave = (obter_versao(df_membros), df_membros.shape)
+    with _lock:
+        memo = _memo.get(chave)
+        if memo is not None and memo[0].equals(df_membros.index):
+            _memo.move_to_end(chave)
+            return memo[1].copy()
+    resultado = _calcular(df_membros)
+    with _lock:
+        _memo[chave] = (df_membros.index, resultado)
+        while len(_memo) > MAX_MEMO:
+            _memo.popitem(last=False)
+    return resultado.copy()
@@ -1,12 +1,27 @@
+from importlib import import_module
+
 import streamlit as st
 
-from models.usuario_model import autenticar_usuario
-from views.dashboards.view_home_dash import dash_home
-from views.membros.view_membros_dash import gestao_membros
-from views.membros.view_perfil_membro import view_perfil_membro
-from views.projetos.view_projetos_dash import gestao_projetos
-from views.equipes.view_equipes_dash import gestao_equipes
-from views.patrimonios.view_patrimonio_dash import gestao_patrimonios
+from utils.instrumentacao import HistoricoSessao, medir_execucao
+
+
+# Cada rota aponta para (módulo, função); a view, os controllers e o SDK do Firestore
+# só são importados quando a rota é aberta, e não antes do formulário de login.
+ROTAS = {
+    "🏠 Dashboard": ("views.dashboards.view_home_dash", "dash_home"),
+    "🪪 Gestão de Membros": ("views.membros.view_membros_dash", "gestao_membros"),
+    "👩‍💻 Gestão de Projetos": ("views.projetos.view_projetos_dash", "gestao_projetos"),
+    "👫 Gestão de Equipes": ("views.equipes.view_equipes_dash", "gestao_equipes"),
+    "📦 Gestão de patrimônios": ("views.patrimonios.view_patrimonio_dash", "gestao_patrimonios"),
+}
+ROTA_PERFIL_MEMBRO = ("views.membros.view_perfil_membro", "view_perfil_membro")
+# Papéis que podem abrir o painel de desempenho
+PAPEIS_ADMIN = {"admin", "administrador"}
+
+
+def _carregar_rota(rota: tuple[str, str]):
+    modulo, funcao = rota
+    return getattr(import_module(modulo), funcao)
 
 
 def _init_session():
@@ -18,6 +33,8 @@ def _init_session():
         st.session_state.role = None
     if "nome_usuario" not in st.session_state:
         st.session_state.nome_usuario = None
+    if "instrumentacao" not in st.session_state:
+        st.session_state.instrumentacao = HistoricoSessao()
 
 
 def _render_login():
@@ -29,6 +46,8 @@ def _render_login():
             senha = st.text_input("Senha", type="password", placeholder="••••••••")
             entrar = st.form_submit_button("Entrar", use_container_width=True)
             if entrar:
+                from models.usuario_model import autenticar_usuario
+
                 ok, role, nome = autenticar_usuario(usuario, senha)
                 if ok:
                     st.session_state.autenticado = True
@@ -91,34 +110,24 @@ st.sidebar.markdown(f"👋 Olá, **{display_name}**{role_label}")
 
 menu = st.sidebar.selectbox(
     "📋 Navegação",
-    options=[
-        "🏠 Dashboard",
-        "🪪 Gestão de Membros",
-        "👩‍💻 Gestão de Projetos",
-        "👫 Gestão de Equipes",
-        "📦 Gestão de patrimônios",
-    ],
+    options=list(ROTAS),
     index=0,
 )
 st.sidebar.markdown("---")
 
 ###################### ROTEAMENTO ######################
-try:
-    if menu == "🏠 Dashboard":
-        dash_home()
-    elif menu == "🪪 Gestão de Membros":
-        if st.query_params.get("pagina") == "perfil_membro":
-            view_perfil_membro()
-        else:
-            gestao_membros()
-    elif menu == "👩‍💻 Gestão de Projetos":
-        gestao_projetos()
-    elif menu == "👫 Gestão de Equipes":
-        gestao_equipes()
-    elif menu == "📦 Gestão de patrimônios":
-        gestao_patrimonios()
-except Exception as e:
-    st.error(f"Ocorreu um erro ao carregar a página: {e}")
+# O tempo da execução é registrado mesmo quando a página chama `st.rerun`/`st.stop`
+with medir_execucao(menu) as execucao:
+    try:
+        try:
+            rota = ROTAS[menu]
+            if menu == "🪪 Gestão de Membros" and st.query_params.get("pagina") == "perfil_membro":
+                rota = ROTA_PERFIL_MEMBRO
+            _carregar_rota(rota)()
+        except Exception as e:
+            st.error(f"Ocorreu um erro ao carregar a página: {e}")
+    finally:
+        st.session_state.instrumentacao.registrar(execucao)
 
 st.sidebar.markdown("---")
 st.sidebar.markdown(
@@ -138,6 +147,12 @@ st.sidebar.markdown(
     """,
     unsafe_allow_html=True,
 )
+if str(st.session_state.role or "").strip().lower() in PAPEIS_ADMIN:
+    if st.sidebar.checkbox("⏱️ Painel de desempenho", key="painel_desempenho"):
+        from views.dashboards.view_desempenho import painel_desempenho
+
+        with st.sidebar:
+            painel_desempenho(st.session_state.instrumentacao)
 logout_clicked = st.sidebar.button("🔚 Encerrar sessão", use_container_width=True)
 if logout_clicked:
     _realizar_logout()
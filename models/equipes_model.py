@@ -40,6 +40,20 @@ def _status_equipes_normalizado(status: str) -> str:
     return "Inativa"
 
 
+def formatar_campos_equipe(dados: Dict[str, object]) -> Dict[str, object]:
+    """Normaliza apenas os campos presentes (atualizações parciais de equipe)."""
+    out: Dict[str, object] = {}
+    if "NOME" in dados:
+        out["NOME"] = _title_if_text(dados["NOME"])
+    if "ORIENTADOR" in dados:
+        out["ORIENTADOR"] = _title_if_text(dados["ORIENTADOR"])
+    if "DESCRICAO" in dados or "DESCRIÇÃO" in dados:
+        out["DESCRICAO"] = _norm_basic(dados.get("DESCRICAO", dados.get("DESCRIÇÃO", "")))
+    if "STATUS" in dados:
+        out["STATUS"] = _status_equipes_normalizado(dados["STATUS"])
+    return out
+
+
 def formatar_equipe_para_firestore(dados: Dict[str, object]) -> Dict[str, object]:
     """Formata e normaliza o payload de equipe para persistência no Firestore."""
     nome            = _title_if_text(dados.get("NOME", ""))
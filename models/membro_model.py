@@ -4,6 +4,8 @@ from pathlib import Path
 
 import pandas as pd
 
+from models.equipes_model import slugify_equipe_nome
+
 
 CSV_MEMBROS = Path(__file__).resolve().parent.parent / "data" / "membros_gp" / "tratados" / "membros_gp_tratados_.csv"
 
@@ -18,9 +20,36 @@ def carregar_membros_csv() -> pd.DataFrame:
         return pd.DataFrame()
 
 
+def slugs_equipes(valor) -> list[str]:
+    """Índice de equipes do membro: slugs das equipes de "EQUIPE DE PROJETO" (separadas por ';')."""
+    if valor is None or (isinstance(valor, float) and pd.isna(valor)):
+        return []
+    slugs = (slugify_equipe_nome(equipe) for equipe in str(valor).split(";"))
+    return list(dict.fromkeys(slug for slug in slugs if slug))
+
+
+def _agora() -> str:
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
 def formatar_membro_para_firestore(dados):
     if isinstance(dados.get("DATA NASCIMENTO"), pd.Timestamp):
         dados["DATA NASCIMENTO"] = dados["DATA NASCIMENTO"].strftime("%Y-%m-%d")
+    dados["EQUIPES_SLUGS"] = slugs_equipes(dados.get("EQUIPE DE PROJETO"))
 
-    dados["DATA CADASTRO"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    # DATA CADASTRO é definida uma única vez; alterações ficam em DATA ATUALIZACAO
+    if not str(dados.get("DATA CADASTRO") or "").strip():
+        dados["DATA CADASTRO"] = _agora()
+    dados["DATA ATUALIZACAO"] = _agora()
+    return dados
+
+
+def formatar_campos_membro(campos):
+    """Prepara um `update` parcial: nunca altera DATA CADASTRO e carimba DATA ATUALIZACAO."""
+    dados = {campo: valor for campo, valor in campos.items() if campo not in ("CPF", "DATA CADASTRO")}
+    if isinstance(dados.get("DATA NASCIMENTO"), pd.Timestamp):
+        dados["DATA NASCIMENTO"] = dados["DATA NASCIMENTO"].strftime("%Y-%m-%d")
+    if "EQUIPE DE PROJETO" in dados:
+        dados["EQUIPES_SLUGS"] = slugs_equipes(dados["EQUIPE DE PROJETO"])
+    dados["DATA ATUALIZACAO"] = _agora()
     return dados
@@ -143,6 +143,38 @@ def salvar_ou_atualizar_patrimonio_csv(dados: dict) -> dict:
     return registro
 
 
+def padronizar_campos_parciais(campos: dict) -> dict:
+    """Aplica as regras de `_padronizar_campos` somente aos campos informados."""
+    completo = _padronizar_campos(campos)
+    return {campo: completo[campo] for campo in campos if campo in completo and campo != "CODIGO"}
+
+
+def atualizar_campos_patrimonio_csv(codigo, campos: dict) -> dict | None:
+    """Atualiza células de um patrimônio no CSV; retorna o registro resultante (None se ausente)."""
+    if not CSV_PATRIMONIOS.exists():
+        return None
+    try:
+        df_raw = pd.read_csv(CSV_PATRIMONIOS)
+    except Exception:
+        return None
+    if "CODIGO" not in df_raw.columns:
+        return None
+    mask = df_raw["CODIGO"].astype(str) == str(codigo)
+    if not mask.any():
+        return None
+    for coluna in COLUNAS_BASE:
+        if coluna not in df_raw.columns:
+            df_raw[coluna] = ""
+    valores = padronizar_campos_parciais(campos)
+    for coluna, valor in valores.items():
+        if df_raw[coluna].dtype != object and isinstance(valor, str):
+            df_raw[coluna] = df_raw[coluna].astype(object)
+        df_raw.loc[mask, coluna] = valor
+    df_raw = df_raw[COLUNAS_BASE]
+    df_raw.to_csv(CSV_PATRIMONIOS, index=False)
+    return _padronizar_campos(df_raw[mask].iloc[0].to_dict())
+
+
 def remover_patrimonios_csv(codigos: list) -> int:
     if not codigos:
         return 0
@@ -207,6 +239,13 @@ def _texto(valor) -> str:
     return texto
 
 
+def _ausente(valor) -> bool:
+    try:
+        return bool(pd.isna(valor))
+    except (TypeError, ValueError):
+        return False
+
+
 def _numero_inteiro(valor) -> int:
     try:
         return int(float(valor))
@@ -234,7 +273,8 @@ def _resolver_data(valor) -> str:
 
 
 def padronizar_estado_label(valor: str) -> str:
-    texto = _texto(valor)
+    # Ausente (None, NaN, NA) vira "", como em `padronizar_estados`
+    texto = "" if _ausente(valor) else _texto(valor)
     if not texto:
         return ""
     texto_limpo = " ".join(texto.split())
@@ -244,6 +284,13 @@ def padronizar_estado_label(valor: str) -> str:
     return texto_limpo
 
 
+def padronizar_estados(serie: pd.Series) -> pd.Series:
+    """Versão vetorizada de `padronizar_estado_label` para uma coluna inteira."""
+    texto = serie.fillna("").astype(str).str.split().str.join(" ")
+    chave = texto.str.replace(",", "", regex=False).str.casefold()
+    return texto.mask(chave.isin(["usado", "desgastado mas funcional"]), "Desgastado, mas funcional")
+
+
 def formatar_patrimonio_para_firestore(dados: dict) -> dict:
     registro = _padronizar_campos(dados)
     codigo = dados.get("CODIGO")
@@ -0,0 +1,84 @@
+"""Ponto de equilíbrio do índice de trigramas de `IndiceBusca` contra a varredura `str.contains`.
+
+Para cada tamanho de frame mede a montagem do índice, o tempo médio de uma busca por
+varredura do palheiro e por trigramas, e quantas buscas distintas na mesma versão são
+necessárias para pagar a montagem.
+
+Uso (na raiz do projeto): python -m scripts.bench_indice_busca [linhas ...]
+
+Resultado registrado (Python 3.11.7, pandas 3.0.6, Linux x86-64; 12 termos de 3 a 7 letras):
+
+      linhas   montagem   varredura   trigramas   equilíbrio
+        1000      54.7 ms     0.47 ms     0.36 ms     491 buscas
+        5000     278.2 ms     1.90 ms     1.29 ms     460 buscas
+       20000    1087.3 ms     7.09 ms     4.10 ms     364 buscas
+       50000    2392.2 ms    17.55 ms    10.40 ms     335 buscas
+      100000    3929.7 ms    31.19 ms    20.57 ms     370 buscas
+
+A montagem custa ~150 varreduras. As máscaras são memorizadas por termo no
+`MotorFiltros` e toda escrita carimba uma nova versão (índice descartado), então
+raramente se chega a ~350 buscas distintas numa versão: a varredura é o padrão e o
+índice só é montado depois de `CONSULTAS_PARA_INDICE` buscas em frames com pelo menos
+`MIN_LINHAS_INDICE` linhas.
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.indice_busca import IndiceBusca, normalizar_busca
+
+COLUNAS = ("NOME", "EMAIL", "ORIENTADOR", "EQUIPE DE PROJETO", "PROJETO ATUAL")
+TERMOS = ["ana", "silva", "robo", "gmail", "souza", "proj", "automa", "seixas", "maria", "ifro", "lim", "pereira"]
+
+
+def _membros_sinteticos(linhas: int, semente: int = 1) -> pd.DataFrame:
+    rng = np.random.default_rng(semente)
+    nomes = ["Ana", "João", "Maria", "Pedro", "Lucas", "Júlia", "Carla", "Rafael", "Bruna", "Tiago"]
+    sobrenomes = ["Silva", "Souza", "Pereira", "Lima", "Costa", "Rocha", "Almeida", "Gomes", "Ribeiro"]
+    nome = pd.Series(rng.choice(nomes, linhas)) + " " + pd.Series(rng.choice(sobrenomes, linhas)) + " " + pd.Series(rng.choice(sobrenomes, linhas))
+    return pd.DataFrame({
+        "NOME": nome,
+        "EMAIL": [f"membro{i}@{d}" for i, d in enumerate(rng.choice(["gmail.com", "ifro.edu.br", "estudante.ifro.edu.br"], linhas))],
+        "ORIENTADOR": rng.choice(["", "ANDERSON SEIXAS", "CAMILA SERRÃO", "DANIELA TODA"], linhas),
+        "EQUIPE DE PROJETO": rng.choice(["", "Robótica", "Automação", "Robótica;Automação", "Aeromodelismo"], linhas),
+        "PROJETO ATUAL": [f"Projeto {i}" for i in rng.integers(0, max(1, linhas // 20), linhas)],
+    })
+
+
+def _media_ms(funcao, termos) -> float:
+    inicio = time.perf_counter()
+    for termo in termos:
+        funcao(termo)
+    return (time.perf_counter() - inicio) * 1000 / len(termos)
+
+
+def medir(linhas: int) -> tuple[float, float, float]:
+    """(montagem do índice, varredura por busca, trigramas por busca), em ms."""
+    indice = IndiceBusca(_membros_sinteticos(linhas), COLUNAS)
+    termos = [normalizar_busca(t) for t in TERMOS]
+    varredura = _media_ms(indice._contem_vetorizado, termos)
+
+    inicio = time.perf_counter()
+    indice._indice_ngramas()
+    montagem = (time.perf_counter() - inicio) * 1000
+    trigramas = _media_ms(indice._mascara_ngramas, termos)
+
+    for termo in termos:
+        if not np.array_equal(indice._contem_vetorizado(termo), indice._mascara_ngramas(termo)):
+            raise SystemExit(f"Resultados divergentes para {termo!r}")
+    return montagem, varredura, trigramas
+
+
+def main(tamanhos: list[int]) -> None:
+    print(f"{'linhas':>10} {'montagem':>10} {'varredura':>11} {'trigramas':>11} {'equilíbrio':>12}")
+    for linhas in tamanhos:
+        montagem, varredura, trigramas = medir(linhas)
+        ganho = varredura - trigramas
+        equilibrio = f"{montagem / ganho:.0f} buscas" if ganho > 0 else "nunca"
+        print(f"{linhas:>10} {montagem:>7.1f} ms {varredura:>8.2f} ms {trigramas:>8.2f} ms {equilibrio:>12}")
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [1_000, 5_000, 20_000, 50_000, 100_000])
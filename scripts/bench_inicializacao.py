@@ -0,0 +1,97 @@
+"""Tempo de importação até o formulário de login e até o primeiro dashboard, antes e depois
+das importações sob demanda por rota em `main.py`.
+
+Uso (na raiz do projeto, com as dependências e as credenciais do Firestore configuradas):
+
+    python -m scripts.bench_inicializacao [repeticoes]
+
+Cada medição roda num interpretador novo (caches de importação frios) e mede só o tempo
+das importações, que era o que separava o clique da renderização:
+
+- antes: `main.py` importava o login, as seis views e, por elas, controllers, Firestore e
+  Plotly antes de desenhar qualquer coisa; login e primeiro dashboard custavam o mesmo.
+- depois: o login só precisa das importações de topo de `main.py`; o primeiro dashboard
+  soma o modelo de usuário (importado ao enviar o login), a view da primeira rota de
+  `ROTAS` e o Plotly (importado ao desenhar o primeiro gráfico).
+
+As listas do "depois" são lidas do próprio `main.py`, então o script acompanha as rotas.
+"""
+import ast
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+# Importações de topo de `main.py` antes das rotas sob demanda (as views de então também
+# importavam `plotly.express` no topo)
+IMPORTACOES_ANTES = [
+    "streamlit",
+    "plotly.express",
+    "models.usuario_model",
+    "views.dashboards.view_home_dash",
+    "views.membros.view_membros_dash",
+    "views.membros.view_perfil_membro",
+    "views.projetos.view_projetos_dash",
+    "views.equipes.view_equipes_dash",
+    "views.patrimonios.view_patrimonio_dash",
+]
+
+
+def _importacoes_main() -> tuple[list[str], str]:
+    """(módulos importados no topo de main.py, módulo da primeira rota de ROTAS)."""
+    arvore = ast.parse((RAIZ / "main.py").read_text(encoding="utf-8"))
+    modulos: list[str] = []
+    primeira_rota = None
+    for no in arvore.body:
+        if isinstance(no, ast.Import):
+            modulos.extend(alias.name for alias in no.names)
+        elif isinstance(no, ast.ImportFrom) and no.module:
+            modulos.append(no.module)
+        elif isinstance(no, ast.Assign) and any(getattr(alvo, "id", None) == "ROTAS" for alvo in no.targets):
+            rotas = ast.literal_eval(no.value)
+            primeira_rota = next(iter(rotas.values()))[0]
+    if primeira_rota is None:
+        raise SystemExit("ROTAS não encontrado em main.py")
+    return modulos, primeira_rota
+
+
+def _medir(modulos: list[str], repeticoes: int) -> float:
+    """Mediana (ms) do tempo de importar `modulos` num processo novo."""
+    codigo = (
+        "import time\n"
+        "inicio = time.perf_counter()\n"
+        + "".join(f"import {m}\n" for m in modulos)
+        + "print((time.perf_counter() - inicio) * 1000)\n"
+    )
+    tempos = []
+    for _ in range(repeticoes):
+        saida = subprocess.run(
+            [sys.executable, "-c", codigo], cwd=RAIZ, capture_output=True, text=True,
+        )
+        if saida.returncode != 0:
+            ultima = (saida.stderr.strip().splitlines() or ["erro desconhecido"])[-1]
+            raise SystemExit(f"Falha ao importar {', '.join(modulos)}: {ultima}")
+        tempos.append(float(saida.stdout.strip().splitlines()[-1]))
+    return statistics.median(tempos)
+
+
+def main(repeticoes: int = 5) -> None:
+    topo, primeira_rota = _importacoes_main()
+    depois_login = topo
+    depois_dashboard = topo + ["models.usuario_model", primeira_rota, "plotly.express"]
+
+    antes = _medir(IMPORTACOES_ANTES, repeticoes)
+    login = _medir(depois_login, repeticoes)
+    dashboard = _medir(depois_dashboard, repeticoes)
+
+    print(f"Mediana de {repeticoes} processos (ms de importação)")
+    print(f"{'':24}{'antes':>10}{'depois':>10}")
+    print(f"{'formulário de login':24}{antes:10.0f}{login:10.0f}")
+    print(f"{'primeiro dashboard':24}{antes:10.0f}{dashboard:10.0f}")
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:2]))
@@ -0,0 +1,84 @@
+"""Configuração dos testes: nenhum teste acessa o Firestore.
+
+Os controllers criam `db = init_firestore()` ao serem importados; aqui
+`utils.firebase_utils` devolve um cliente `MagicMock`. Streamlit, firebase_admin e
+google-cloud-firestore só são substituídos por módulos mínimos quando não estão
+instalados (as classes usadas pelos testes: `Increment`, `FieldPath` e as exceções).
+"""
+import importlib.util
+import sys
+import types
+from unittest import mock
+
+
+def _instalado(nome: str) -> bool:
+    try:
+        return importlib.util.find_spec(nome) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def _modulo(nome: str, **atributos) -> types.ModuleType:
+    modulo = sys.modules.get(nome) or types.ModuleType(nome)
+    modulo.__dict__.update(atributos)
+    sys.modules[nome] = modulo
+    return modulo
+
+
+class _Increment:
+    def __init__(self, value):
+        self.value = value
+
+    def __eq__(self, outro):
+        return isinstance(outro, _Increment) and outro.value == self.value
+
+    def __repr__(self):
+        return f"Increment({self.value!r})"
+
+
+class _FieldPath:
+    def __init__(self, *partes):
+        self.partes = partes
+
+    @staticmethod
+    def document_id():
+        return "__name__"
+
+    def to_api_repr(self):
+        return ".".join(f"`{p}`" if not p.isidentifier() else p for p in self.partes)
+
+
+def _excecoes_google() -> dict:
+    class GoogleAPICallError(Exception):
+        pass
+
+    class RetryError(Exception):
+        pass
+
+    nomes = [
+        "Aborted", "AlreadyExists", "FailedPrecondition", "InvalidArgument", "NotFound",
+        "OutOfRange", "PermissionDenied", "ResourceExhausted", "Unauthenticated",
+        "DeadlineExceeded", "ServiceUnavailable", "InternalServerError",
+    ]
+    classes = {nome: type(nome, (GoogleAPICallError,), {}) for nome in nomes}
+    return {"GoogleAPICallError": GoogleAPICallError, "RetryError": RetryError, **classes}
+
+
+if not _instalado("streamlit"):
+    _modulo("streamlit", session_state={}, secrets={})
+
+if not _instalado("google.cloud.firestore"):
+    _modulo("google")
+    _modulo("google.cloud")
+    _modulo("google.cloud.firestore", Increment=_Increment, FieldPath=_FieldPath)
+if not _instalado("google.api_core"):
+    _modulo("google.api_core")
+    excecoes = _modulo("google.api_core.exceptions", **_excecoes_google())
+    sys.modules["google.api_core"].exceptions = excecoes
+
+if not _instalado("firebase_admin"):
+    _modulo("firebase_admin", _apps={})
+    _modulo("firebase_admin.firestore_async")
+    sys.modules["firebase_admin"].firestore_async = sys.modules["firebase_admin.firestore_async"]
+
+_modulo("utils.firebase_utils", init_firestore=lambda: mock.MagicMock(name="firestore"))
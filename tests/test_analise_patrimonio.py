@@ -0,0 +1,156 @@
+"""`AnalisePatrimonio` deve reproduzir os `groupby` por função que substituiu."""
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from controllers.patrimonio_controller import COLUNAS_TOP_ITENS, AnalisePatrimonio, analisar_patrimonio
+from utils.versao_dados import carimbar_versao
+
+
+CATEGORIAS = ["Eletrônicos", "Mobiliário", "Ferramentas", "Robótica", ""]
+ESTADOS = ["Novo", "Bom", "Desgastado, mas funcional", "Danificado", "Danificado Parcialmente"]
+SITUACOES = ["Em Uso", "Guardado", "Emprestado", "Descartado"]
+
+
+def _patrimonios(n: int = 800, semente: int = 3) -> pd.DataFrame:
+    rnd = random.Random(semente)
+    datas = [
+        pd.Timestamp(2024, rnd.randint(1, 12), rnd.randint(1, 28)) if rnd.random() > 0.15 else pd.NaT
+        for _ in range(n)
+    ]
+    quantidades = [rnd.randint(1, 20) for _ in range(n)]
+    precos = [round(rnd.uniform(5, 5000), 2) for _ in range(n)]
+    return carimbar_versao(pd.DataFrame({
+        "CODIGO": [f"P{i:05d}" if rnd.random() > 0.1 else None for i in range(n)],
+        "ITEM": [f"Item {i}" for i in range(n)],
+        "CATEGORIA": [rnd.choice(CATEGORIAS) for _ in range(n)],
+        "MARCA": [rnd.choice(["Acme", "Bosch", ""]) for _ in range(n)],
+        "MODELO": [f"M{rnd.randint(1, 50)}" for _ in range(n)],
+        "QUANTIDADE": quantidades,
+        "PRECO_ESTIMADO": precos,
+        "VALOR_TOTAL": [q * p for q, p in zip(quantidades, precos)],
+        "ESTADO": [rnd.choice(ESTADOS) for _ in range(n)],
+        "DATA_ATUALIZACAO": pd.to_datetime(datas),
+    }).assign(
+        CATEGORIA_NORMALIZADA=lambda d: d["CATEGORIA"].str.title(),
+        ESTADO_NORMALIZADO=lambda d: d["ESTADO"],
+        SITUACAO_NORMALIZADA=[rnd.choice(SITUACOES) for _ in range(n)],
+    ))
+
+
+# Implementações anteriores (`calcular_indicadores`, `agrupar_por_*`, `evolucao_por_mes`, `top_itens_por_valor`)
+
+def _indicadores_antigos(df):
+    return {
+        "total_registros": int(len(df)),
+        "quantidade_total": int(df["QUANTIDADE"].sum()),
+        "valor_total": float(df["VALOR_TOTAL"].sum()),
+        "valor_em_uso": float(df[df["SITUACAO_NORMALIZADA"] == "Em Uso"]["VALOR_TOTAL"].sum()),
+        "valor_danificado": float(
+            df[df["ESTADO_NORMALIZADO"].str.contains("Danificado", case=False, na=False)]["VALOR_TOTAL"].sum()
+        ),
+        "categorias_unicas": int(df["CATEGORIA_NORMALIZADA"].nunique()),
+    }
+
+
+def _agrupado_antigo(df, coluna, rotulo, medidas, ordem):
+    agregacoes = {"Itens": ("QUANTIDADE", "sum"), "Valor_Total": ("VALOR_TOTAL", "sum")}
+    return (
+        df.groupby(coluna)
+        .agg(**{m: agregacoes[m] for m in medidas})
+        .reset_index()
+        .rename(columns={coluna: rotulo})
+        .sort_values(by=ordem, ascending=False)
+    )
+
+
+def _evolucao_antiga(df):
+    base = df.dropna(subset=["DATA_ATUALIZACAO"]).copy()
+    base["MES"] = base["DATA_ATUALIZACAO"].dt.to_period("M").astype(str)
+    return (
+        base.groupby("MES")
+        .agg(Atualizacoes=("CODIGO", "count"), Valor_Total=("VALOR_TOTAL", "sum"))
+        .reset_index()
+        .sort_values("MES")
+    )
+
+
+def _comparar(obtido: pd.DataFrame, esperado: pd.DataFrame, chave: str) -> None:
+    obtido = obtido.sort_values(chave).reset_index(drop=True)
+    esperado = esperado.sort_values(chave).reset_index(drop=True)
+    assert obtido[chave].tolist() == esperado[chave].tolist()
+    for coluna in esperado.columns.drop(chave):
+        np.testing.assert_allclose(obtido[coluna].to_numpy(dtype=float), esperado[coluna].to_numpy(dtype=float))
+
+
+@pytest.fixture(params=["completo", "recorte", "uma categoria"])
+def df(request):
+    base = _patrimonios()
+    if request.param == "recorte":
+        return base[base["SITUACAO_NORMALIZADA"] != "Descartado"].iloc[::3]
+    if request.param == "uma categoria":
+        return base[base["CATEGORIA_NORMALIZADA"] == "Robótica"]
+    return base
+
+
+def test_indicadores(df):
+    obtido = AnalisePatrimonio(df).indicadores()
+    esperado = _indicadores_antigos(df)
+    assert obtido.keys() == esperado.keys()
+    for chave, valor in esperado.items():
+        assert obtido[chave] == pytest.approx(valor), chave
+
+
+@pytest.mark.parametrize("metodo, coluna, rotulo, medidas, ordem", [
+    ("por_estado", "ESTADO_NORMALIZADO", "Estado", ["Itens", "Valor_Total"], "Itens"),
+    ("por_situacao", "SITUACAO_NORMALIZADA", "Situação", ["Itens"], "Itens"),
+    ("por_categoria", "CATEGORIA_NORMALIZADA", "Categoria", ["Itens", "Valor_Total"], "Valor_Total"),
+])
+def test_agrupamentos(df, metodo, coluna, rotulo, medidas, ordem):
+    analise = AnalisePatrimonio(df)
+    obtido = getattr(analise, metodo)(0) if metodo == "por_categoria" else getattr(analise, metodo)()
+    esperado = _agrupado_antigo(df, coluna, rotulo, medidas, ordem)
+    assert list(obtido.columns) == list(esperado.columns)
+    assert obtido[ordem].is_monotonic_decreasing
+    _comparar(obtido, esperado, rotulo)
+
+
+def test_por_categoria_limitado():
+    df = _patrimonios()
+    esperado = _agrupado_antigo(df, "CATEGORIA_NORMALIZADA", "Categoria", ["Itens", "Valor_Total"], "Valor_Total")
+    obtido = AnalisePatrimonio(df).por_categoria(limite=3)
+    assert obtido["Categoria"].tolist() == esperado.head(3)["Categoria"].tolist()
+
+
+def test_evolucao_mensal(df):
+    obtido = AnalisePatrimonio(df).evolucao_mensal()
+    esperado = _evolucao_antiga(df)
+    assert list(obtido.columns) == ["MES", "Atualizacoes", "Valor_Total"]
+    assert obtido["MES"].tolist() == esperado["MES"].tolist()
+    _comparar(obtido, esperado, "MES")
+
+
+@pytest.mark.parametrize("limite", [1, 10, 10_000])
+def test_top_itens(df, limite):
+    obtido = AnalisePatrimonio(df).top_itens(limite)
+    esperado = df.sort_values(by="VALOR_TOTAL", ascending=False).head(limite)[COLUNAS_TOP_ITENS]
+    pd.testing.assert_frame_equal(obtido, esperado)
+
+
+def test_frame_vazio():
+    vazio = _patrimonios().iloc[0:0]
+    analise = AnalisePatrimonio(vazio)
+    assert analise.indicadores()["total_registros"] == 0
+    assert analise.por_estado().empty and analise.evolucao_mensal().empty and analise.top_itens().empty
+
+
+def test_analise_reaproveitada_por_recorte():
+    df = _patrimonios()
+    recorte = df.iloc[::2]
+    assert analisar_patrimonio(df) is analisar_patrimonio(df.copy())
+    assert analisar_patrimonio(recorte) is not analisar_patrimonio(df)
+    resultado = analisar_patrimonio(df).por_estado()
+    resultado.loc[:, "Itens"] = 0
+    assert analisar_patrimonio(df).por_estado()["Itens"].sum() == df["QUANTIDADE"].sum()
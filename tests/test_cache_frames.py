@@ -0,0 +1,179 @@
+"""`FrameCache`: escritas aplicadas no frame em memória e reconciliação com a coleção."""
+import pandas as pd
+import pytest
+
+from utils.cache_frames import FrameCache
+
+
+def _membros() -> pd.DataFrame:
+    return pd.DataFrame({
+        "CPF": ["1", "2", "3"],
+        "NOME": ["Ana", "Bruno", "Carla"],
+        "STATUS": ["Ativo", "Inativo", "Ativo"],
+        "ANO": [2023, 2024, 2025],
+    })
+
+
+class _Colecao:
+    """Origem do frame: conta as leituras e devolve uma cópia do conteúdo atual."""
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self.leituras = 0
+
+    def __call__(self) -> pd.DataFrame:
+        self.leituras += 1
+        return self.df.copy()
+
+
+@pytest.fixture
+def colecao():
+    return _Colecao(_membros())
+
+
+@pytest.fixture
+def cache(colecao, monkeypatch):
+    # Sem timers: a reconciliação é chamada explicitamente nos testes
+    agendadas = []
+    monkeypatch.setattr(FrameCache, "agendar_reconciliacao", lambda self, atraso=None: agendadas.append(atraso))
+    cache = FrameCache("membros", colecao, chave="CPF")
+    cache.agendadas = agendadas
+    cache.obter()
+    return cache
+
+
+def _linha(df: pd.DataFrame, cpf: str) -> dict:
+    return df[df["CPF"] == cpf].iloc[0].to_dict()
+
+
+def test_obter_le_uma_vez_e_devolve_copias(cache, colecao):
+    a = cache.obter()
+    a.loc[0, "NOME"] = "Alterado"
+    assert cache.obter().loc[0, "NOME"] == "Ana"
+    assert colecao.leituras == 1
+    assert cache.versao() is not None
+
+
+def test_atualizar_aplica_campos_e_troca_a_versao(cache, colecao):
+    versao = cache.versao()
+    assert cache.atualizar("2", {"STATUS": "Ativo", "EMAIL": "bruno@ifro.edu.br"})
+    df = cache.obter()
+    assert _linha(df, "2") == {"CPF": "2", "NOME": "Bruno", "STATUS": "Ativo", "ANO": 2024, "EMAIL": "bruno@ifro.edu.br"}
+    assert pd.isna(_linha(df, "1")["EMAIL"])
+    assert cache.versao() != versao
+    assert colecao.leituras == 1
+    assert cache.agendadas == [None]
+
+
+def test_atualizar_com_tipo_diferente_e_listas(cache):
+    assert cache.atualizar("1", {"ANO": "não informado", "EQUIPES_SLUGS": ["robotica", "automacao"]})
+    linha = _linha(cache.obter(), "1")
+    assert linha["ANO"] == "não informado"
+    assert linha["EQUIPES_SLUGS"] == ["robotica", "automacao"]
+
+
+def test_atualizar_chave_ausente(cache):
+    versao = cache.versao()
+    assert not cache.atualizar("99", {"NOME": "Ninguém"})
+    assert cache.versao() == versao
+    assert cache.agendadas == []
+
+
+def test_inserir_novo_e_substituir_existente(cache):
+    cache.inserir({"CPF": "4", "NOME": "Diego", "STATUS": "Pendente", "ANO": 2025})
+    versao = cache.versao()
+    cache.inserir({"CPF": "1", "NOME": "Ana Maria", "STATUS": "Ativo", "ANO": 2023})
+    df = cache.obter()
+    assert sorted(df["CPF"]) == ["1", "2", "3", "4"]
+    assert _linha(df, "1")["NOME"] == "Ana Maria"
+    assert cache.versao() != versao
+
+
+def test_remover_descarta_as_linhas(cache):
+    versao = cache.versao()
+    cache.remover(["1", 3, "99"])
+    df = cache.obter()
+    assert df["CPF"].tolist() == ["2"]
+    assert df.index.tolist() == [0]
+    assert cache.versao() != versao
+
+    versao = cache.versao()
+    cache.remover(["99"])
+    assert cache.versao() == versao
+
+
+def test_escritas_sem_frame_carregado_sao_ignoradas(colecao):
+    cache = FrameCache("membros", colecao, chave="CPF")
+    cache.inserir({"CPF": "4", "NOME": "Diego"})
+    assert not cache.atualizar("1", {"NOME": "Ana Maria"})
+    cache.remover(["1"])
+    assert cache.registros(["1"]) == {}
+    assert colecao.leituras == 0
+
+
+def test_registros_por_chave(cache):
+    registros = cache.registros(["1", 3, "99"])
+    assert set(registros) == {"1", "3"}
+    assert registros["3"]["NOME"] == "Carla"
+
+
+def test_preparar_normaliza_linhas_inseridas_e_atualizadas(colecao, monkeypatch):
+    monkeypatch.setattr(FrameCache, "agendar_reconciliacao", lambda self, atraso=None: None)
+
+    def preparar(df):
+        return df.assign(NOME=df["NOME"].str.upper())
+
+    cache = FrameCache("membros", colecao, chave="CPF", preparar=preparar)
+    cache.obter()
+    cache.inserir({"CPF": "4", "NOME": "Diego", "STATUS": "Ativo", "ANO": 2025})
+    cache.atualizar("2", {"NOME": "Bruno Lima"})
+    df = cache.obter()
+    assert _linha(df, "4")["NOME"] == "DIEGO"
+    assert _linha(df, "2")["NOME"] == "BRUNO LIMA"
+
+
+def test_reconciliar_mantem_o_frame_quando_o_conteudo_e_igual(cache, colecao):
+    cache.atualizar("2", {"STATUS": "Ativo"})
+    colecao.df.loc[colecao.df["CPF"] == "2", "STATUS"] = "Ativo"
+    # Mesma informação em outra ordem de linhas e colunas
+    colecao.df = colecao.df.iloc[::-1][["STATUS", "ANO", "NOME", "CPF"]]
+    versao = cache.versao()
+    cache._reconciliar()
+    assert cache.versao() == versao
+    assert colecao.leituras == 2
+
+
+def test_reconciliar_substitui_o_frame_quando_diverge(cache, colecao):
+    cache.atualizar("2", {"STATUS": "Ativo"})
+    # Outra instância alterou a coleção e a escrita local não chegou ao Firestore
+    colecao.df.loc[colecao.df["CPF"] == "3", "NOME"] = "Carla Souza"
+    versao = cache.versao()
+    cache._reconciliar()
+    df = cache.obter()
+    assert cache.versao() != versao
+    assert _linha(df, "3")["NOME"] == "Carla Souza"
+    assert _linha(df, "2")["STATUS"] == "Inativo"
+
+
+def test_reconciliar_reagenda_se_houve_escrita_durante_a_leitura(cache, colecao):
+    def ler_com_escrita():
+        df = colecao()
+        cache.atualizar("1", {"NOME": "Ana Maria"})
+        return df
+
+    cache.carregar = ler_com_escrita
+    cache.agendadas.clear()
+    cache._reconciliar()
+    assert _linha(cache.obter(), "1")["NOME"] == "Ana Maria"
+    # Uma da escrita, outra da reconciliação descartada
+    assert cache.agendadas == [None, None]
+
+
+def test_reconciliar_com_erro_de_leitura_mantem_o_frame(cache):
+    def falhar():
+        raise RuntimeError("sem conexão")
+
+    versao = cache.versao()
+    cache.carregar = falhar
+    cache._reconciliar()
+    assert cache.versao() == versao
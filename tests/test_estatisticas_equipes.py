@@ -0,0 +1,116 @@
+"""A variação incremental das estatísticas de equipe deve bater com o recálculo a partir dos membros."""
+from collections import Counter
+
+import pandas as pd
+import pytest
+
+from controllers import equipes_controller as ec
+from utils.cache_frames import FrameCache
+
+
+MEMBROS = [
+    {"CPF": "1", "STATUS": "Ativo", "EQUIPE DE PROJETO": "Robótica", "ORIENTADOR": "ANDERSON SEIXAS"},
+    {"CPF": "2", "STATUS": "Ativo", "EQUIPE DE PROJETO": "Robótica;Automação", "ORIENTADOR": "CAMILA SERRÃO"},
+    {"CPF": "3", "STATUS": "Inativo", "EQUIPE DE PROJETO": "Automação", "ORIENTADOR": "CAMILA SERRÃO"},
+    {"CPF": "4", "STATUS": "Pendente", "EQUIPE DE PROJETO": " Aeromodelismo ; Robótica", "ORIENTADOR": ""},
+    {"CPF": "5", "STATUS": "ativo", "EQUIPE DE PROJETO": "Aeromodelismo", "ORIENTADOR": None},
+    {"CPF": "6", "STATUS": "Ativo", "EQUIPE DE PROJETO": "", "ORIENTADOR": "DANIELA TODA"},
+]
+
+
+def _alterar(cpf: str, **campos):
+    def aplicar(membros):
+        return [{**m, **campos} if m["CPF"] == cpf else m for m in membros]
+    return aplicar
+
+
+def _renomear_equipe(antigo: str, novo: str):
+    def aplicar(membros):
+        return [
+            {**m, "EQUIPE DE PROJETO": ";".join(
+                novo if e.strip() == antigo else e for e in str(m["EQUIPE DE PROJETO"]).split(";")
+            )}
+            for m in membros
+        ]
+    return aplicar
+
+
+def _remover(cpf: str):
+    return lambda membros: [m for m in membros if m["CPF"] != cpf]
+
+
+def _inserir(**membro):
+    return lambda membros: membros + [membro]
+
+
+CASOS = {
+    "ativa membro": _alterar("4", STATUS="Ativo"),
+    "inativa membro de duas equipes": _alterar("2", STATUS="Inativo"),
+    "status para vazio": _alterar("1", STATUS=""),
+    "entra em mais uma equipe": _alterar("3", **{"EQUIPE DE PROJETO": "Automação;Robótica"}),
+    "sai de todas as equipes": _alterar("2", **{"EQUIPE DE PROJETO": ""}),
+    "troca de orientador": _alterar("3", ORIENTADOR="ANDERSON SEIXAS"),
+    "último orientador da equipe sai": _alterar("1", ORIENTADOR=""),
+    "renomeia equipe": _renomear_equipe("Robótica", "Robótica Educacional"),
+    "renomeia equipe de membro multiequipe": _renomear_equipe("Automação", "Automação Industrial"),
+    "muda de equipe": _alterar("5", **{"EQUIPE DE PROJETO": "Robótica"}),
+    "remove membro": _remover("2"),
+    "novo membro em equipe nova": _inserir(CPF="7", STATUS="Ativo", **{"EQUIPE DE PROJETO": "Drones;Robótica", "ORIENTADOR": "DANIELA TODA"}),
+}
+
+
+def _estatisticas_iniciais(membros) -> pd.DataFrame:
+    """Documentos de estatística como `reconstruir_estatisticas` os grava."""
+    contagens = Counter()
+    for membro in membros:
+        contagens.update(ec._contagens_membro(membro))
+    docs = ec._estatisticas_por_equipe(contagens)
+    return pd.DataFrame([
+        {"ID": slug, "ATIVOS": 0, "INATIVOS": 0, "TOTAL": 0, "ORIENTADORES": {}, **dados}
+        for slug, dados in docs.items()
+    ])
+
+
+def _ordenado(df: pd.DataFrame) -> pd.DataFrame:
+    return df.sort_values("EQUIPE").reset_index(drop=True)
+
+
+@pytest.fixture
+def cache_estatisticas(monkeypatch):
+    monkeypatch.setattr(FrameCache, "agendar_reconciliacao", lambda self, atraso=None: None)
+    cache = FrameCache("estatisticas_teste", lambda: _estatisticas_iniciais(MEMBROS), chave="ID")
+    cache.obter()
+    monkeypatch.setattr(ec, "cache_estatisticas", cache)
+    return cache
+
+
+def test_estatisticas_iniciais_batem_com_o_agrupamento():
+    obtido = ec._equipes_por_estatisticas(_estatisticas_iniciais(MEMBROS))
+    esperado = ec._agrupar_equipes_por_membros(pd.DataFrame(MEMBROS))
+    pd.testing.assert_frame_equal(_ordenado(obtido), _ordenado(esperado), check_dtype=False)
+
+
+@pytest.mark.parametrize("mudanca", list(CASOS.values()), ids=list(CASOS))
+def test_diferenca_aplicada_igual_ao_recalculo(cache_estatisticas, mudanca):
+    depois = mudanca([dict(m) for m in MEMBROS])
+    por_cpf_antes = {m["CPF"]: m for m in MEMBROS}
+    por_cpf_depois = {m["CPF"]: m for m in depois}
+    pares = [(por_cpf_antes.get(cpf), por_cpf_depois.get(cpf)) for cpf in por_cpf_antes.keys() | por_cpf_depois.keys()]
+
+    ec._aplicar_estatisticas_no_frame(ec._estatisticas_por_equipe(ec.diferenca_estatisticas(pares)))
+
+    obtido = ec._equipes_por_estatisticas(cache_estatisticas.obter())
+    esperado = ec._agrupar_equipes_por_membros(pd.DataFrame(depois))
+    pd.testing.assert_frame_equal(_ordenado(obtido), _ordenado(esperado), check_dtype=False)
+
+
+def test_diferenca_de_edicao_sem_efeito_e_vazia():
+    membro = MEMBROS[1]
+    assert ec.diferenca_estatisticas([(membro, {**membro, "NOME": "Outro nome"})]) == Counter()
+    assert ec.diferenca_estatisticas([(None, None)]) == Counter()
+
+
+def test_diferenca_de_varias_edicoes_do_mesmo_membro_se_compensa():
+    antes = MEMBROS[0]
+    meio = {**antes, "STATUS": "Inativo"}
+    assert ec.diferenca_estatisticas([(antes, meio), (meio, antes)]) == Counter()
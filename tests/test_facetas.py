@@ -0,0 +1,105 @@
+"""`Facetas.contagens` deve igualar o `value_counts` do frame filtrado pelas demais colunas."""
+import random
+import unicodedata
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.facetas import Facetas, obter_facetas, rotulo_com_contagem
+from utils.filtros import MotorFiltros, filtro_lista, filtro_texto, filtro_valores, obter_motor
+from utils.versao_dados import carimbar_versao
+
+
+def _membros(n: int = 500, semente: int = 5) -> pd.DataFrame:
+    rnd = random.Random(semente)
+    return carimbar_versao(pd.DataFrame({
+        "NOME": [f"{rnd.choice(['Ana', 'João', 'Lúcia', 'Pedro'])} {i}" for i in range(n)],
+        "STATUS": [rnd.choice(["Ativo", "Inativo", "Pendente", None]) for _ in range(n)],
+        "CURSO": [rnd.choice(["Informática", "Química", "Edificações", ""]) for _ in range(n)],
+        "ANO": [rnd.choice([2022, 2023, 2024, 2025]) for _ in range(n)],
+        "Rank GP": [rnd.choice(["A", "B", "C", np.nan]) for _ in range(n)],
+        "ORIENTADORES": [", ".join(rnd.sample(["ANDERSON", "CAMILA", "DANIELA"], rnd.randint(0, 2))) for _ in range(n)],
+    }))
+
+
+def _normalizar(valor) -> str:
+    return unicodedata.normalize("NFKD", str(valor)).encode("ASCII", "ignore").decode("utf-8").lower()
+
+
+def _filtrar_pandas(df: pd.DataFrame, filtros, exceto: str) -> pd.DataFrame:
+    """Aplica os filtros linha a linha, sem os da coluna `exceto` (a busca textual sempre vale)."""
+    mascara = pd.Series(True, index=df.index)
+    for filtro in filtros:
+        tipo, alvo, valores = filtro[0], filtro[1], filtro[2]
+        if not valores:
+            continue
+        if tipo == "texto":
+            termo = _normalizar(valores)
+            mascara &= df[list(alvo)].fillna("").apply(lambda linha: any(termo in _normalizar(c) for c in linha), axis=1)
+        elif alvo == exceto:
+            continue
+        elif tipo == "valores":
+            coluna = df[alvo].astype(str) if filtro[3] else df[alvo]
+            mascara &= coluna.isin(valores)
+        elif tipo == "lista":
+            itens = df[alvo].fillna("").astype(str).str.split(filtro[3])
+            mascara &= itens.apply(lambda partes: any(p.strip() in valores for p in partes))
+    return df[mascara]
+
+
+SELECOES = {
+    "sem filtros": [],
+    "status": [filtro_valores("STATUS", ["Ativo"])],
+    "status e curso": [filtro_valores("STATUS", ["Ativo", "Pendente"]), filtro_valores("CURSO", ["Química", ""])],
+    "ano como texto": [filtro_valores("ANO", ["2024", "2025"], como_texto=True), filtro_valores("Rank GP", ["A"])],
+    "lista": [filtro_lista("ORIENTADORES", ["CAMILA"]), filtro_valores("CURSO", ["Informática"])],
+    "busca": [filtro_texto(["NOME"], "lucia"), filtro_valores("STATUS", ["Inativo"])],
+    "sem resultado": [filtro_valores("STATUS", ["Ativo"]), filtro_texto(["NOME"], "ninguém")],
+}
+
+COLUNAS = [("STATUS", False), ("CURSO", False), ("ANO", True), ("Rank GP", False)]
+
+
+@pytest.mark.parametrize("filtros", list(SELECOES.values()), ids=list(SELECOES))
+@pytest.mark.parametrize("coluna, como_texto", COLUNAS, ids=[c for c, _ in COLUNAS])
+def test_contagens_iguais_ao_value_counts(filtros, coluna, como_texto):
+    df = _membros()
+    facetas = Facetas(MotorFiltros(df))
+    obtido = facetas.contagens(coluna, filtros, como_texto=como_texto)
+
+    filtrado = _filtrar_pandas(df, filtros, exceto=coluna)[coluna]
+    esperado = (filtrado.astype(str) if como_texto else filtrado).value_counts(dropna=True).to_dict()
+    assert {v: n for v, n in obtido.items() if n} == esperado
+    # Valores sem ocorrência no recorte continuam listados, com zero
+    assert set(obtido) == set(facetas.opcoes(coluna, como_texto=como_texto))
+
+
+def test_coluna_sem_filtro_proprio_usa_totais_memorizados():
+    facetas = Facetas(MotorFiltros(_membros()))
+    filtros = [filtro_valores("STATUS", ["Ativo"])]
+    assert facetas.contagens("STATUS", filtros) is facetas.contagens("STATUS")
+    assert facetas.contagens("CURSO", filtros) != facetas.contagens("CURSO")
+
+
+def test_coluna_ausente():
+    facetas = Facetas(MotorFiltros(_membros()))
+    assert facetas.contagens("EQUIPE") == {}
+    assert facetas.opcoes("EQUIPE") == []
+
+
+def test_opcoes_como_sorted_unique():
+    df = _membros()
+    facetas = Facetas(MotorFiltros(df))
+    assert facetas.opcoes("CURSO") == sorted(df["CURSO"].dropna().unique())
+    assert facetas.opcoes("CURSO", excluir_vazios=True) == sorted(c for c in df["CURSO"].unique() if c)
+    assert facetas.opcoes("ANO", como_texto=True) == sorted(df["ANO"].astype(str).unique())
+
+
+def test_facetas_por_motor_e_rotulo():
+    df = _membros()
+    motor = obter_motor(df)
+    assert obter_facetas(motor) is obter_facetas(obter_motor(df.copy()))
+    formatar = rotulo_com_contagem({"Ativo": 3})
+    assert formatar("Ativo") == "Ativo (3)"
+    assert formatar("Inativo") == "Inativo (0)"
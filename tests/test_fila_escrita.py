@@ -0,0 +1,264 @@
+"""Fila de escrita: combinação das edições, `Increment`, reenvio com espera e resultados na sessão."""
+import pytest
+from google.api_core import exceptions
+from google.cloud.firestore import Increment
+
+from utils import fila_escrita
+from utils.fila_escrita import CONFIRMADA, DESCONHECIDA, FALHOU, PENDENTE, FilaEscrita
+
+
+def _aplicar(base: dict, campos: dict) -> dict:
+    for campo, valor in campos.items():
+        if isinstance(valor, Increment):
+            base[campo] = base.get(campo, 0) + valor.value
+        elif isinstance(valor, dict):
+            base[campo] = _aplicar(dict(base.get(campo) or {}), valor)
+        else:
+            base[campo] = valor
+    return base
+
+
+class _Documento:
+    def __init__(self, cliente, caminho):
+        self.cliente = cliente
+        self.caminho = caminho
+
+    def _gravar(self, campos, merge):
+        if not merge and self.caminho not in self.cliente.docs:
+            raise exceptions.NotFound(f"{self.caminho} não existe")
+        self.cliente.docs[self.caminho] = _aplicar(dict(self.cliente.docs.get(self.caminho, {})), campos)
+
+    def set(self, campos, merge=False):
+        self.cliente.envios.append(("individual", self.caminho, campos))
+        self.cliente.falhar("individual")
+        self._gravar(campos, merge=True)
+
+    def update(self, campos):
+        self.cliente.envios.append(("individual", self.caminho, campos))
+        self.cliente.falhar("individual")
+        self._gravar(campos, merge=False)
+
+
+class _Lote:
+    def __init__(self, cliente):
+        self.cliente = cliente
+        self.escritas = []
+
+    def set(self, ref, campos, merge=False):
+        self.escritas.append((ref, campos, True))
+
+    def update(self, ref, campos):
+        self.escritas.append((ref, campos, False))
+
+    def commit(self):
+        self.cliente.envios.append(("lote", [ref.caminho for ref, _, _ in self.escritas], None))
+        self.cliente.falhar("lote")
+        # Atômico como no Firestore: um documento ausente recusa o lote inteiro
+        for ref, _, merge in self.escritas:
+            if not merge and ref.caminho not in self.cliente.docs:
+                raise exceptions.NotFound(f"{ref.caminho} não existe")
+        for ref, campos, merge in self.escritas:
+            ref._gravar(campos, merge)
+
+
+class _Colecao:
+    def __init__(self, cliente, nome):
+        self.cliente = cliente
+        self.nome = nome
+
+    def document(self, doc_id):
+        return _Documento(self.cliente, (self.nome, doc_id))
+
+
+class ClienteFalso:
+    """Cliente Firestore em memória; `erros[tipo]` lista as exceções dos próximos envios."""
+
+    def __init__(self, docs=None):
+        self.docs = dict(docs or {})
+        self.envios = []
+        self.erros = {"lote": [], "individual": []}
+
+    def falhar(self, tipo):
+        if self.erros[tipo]:
+            raise self.erros[tipo].pop(0)
+
+    def collection(self, nome):
+        return _Colecao(self, nome)
+
+    def batch(self):
+        return _Lote(self)
+
+
+@pytest.fixture
+def fila(monkeypatch):
+    # Sem thread gravadora: os testes enviam as operações prontas com `_enviar`
+    monkeypatch.setattr(FilaEscrita, "_iniciar", lambda self: None)
+    return FilaEscrita(ClienteFalso({("membros_gp", "1"): {"NOME": "Ana", "TOTAL": 10}}))
+
+
+def _enviar(fila: FilaEscrita) -> None:
+    prontas = list(fila._pendentes.values())
+    fila._pendentes.clear()
+    fila._gravar_lote(prontas)
+
+
+def test_combina_edicoes_por_colecao_documento_e_modo(fila):
+    a = fila.enfileirar("membros_gp", "1", {"NOME": "Ana Maria"})
+    b = fila.enfileirar("membros_gp", "1", {"EMAIL": "ana@ifro.edu.br"})
+    c = fila.enfileirar("membros_gp", "1", {"NOME": "Ana"}, modo="merge")
+    d = fila.enfileirar("equipes_gp", "1", {"NOME": "Robótica"}, modo="merge")
+    assert list(fila._pendentes) == [
+        ("membros_gp", "1", "update"), ("membros_gp", "1", "merge"), ("equipes_gp", "1", "merge"),
+    ]
+    assert fila._pendentes[("membros_gp", "1", "update")].campos == {"NOME": "Ana Maria", "EMAIL": "ana@ifro.edu.br"}
+    assert fila._pendentes[("membros_gp", "1", "update")].ids == [a, b]
+    assert set(fila.status([a, b, c, d]).values()) == {(PENDENTE, "")}
+
+    _enviar(fila)
+    assert [tipo for tipo, _, _ in fila.db.envios] == ["lote"]
+    assert fila.db.docs[("equipes_gp", "1")] == {"NOME": "Robótica"}
+    assert set(fila.status([a, b, c, d]).values()) == {(CONFIRMADA, "")}
+
+
+def test_modo_desconhecido():
+    with pytest.raises(ValueError):
+        FilaEscrita(ClienteFalso()).enfileirar("membros_gp", "1", {}, modo="delete")
+
+
+def test_incrementos_sao_somados_e_mapas_mesclados(fila):
+    fila.enfileirar("membros_gp", "1", {"TOTAL": Increment(2), "STATUS": {"Ativo": Increment(1)}})
+    fila.enfileirar("membros_gp", "1", {"TOTAL": Increment(3), "STATUS": {"Inativo": Increment(-1)}})
+    campos = fila._pendentes[("membros_gp", "1", "update")].campos
+    assert campos["TOTAL"].value == 5
+    assert campos["STATUS"]["Ativo"].value == 1 and campos["STATUS"]["Inativo"].value == -1
+
+    _enviar(fila)
+    assert fila.db.docs[("membros_gp", "1")]["TOTAL"] == 15
+
+
+def test_valor_comum_substitui_incremento():
+    campos = fila_escrita._mesclar_campos({"TOTAL": Increment(2)}, {"TOTAL": 7})
+    assert campos == {"TOTAL": 7}
+
+
+def test_lote_recusado_regrava_cada_documento(fila):
+    fila.db.erros["lote"].append(exceptions.ServiceUnavailable("indisponível"))
+    a = fila.enfileirar("membros_gp", "1", {"NOME": "Ana Maria"})
+    b = fila.enfileirar("membros_gp", "2", {"NOME": "Bruno"}, modo="merge")
+    _enviar(fila)
+    assert [tipo for tipo, _, _ in fila.db.envios] == ["lote", "individual", "individual"]
+    assert fila.db.docs[("membros_gp", "2")] == {"NOME": "Bruno"}
+    assert set(fila.status([a, b]).values()) == {(CONFIRMADA, "")}
+
+
+def test_reenvio_com_espera_exponencial_ate_max_tentativas(fila, monkeypatch):
+    monkeypatch.setattr(fila_escrita.time, "monotonic", lambda: 100.0)
+    a = fila.enfileirar("membros_gp", "9", {"NOME": "Inexistente"})
+    esperas = []
+    for _ in range(fila_escrita.MAX_TENTATIVAS):
+        fila.db.erros["lote"].append(exceptions.NotFound("lote"))
+        _enviar(fila)
+        op = fila._pendentes.get(("membros_gp", "9", "update"))
+        if op is not None:
+            esperas.append(op.proxima - 100.0)
+    base = fila_escrita.ESPERA_BASE
+    assert esperas == [base, base * 2, base * 4, base * 8]
+    situacao, erro = fila.status([a])[a]
+    assert situacao == FALHOU and "não existe" in erro
+    assert not fila._pendentes
+
+
+def test_reenvio_preserva_edicao_posterior(fila):
+    fila.db.erros["lote"].append(exceptions.ServiceUnavailable("lote"))
+    fila.db.erros["individual"].append(exceptions.ServiceUnavailable("individual"))
+    a = fila.enfileirar("membros_gp", "1", {"NOME": "Antigo", "EMAIL": "a@ifro.edu.br"})
+    prontas = list(fila._pendentes.values())
+    fila._pendentes.clear()
+    b = fila.enfileirar("membros_gp", "1", {"NOME": "Novo"})
+    fila._gravar_lote(prontas)
+
+    op = fila._pendentes[("membros_gp", "1", "update")]
+    assert op.campos == {"NOME": "Novo", "EMAIL": "a@ifro.edu.br"}
+    assert op.ids == [a, b] and op.tentativas == 1
+
+
+@pytest.mark.parametrize("erro", [exceptions.Aborted("contenção"), exceptions.ResourceExhausted("cota")])
+def test_incremento_recusado_e_reenviado(fila, erro):
+    fila.db.erros["lote"].append(erro)
+    a = fila.enfileirar("membros_gp", "1", {"TOTAL": Increment(1)})
+    _enviar(fila)
+    assert fila.status([a])[a] == (CONFIRMADA, "")
+    assert fila.db.docs[("membros_gp", "1")]["TOTAL"] == 11
+
+
+@pytest.mark.parametrize("erro", [
+    exceptions.DeadlineExceeded("tempo"), exceptions.ServiceUnavailable("conexão"), TimeoutError("tempo"),
+])
+def test_incremento_com_resultado_incerto_nao_e_reenviado(fila, erro):
+    fila.db.erros["lote"].append(erro)
+    a = fila.enfileirar("membros_gp", "1", {"TOTAL": Increment(1)})
+    b = fila.enfileirar("membros_gp", "2", {"NOME": "Bruno"}, modo="merge")
+    _enviar(fila)
+
+    situacao, mensagem = fila.status([a])[a]
+    assert situacao == FALHOU and "incrementos não reenviados" in mensagem
+    assert fila.db.docs[("membros_gp", "1")]["TOTAL"] == 10
+    # Sem `Increment` a regravação é idempotente e acontece normalmente
+    assert fila.status([b])[b] == (CONFIRMADA, "")
+    assert [caminho for tipo, caminho, _ in fila.db.envios if tipo == "individual"] == [("membros_gp", "2")]
+    assert not fila._pendentes
+
+
+def test_erros_nao_aplicados_nao_sao_incertos():
+    for classe in fila_escrita.ERROS_NAO_APLICADOS:
+        assert not fila_escrita._resultado_incerto(classe("recusado"))
+    assert fila_escrita._resultado_incerto(exceptions.DeadlineExceeded("tempo"))
+    assert not fila_escrita._resultado_incerto(ValueError("bug"))
+
+
+def test_tem_incremento_em_mapas():
+    assert fila_escrita._tem_incremento({"STATUS": {"Ativo": Increment(1)}})
+    assert not fila_escrita._tem_incremento({"STATUS": {"Ativo": 1}, "NOME": "Ana"})
+
+
+@pytest.fixture
+def sessao(monkeypatch):
+    estado = {}
+    monkeypatch.setattr(fila_escrita.st, "session_state", estado, raising=False)
+    return estado
+
+
+def test_acompanhar_e_coletar_confirmacoes(fila, sessao, monkeypatch):
+    monkeypatch.setattr(fila_escrita, "MAX_TENTATIVAS", 1)
+    a = fila.enfileirar("membros_gp", "1", {"NOME": "Ana Maria"})
+    b = fila.enfileirar("membros_gp", "9", {"NOME": "Inexistente"})
+    fila_escrita.acompanhar_edicoes("fila", [a])
+    fila_escrita.acompanhar_edicoes("fila", [b])
+    assert sessao["fila"] == [a, b]
+
+    assert fila_escrita.coletar_confirmacoes("fila", fila) == (0, [])
+    assert sessao["fila"] == [a, b]
+
+    _enviar(fila)
+    confirmadas, falhas = fila_escrita.coletar_confirmacoes("fila", fila)
+    assert confirmadas == 1 and len(falhas) == 1 and "não existe" in falhas[0]
+    assert sessao["fila"] == []
+    assert fila_escrita.coletar_confirmacoes("fila", fila) == (0, [])
+
+
+def test_ids_descartados_do_historico_saem_da_sessao(fila, sessao, monkeypatch):
+    monkeypatch.setattr(fila_escrita, "MAX_RESULTADOS", 2)
+    ids = [fila.enfileirar("membros_gp", str(i), {"NOME": f"Membro {i}"}, modo="merge") for i in range(3)]
+    assert fila.status(ids[:1]) == {ids[0]: (DESCONHECIDA, "")}
+
+    fila_escrita.acompanhar_edicoes("fila", ids)
+    assert fila_escrita.coletar_confirmacoes("fila", fila) == (0, [])
+    assert sessao["fila"] == ids[1:]
+
+
+def test_thread_gravadora_esvazia_a_fila():
+    fila = FilaEscrita(ClienteFalso(), intervalo=0.01)
+    a = fila.enfileirar("membros_gp", "1", {"NOME": "Ana"}, modo="merge")
+    assert fila.esvaziar(timeout=2)
+    assert fila.status([a])[a] == (CONFIRMADA, "")
+    assert fila.db.docs[("membros_gp", "1")] == {"NOME": "Ana"}
@@ -0,0 +1,156 @@
+"""As máscaras de `utils.filtros` devem reproduzir os filtros linha a linha (`apply`) que substituíram."""
+import random
+import unicodedata
+
+import pandas as pd
+import pytest
+
+from utils import indice_busca
+from utils.filtros import MotorFiltros, filtro_lista, filtro_texto, filtro_valores, obter_motor
+from utils.versao_dados import carimbar_versao
+
+
+PROJETOS = ["Robô Seguidor", "Drone Agrícola", "Braço Mecânico", "Jogo Educativo", "  Joia 3D ", ""]
+EQUIPES = ["Robótica", "Aeromodelismo", "Jovens Inventores", "Automação", ""]
+ORIENTADORES = ["ANDERSON SEIXAS", "CAMILA SERRÃO", "JOÃO PEDRO", "SABRINA FELICIANO", ""]
+STATUS = ["Ativo", "Inativo", "Pendente"]
+
+
+def _normalize_text(value) -> str:
+    # Cópia de `views.projetos.view_projetos_dash._normalize_text` (a view importa o Streamlit)
+    if value is None:
+        return ""
+    return unicodedata.normalize("NFKD", str(value)).encode("ASCII", "ignore").decode("utf-8").strip().lower()
+
+
+def _membros(n: int = 600, semente: int = 7) -> pd.DataFrame:
+    rnd = random.Random(semente)
+    return carimbar_versao(pd.DataFrame({
+        "PROJETO ATUAL": [rnd.choice(PROJETOS) for _ in range(n)],
+        "EQUIPE DE PROJETO": [rnd.choice(EQUIPES) for _ in range(n)],
+        "ORIENTADOR": [rnd.choice(ORIENTADORES) for _ in range(n)],
+        "STATUS": [rnd.choice(STATUS) for _ in range(n)],
+    }))
+
+
+def _equipes(n: int = 300, semente: int = 11) -> pd.DataFrame:
+    rnd = random.Random(semente)
+    nomes = [o for o in ORIENTADORES if o]
+    return carimbar_versao(pd.DataFrame({
+        "EQUIPE": [f"Equipe {i}" for i in range(n)],
+        "Status": [rnd.choice(["Ativa", "Inativa"]) for _ in range(n)],
+        "Orientadores": [", ".join(rnd.sample(nomes, rnd.randint(0, 3))) for _ in range(n)],
+    }))
+
+
+def _projetos_apply(df, busca, status_sel, orientadores, equipes):
+    """Filtro de `gestao_projetos` antes da vetorização."""
+    filtrado = df
+    if busca:
+        termo = _normalize_text(busca)
+
+        def _match(row):
+            campos = [row.get("PROJETO ATUAL", ""), row.get("EQUIPE DE PROJETO", ""), row.get("ORIENTADOR", "")]
+            return any(termo in _normalize_text(c) for c in campos)
+
+        filtrado = filtrado[filtrado.apply(_match, axis=1)]
+    if status_sel != "Todos" and "STATUS" in filtrado.columns:
+        filtrado = filtrado[filtrado["STATUS"] == status_sel]
+    if orientadores:
+        filtrado = filtrado[filtrado["ORIENTADOR"].isin(orientadores)]
+    if equipes:
+        filtrado = filtrado[filtrado["EQUIPE DE PROJETO"].isin(equipes)]
+    return filtrado
+
+
+def _projetos_motor(df, busca, status_sel, orientadores, equipes):
+    """Filtro atual de `gestao_projetos`."""
+    return obter_motor(df).filtrar([
+        filtro_texto(["PROJETO ATUAL", "EQUIPE DE PROJETO", "ORIENTADOR"], _normalize_text(busca)),
+        filtro_valores("STATUS", [status_sel] if status_sel != "Todos" else []),
+        filtro_valores("ORIENTADOR", orientadores),
+        filtro_valores("EQUIPE DE PROJETO", equipes),
+    ], df)
+
+
+def _equipes_apply(df, status, ori_sel):
+    """Filtros de status e orientadores de `_aplicar_filtros` (equipes) antes da vetorização."""
+    df2 = df
+    if status != "Todos" and "Status" in df2.columns:
+        df2 = df2[df2["Status"] == status]
+    if ori_sel:
+        def has_any(row):
+            atual = set(n.strip() for n in str(row.get("Orientadores", "")).split(",") if n.strip())
+            return any(o in atual for o in ori_sel)
+        df2 = df2[df2.apply(has_any, axis=1)]
+    return df2
+
+
+@pytest.mark.parametrize("busca", ["", "jo", " jo ", "JOÃO", "robo", "   ", "ç", "agricola", "xyz", "3d"])
+@pytest.mark.parametrize("status_sel", ["Todos", "Ativo", "Pendente"])
+def test_projetos_busca_e_status(busca, status_sel):
+    df = _membros()
+    esperado = _projetos_apply(df, busca, status_sel, [], [])
+    obtido = _projetos_motor(df, busca, status_sel, [], [])
+    assert obtido.index.tolist() == esperado.index.tolist()
+
+
+@pytest.mark.parametrize("orientadores", [[], ["CAMILA SERRÃO"], ["JOÃO PEDRO", ""], ["INEXISTENTE"]])
+@pytest.mark.parametrize("equipes", [[], ["Robótica"], ["Automação", "Jovens Inventores"]])
+def test_projetos_selecoes(orientadores, equipes):
+    df = _membros()
+    for busca in ["", "jo"]:
+        esperado = _projetos_apply(df, busca, "Ativo", orientadores, equipes)
+        obtido = _projetos_motor(df, busca, "Ativo", orientadores, equipes)
+        assert obtido.index.tolist() == esperado.index.tolist()
+
+
+@pytest.mark.parametrize("status", ["Todos", "Ativa", "Inativa"])
+@pytest.mark.parametrize("ori_sel", [[], ["CAMILA SERRÃO"], ["JOÃO PEDRO", "ANDERSON SEIXAS"], ["INEXISTENTE"]])
+def test_equipes_status_e_orientadores(status, ori_sel):
+    df = _equipes()
+    esperado = _equipes_apply(df, status, ori_sel)
+    obtido = MotorFiltros(df).filtrar([
+        filtro_valores("Status", [status] if status != "Todos" else []),
+        filtro_lista("Orientadores", ori_sel, separador=","),
+    ])
+    assert obtido.index.tolist() == esperado.index.tolist()
+
+
+def test_filtrar_subconjunto_alinha_pelo_indice():
+    df = _equipes()
+    subconjunto = df[df["EQUIPE"].str.endswith("7")]
+    motor = MotorFiltros(df)
+    obtido = motor.filtrar([filtro_valores("Status", ["Ativa"])], subconjunto)
+    assert obtido.index.tolist() == subconjunto[subconjunto["Status"] == "Ativa"].index.tolist()
+
+
+def test_mascara_memorizada_e_somente_leitura():
+    motor = MotorFiltros(_membros())
+    filtros = [filtro_valores("STATUS", ["Ativo"]), filtro_texto(["ORIENTADOR"], "")]
+    mascara = motor.mascara(filtros)
+    assert motor.mascara(filtros) is mascara
+    assert not mascara.flags.writeable
+
+
+def test_indice_de_trigramas_so_depois_de_varias_buscas(monkeypatch):
+    monkeypatch.setattr(indice_busca, "MIN_LINHAS_INDICE", 100)
+    monkeypatch.setattr(indice_busca, "CONSULTAS_PARA_INDICE", 3)
+    indice = indice_busca.IndiceBusca(_membros(), ["PROJETO ATUAL", "ORIENTADOR"])
+    for termo in ["robo", "seixas", "agri"]:
+        indice.mascara(termo)
+    assert indice._ngramas is None
+    indice.mascara("joia")
+    assert indice._ngramas is not None
+
+    pequeno = indice_busca.IndiceBusca(_membros(n=50), ["PROJETO ATUAL"])
+    for _ in range(10):
+        pequeno.mascara("robo")
+    assert pequeno._ngramas is None
+
+
+@pytest.mark.parametrize("termo", ["robo", "Serrão", "joia 3d", "xyz", "a;b", "  Joia"])
+def test_trigramas_e_varredura_concordam(termo):
+    indice = indice_busca.IndiceBusca(_membros(), ["PROJETO ATUAL", "EQUIPE DE PROJETO", "ORIENTADOR"])
+    nq = indice_busca.normalizar_busca(termo)
+    assert (indice._mascara_ngramas(nq) == indice._contem_vetorizado(nq)).all()
@@ -0,0 +1,46 @@
+"""`padronizar_estados` (coluna inteira) deve dar o mesmo rótulo que `padronizar_estado_label`."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from models.patrimonio_model import padronizar_estado_label, padronizar_estados
+
+
+VALORES = [
+    "Novo",
+    "  Em   bom estado ",
+    "usado",
+    "USADO",
+    " Usado ",
+    "Desgastado, mas funcional",
+    "desgastado mas funcional",
+    "DESGASTADO,  MAS FUNCIONAL",
+    "Desgastado",
+    "Usado, quebrado",
+    "Danificado",
+    "",
+    "   ",
+    None,
+    np.nan,
+    pd.NA,
+    5,
+    2.5,
+]
+
+
+@pytest.mark.parametrize("valor", VALORES, ids=[repr(v) for v in VALORES])
+def test_vetorizado_igual_ao_escalar(valor):
+    assert padronizar_estados(pd.Series([valor], dtype=object)).iloc[0] == padronizar_estado_label(valor)
+
+
+def test_ausentes_viram_vazio():
+    assert padronizar_estado_label(np.nan) == ""
+    assert padronizar_estado_label(None) == ""
+    assert padronizar_estados(pd.Series([np.nan, None, "usado"])).tolist() == ["", "", "Desgastado, mas funcional"]
+
+
+def test_coluna_inteira_preserva_indice():
+    serie = pd.Series(VALORES, index=range(100, 100 + len(VALORES)), dtype=object)
+    obtido = padronizar_estados(serie)
+    assert obtido.index.equals(serie.index)
+    assert obtido.tolist() == [padronizar_estado_label(v) for v in VALORES]
@@ -0,0 +1,112 @@
+"""Leitura do delta `edited_rows` do `st.data_editor` (sessão simulada por um dict)."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import rastreio_edicoes
+from utils.rastreio_edicoes import alteracoes_editor, iterar_alteracoes, valores_equivalentes
+
+
+@pytest.fixture
+def sessao(monkeypatch):
+    estado = {}
+    monkeypatch.setattr(rastreio_edicoes.st, "session_state", estado, raising=False)
+    return estado
+
+
+def _pagina() -> pd.DataFrame:
+    """Segunda página (linhas 25-27) de uma tabela: índice não começa em 0."""
+    return pd.DataFrame(
+        {
+            "CPF": ["111", "222", "333"],
+            "NOME": ["Ana", "Bruno", "Carla"],
+            "EMAIL": ["ana@ifro.edu.br", None, ""],
+            "ANO": [2023, 2024, np.nan],
+            "STATUS": ["Ativo", "Inativo", "Ativo"],
+        },
+        index=[25, 26, 27],
+    )
+
+
+@pytest.mark.parametrize("antes, depois", [
+    (None, ""),
+    (np.nan, None),
+    ("", "   "),
+    (pd.NA, ""),
+    (pd.NaT, None),
+    (2024, 2024.0),
+    (np.int64(3), 3),
+    ("Ana", "Ana"),
+    (2024, "2024"),
+])
+def test_valores_equivalentes(antes, depois):
+    assert valores_equivalentes(antes, depois)
+    assert valores_equivalentes(depois, antes)
+
+
+@pytest.mark.parametrize("antes, depois", [
+    (None, "Ana"),
+    ("", 0),
+    (np.nan, 0.0),
+    (2024, 2025),
+    ("Ana", "ana"),
+    (True, 1),
+    (False, ""),
+])
+def test_valores_diferentes(antes, depois):
+    assert not valores_equivalentes(antes, depois)
+
+
+def test_posicao_da_pagina_e_chave_por_coluna(sessao):
+    sessao["editor"] = {"edited_rows": {0: {"NOME": "Ana Maria"}, 2: {"STATUS": "Inativo"}}, "added_rows": [], "deleted_rows": []}
+    assert list(iterar_alteracoes("editor", _pagina(), coluna_chave="CPF")) == [
+        ("111", "NOME", "Ana Maria"),
+        ("333", "STATUS", "Inativo"),
+    ]
+
+
+def test_chave_pelo_indice_e_posicao_em_texto(sessao):
+    sessao["editor"] = {"edited_rows": {"1": {"NOME": "Bruno Lima"}}}
+    assert list(iterar_alteracoes("editor", _pagina())) == [(26, "NOME", "Bruno Lima")]
+
+
+def test_ignora_edicoes_sem_efeito(sessao):
+    sessao["editor"] = {"edited_rows": {
+        0: {"NOME": "Ana", "ANO": 2023.0},
+        1: {"EMAIL": "", "ANO": 2024},
+        2: {"EMAIL": None, "ANO": None},
+    }}
+    assert list(iterar_alteracoes("editor", _pagina(), coluna_chave="CPF")) == []
+
+
+def test_filtra_campos_colunas_e_posicoes(sessao):
+    sessao["editor"] = {"edited_rows": {
+        0: {"NOME": "Ana Maria", "STATUS": "Pendente", "EXCLUIR": True},
+        7: {"NOME": "Fora da página"},
+    }}
+    obtido = list(iterar_alteracoes("editor", _pagina(), coluna_chave="CPF", campos=["STATUS", "EXCLUIR"]))
+    assert obtido == [("111", "STATUS", "Pendente")]
+
+
+@pytest.mark.parametrize("estado", [None, [], "texto", {}, {"edited_rows": None}])
+def test_sem_estado_do_editor(sessao, estado):
+    if estado is not None:
+        sessao["editor"] = estado
+    assert list(iterar_alteracoes("editor", _pagina())) == []
+    assert alteracoes_editor("editor", _pagina()) == {}
+
+
+def test_alteracoes_agrupadas_por_chave(sessao):
+    sessao["editor"] = {"edited_rows": {
+        0: {"NOME": "Ana Maria", "EMAIL": "ana.maria@ifro.edu.br"},
+        1: {"EMAIL": "bruno@ifro.edu.br"},
+    }}
+    assert alteracoes_editor("editor", _pagina(), coluna_chave="CPF") == {
+        "111": {"NOME": "Ana Maria", "EMAIL": "ana.maria@ifro.edu.br"},
+        "222": {"EMAIL": "bruno@ifro.edu.br"},
+    }
+
+
+def test_ultima_edicao_prevalece():
+    triplas = [("111", "NOME", "Ana"), ("111", "NOME", "Ana Maria"), ("222", "STATUS", "Ativo")]
+    assert rastreio_edicoes.agrupar_alteracoes(triplas) == {"111": {"NOME": "Ana Maria"}, "222": {"STATUS": "Ativo"}}
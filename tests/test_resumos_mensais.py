@@ -0,0 +1,46 @@
+"""Os resumos mensais devem contar todos os registros nas séries e totais, mesmo sem dimensão."""
+import pandas as pd
+
+from utils.resumos_mensais import TABELA_TOTAL, resumir_membros, resumir_patrimonio
+
+
+def _membros() -> pd.DataFrame:
+    return pd.DataFrame({
+        "DATA CADASTRO": ["2025-03-02", "2025-03-09", "2025-04-01", ""],
+        "STATUS": ["Ativo", "", "Inativo", "Ativo"],
+        "CURSO": ["Informática", None, "", "Química"],
+        "EQUIPE DE PROJETO": ["Robótica;Automação", "", "Robótica", ""],
+    })
+
+
+def test_membro_sem_status_entra_na_serie_e_nos_totais_do_mes():
+    df = _membros().iloc[:2]
+    resumo = resumir_membros(df)
+    assert resumo.serie(TABELA_TOTAL, "MEMBROS").to_dict() == {"2025-03": 2}
+    assert resumo.no_mes(TABELA_TOTAL, 2025, 3, "MEMBROS").sum() == 2
+    assert resumo.ate_mes(TABELA_TOTAL, 2025, 3, "MEMBROS").sum() == 2
+    # A tabela por status continua sem a dimensão vazia
+    assert resumo.no_mes("status", 2025, 3, "MEMBROS").to_dict() == {"Ativo": 1}
+
+
+def test_totais_acumulados_e_sem_data():
+    resumo = resumir_membros(_membros())
+    assert resumo.serie(TABELA_TOTAL, "MEMBROS").to_dict() == {"2025-03": 2, "2025-04": 1}
+    assert resumo.ate_mes(TABELA_TOTAL, 2025, 4, "MEMBROS").sum() == 3
+    assert resumo.ate_mes(TABELA_TOTAL, 2025, 2, "MEMBROS").empty
+    assert resumo.total(TABELA_TOTAL, "MEMBROS").sum() == 4
+    assert resumo.total("equipe", "MEMBROS").to_dict() == {"Robótica": 2, "Automação": 1}
+
+
+def test_patrimonio_sem_categoria_entra_nos_totais_do_mes():
+    df = pd.DataFrame({
+        "DATA_ATUALIZACAO": ["2025-03-02", "2025-03-20"],
+        "CATEGORIA": ["Eletrônicos", ""],
+        "ESTADO": ["", "Bom"],
+        "QUANTIDADE": [2, 3],
+        "VALOR_TOTAL": [100.0, 50.0],
+    })
+    resumo = resumir_patrimonio(df)
+    assert resumo.no_mes(TABELA_TOTAL, 2025, 3, "ITENS").sum() == 5
+    assert resumo.ate_mes(TABELA_TOTAL, 2025, 3, "VALOR").sum() == 150.0
+    assert resumo.no_mes("categoria", 2025, 3, "ITENS").sum() == 2
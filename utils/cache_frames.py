@@ -0,0 +1,240 @@
+import threading
+import time
+import warnings
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+from utils.versao_dados import carimbar_versao, obter_versao
+
+
+TTL_PADRAO = 120
+RECONCILIAR_APOS = 5.0
+
+Chave = str | Callable[[pd.DataFrame], pd.Series]
+
+
+def _conteudo_igual(a: pd.DataFrame, b: pd.DataFrame) -> bool:
+    """Mesmas colunas e linhas, ignorando a ordem de ambas."""
+    if len(a) != len(b) or set(a.columns) != set(b.columns):
+        return False
+    if a.empty:
+        return True
+    colunas = sorted(a.columns, key=str)
+    hash_a = np.sort(pd.util.hash_pandas_object(a[colunas].astype(str), index=False).to_numpy())
+    hash_b = np.sort(pd.util.hash_pandas_object(b[colunas].astype(str), index=False).to_numpy())
+    return bool(np.array_equal(hash_a, hash_b))
+
+
+def _atribuir(df: pd.DataFrame, mascara: np.ndarray, coluna: str, valor) -> None:
+    if coluna not in df.columns:
+        df[coluna] = pd.Series([None] * len(df), index=df.index, dtype=object)
+    if isinstance(valor, (list, tuple, dict)):
+        # Listas e mapas (ex.: EQUIPES_SLUGS) vão inteiros em cada célula
+        df[coluna] = df[coluna].astype(object)
+        for rotulo in df.index[mascara]:
+            df.at[rotulo, coluna] = valor
+        return
+    with warnings.catch_warnings():
+        # Valor de tipo incompatível com a coluna: converte a coluna para object
+        warnings.simplefilter("error", FutureWarning)
+        try:
+            df.loc[mascara, coluna] = valor
+            return
+        except (TypeError, ValueError, FutureWarning):
+            pass
+    df[coluna] = df[coluna].astype(object)
+    df.loc[mascara, coluna] = valor
+
+
+class FrameCache:
+    """DataFrame de uma coleção mantido em memória no processo.
+
+    Após uma escrita, os controllers aplicam a mesma mudança no frame
+    (inserção, atualização ou remoção por chave) e a versão do dataset muda, sem
+    nova leitura do Firestore. Uma reconciliação em segundo plano (com debounce)
+    relê a coleção e substitui o frame apenas se o conteúdo divergir. Com o TTL
+    vencido, o frame atual continua sendo servido enquanto é recarregado.
+    """
+
+    def __init__(
+        self,
+        nome: str,
+        carregar: Callable[[], pd.DataFrame],
+        chave: Chave,
+        ttl: float = TTL_PADRAO,
+        preparar: Callable[[pd.DataFrame], pd.DataFrame] | None = None,
+    ):
+        self.nome = nome
+        self.carregar = carregar
+        self.chave = chave
+        self.ttl = ttl
+        self.preparar = preparar
+        self._df: pd.DataFrame | None = None
+        self._carregado_em = 0.0
+        self._geracao = 0
+        self._lock = threading.RLock()
+        self._carga = threading.Lock()
+        self._timer: threading.Timer | None = None
+        self._recarregando = False
+
+    def obter(self) -> pd.DataFrame:
+        """Cópia do frame atual (carrega na primeira chamada ou após `invalidar`)."""
+        with self._lock:
+            df = self._df
+            expirado = df is not None and time.monotonic() - self._carregado_em > self.ttl
+        if df is None:
+            df = self._carregar_agora()
+        elif expirado:
+            self.agendar_reconciliacao(0)
+        return df.copy()
+
+    def versao(self) -> str | None:
+        """Versão do frame atual sem copiá-lo (None se não carregado ou vazio)."""
+        with self._lock:
+            if self._df is None or self._df.empty:
+                return None
+            return obter_versao(self._df)
+
+    def invalidar(self) -> None:
+        with self._lock:
+            self._df = None
+            self._geracao += 1
+
+    def _carregar_agora(self) -> pd.DataFrame:
+        # Uma única leitura mesmo com várias threads pedindo o frame ao mesmo tempo
+        with self._carga:
+            with self._lock:
+                if self._df is not None:
+                    return self._df
+            novo = self.carregar()
+            if not isinstance(novo, pd.DataFrame):
+                novo = pd.DataFrame()
+            with self._lock:
+                if self._df is None:
+                    self._df = carimbar_versao(novo)
+                    self._carregado_em = time.monotonic()
+                return self._df
+
+    def registros(self, chaves) -> dict[str, dict]:
+        """Linhas atuais das `chaves` presentes no frame, sem copiá-lo ({} se não carregado)."""
+        with self._lock:
+            if self._df is None:
+                return {}
+            chaves_df = self._chaves(self._df)
+            mascara = chaves_df.isin({str(c) for c in chaves}).to_numpy(dtype=bool)
+            return dict(zip(chaves_df[mascara], self._df[mascara].to_dict("records")))
+
+    def _chaves(self, df: pd.DataFrame) -> pd.Series:
+        if callable(self.chave):
+            return self.chave(df).astype(str)
+        if self.chave not in df.columns:
+            return pd.Series([""] * len(df), index=df.index, dtype=str)
+        return df[self.chave].astype(str)
+
+    def _publicar(self, df: pd.DataFrame) -> None:
+        self._df = carimbar_versao(df.reset_index(drop=True))
+        self._geracao += 1
+        self.agendar_reconciliacao()
+
+    def inserir(self, registro: dict) -> None:
+        """Insere (ou substitui, se a chave já existir) um registro completo."""
+        with self._lock:
+            if self._df is None:
+                return
+            novo = pd.DataFrame([registro])
+            if self.preparar is not None:
+                novo = self.preparar(novo)
+            chave = self._chaves(novo).iloc[0]
+            base = self._df[(self._chaves(self._df) != chave).to_numpy(dtype=bool)]
+            self._publicar(pd.concat([base, novo], ignore_index=True))
+
+    def atualizar(self, chave, campos: dict) -> bool:
+        """Aplica `campos` à linha de `chave`; retorna False se a linha não estiver no frame."""
+        with self._lock:
+            if self._df is None:
+                return False
+            mascara = (self._chaves(self._df) == str(chave)).to_numpy(dtype=bool)
+            if not mascara.any():
+                return False
+            if not campos:
+                return True
+            df = self._df.copy()
+            if self.preparar is not None:
+                linha = {**df[mascara].iloc[0].to_dict(), **campos}
+                campos = self.preparar(pd.DataFrame([linha])).iloc[0].to_dict()
+            for coluna, valor in campos.items():
+                _atribuir(df, mascara, coluna, valor)
+            self._publicar(df)
+            return True
+
+    def remover(self, chaves) -> None:
+        with self._lock:
+            if self._df is None:
+                return
+            alvo = {str(c) for c in chaves}
+            mascara = self._chaves(self._df).isin(alvo).to_numpy(dtype=bool)
+            if mascara.any():
+                self._publicar(self._df[~mascara])
+
+    def agendar_reconciliacao(self, atraso: float | None = None) -> None:
+        """Agenda uma releitura em segundo plano; novas chamadas adiam a anterior."""
+        if atraso is None:
+            atraso = RECONCILIAR_APOS
+        with self._lock:
+            if self._recarregando and atraso == 0:
+                return
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(atraso, self._reconciliar)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _reconciliar(self) -> None:
+        with self._lock:
+            self._timer = None
+            self._recarregando = True
+            geracao = self._geracao
+        try:
+            novo = self.carregar()
+        except Exception:
+            novo = None
+        with self._lock:
+            self._recarregando = False
+            if not isinstance(novo, pd.DataFrame) or self._df is None:
+                return
+            if self._geracao != geracao:
+                # Houve escrita durante a leitura: o resultado pode não incluí-la
+                self.agendar_reconciliacao()
+                return
+            self._carregado_em = time.monotonic()
+            if not _conteudo_igual(self._df, novo):
+                self._df = carimbar_versao(novo)
+                self._geracao += 1
+
+
+_FRAMES: dict[str, FrameCache] = {}
+_FRAMES_LOCK = threading.Lock()
+
+
+def registrar_frame(
+    nome: str,
+    carregar: Callable[[], pd.DataFrame],
+    chave: Chave,
+    ttl: float = TTL_PADRAO,
+    preparar: Callable[[pd.DataFrame], pd.DataFrame] | None = None,
+) -> FrameCache:
+    """Registra (uma vez por processo) o frame em cache de uma coleção."""
+    with _FRAMES_LOCK:
+        if nome not in _FRAMES:
+            _FRAMES[nome] = FrameCache(nome, carregar, chave, ttl=ttl, preparar=preparar)
+        return _FRAMES[nome]
+
+
+def invalidar_frames() -> None:
+    """Descarta todos os frames; a próxima leitura de cada um vai ao Firestore."""
+    with _FRAMES_LOCK:
+        frames = list(_FRAMES.values())
+    for frame in frames:
+        frame.invalidar()
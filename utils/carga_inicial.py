@@ -0,0 +1,32 @@
+import threading
+from typing import Callable
+
+from utils.metadados import marcar_concluido, migracao_concluida
+
+
+_VERIFICADAS: set[str] = set()
+_LOCK = threading.Lock()
+
+
+def _tem_documentos(db, colecao: str) -> bool:
+    return bool(list(db.collection(colecao).limit(1).stream()))
+
+
+def garantir_carga_inicial(db, colecao: str, semear: Callable[[], None]) -> None:
+    """Semeia `colecao` com `semear` se ela estiver vazia.
+
+    A verificação roda uma vez por processo. Depois que a coleção tem dados, um marcador
+    em metadados_gp dispensa até a consulta `limit(1)` nos processos seguintes.
+    """
+    if colecao in _VERIFICADAS:
+        return
+    with _LOCK:
+        if colecao in _VERIFICADAS:
+            return
+        marcador = f"carga_inicial_{colecao}"
+        if not migracao_concluida(db, marcador):
+            if not _tem_documentos(db, colecao):
+                semear()
+            if _tem_documentos(db, colecao):
+                marcar_concluido(db, marcador)
+        _VERIFICADAS.add(colecao)
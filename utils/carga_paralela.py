@@ -0,0 +1,53 @@
+import contextvars
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Iterator
+
+
+TIMEOUT_PADRAO = 20.0
+MAX_TRABALHADORES = 4
+
+_EXECUTOR = ThreadPoolExecutor(max_workers=MAX_TRABALHADORES, thread_name_prefix="carga")
+
+
+class CargaParalela:
+    """Carrega fontes de dados independentes em paralelo, cada uma com seu tempo limite.
+
+    Os carregadores rodam em threads do pool e não devem chamar `st.*`; a renderização
+    fica com a thread do script, que consome `por_chegada` e desenha cada seção assim
+    que a respectiva fonte termina.
+    """
+
+    def __init__(self, fontes: dict[str, Callable[[], object]], timeouts: dict[str, float] | None = None):
+        self._inicio = time.monotonic()
+        self._timeouts = timeouts or {}
+        # Cada carregador roda com uma cópia do contexto do script, para que as medições
+        # feitas nas threads do pool fiquem associadas à execução da página
+        self._futuros = {
+            nome: _EXECUTOR.submit(contextvars.copy_context().run, carregar)
+            for nome, carregar in fontes.items()
+        }
+
+    def _prazo(self, nome: str) -> float:
+        return self._inicio + self._timeouts.get(nome, TIMEOUT_PADRAO)
+
+    def por_chegada(self) -> Iterator[tuple[str, object, Exception | None]]:
+        """Gera (nome, resultado, erro) na ordem em que as fontes terminam.
+
+        Uma fonte que passa do prazo é entregue com `TimeoutError` (a thread segue em
+        segundo plano e o resultado tardio é descartado).
+        """
+        pendentes = dict(self._futuros)
+        while pendentes:
+            agora = time.monotonic()
+            for nome in [n for n, futuro in pendentes.items() if not futuro.done() and self._prazo(n) <= agora]:
+                del pendentes[nome]
+                yield nome, None, TimeoutError(f"Tempo esgotado ao carregar {nome}")
+            if not pendentes:
+                break
+            espera = max(0.0, min(self._prazo(n) for n in pendentes) - time.monotonic())
+            prontos, _ = wait(pendentes.values(), timeout=espera, return_when=FIRST_COMPLETED)
+            for nome in [n for n, futuro in pendentes.items() if futuro in prontos]:
+                futuro = pendentes.pop(nome)
+                erro = futuro.exception()
+                yield nome, None if erro else futuro.result(), erro
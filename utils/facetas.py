@@ -0,0 +1,104 @@
+import threading
+import weakref
+from typing import Callable, Sequence
+
+import numpy as np
+import pandas as pd
+
+from utils.filtros import MotorFiltros
+
+
+def _ordenar(valores: list) -> list:
+    try:
+        return sorted(valores)
+    except TypeError:
+        return sorted(valores, key=str)
+
+
+class Facetas:
+    """Opções e contagens (valor -> quantidade) das colunas filtráveis de um dataset.
+
+    Opções e totais são calculados uma vez por versão do dataset. Sob uma seleção,
+    a contagem de cada coluna considera os demais filtros ativos (a própria coluna
+    fica de fora, como em busca facetada) e sai de um `bincount` sobre os códigos
+    fatorizados do motor, sem reagrupar o DataFrame.
+    """
+
+    def __init__(self, motor: MotorFiltros):
+        self.motor = motor
+        self._opcoes: dict[tuple, list] = {}
+        self._totais: dict[tuple, dict] = {}
+        self._memo: dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def opcoes(self, coluna: str, excluir_vazios: bool = False, como_texto: bool = False) -> list:
+        """Valores distintos ordenados (sem nulos), como `sorted(col.dropna().unique())`."""
+        chave = (coluna, excluir_vazios, como_texto)
+        with self._lock:
+            if chave in self._opcoes:
+                return self._opcoes[chave]
+        if coluna not in self.motor.df.columns:
+            valores = []
+        else:
+            _, mapa = self.motor.codigos(coluna, como_texto)
+            valores = [v for v in mapa if not (excluir_vazios and (v == "" or not str(v).strip()))]
+            valores = _ordenar(valores)
+        with self._lock:
+            self._opcoes[chave] = valores
+        return valores
+
+    def memo(self, chave: str, calcular: Callable[[pd.DataFrame], object]):
+        """Memoriza um valor derivado do dataset (ex.: opções com regra própria)."""
+        with self._lock:
+            if chave in self._memo:
+                return self._memo[chave]
+        valor = calcular(self.motor.df)
+        with self._lock:
+            self._memo[chave] = valor
+        return valor
+
+    def _contar(self, coluna: str, como_texto: bool, mascara: np.ndarray | None) -> dict:
+        codigos, mapa = self.motor.codigos(coluna, como_texto)
+        validos = codigos >= 0
+        if mascara is not None:
+            validos = validos & mascara
+        contagem = np.bincount(codigos[validos], minlength=len(mapa))
+        return {valor: int(contagem[i]) for valor, i in mapa.items()}
+
+    def contagens(self, coluna: str, filtros: Sequence[tuple] = (), como_texto: bool = False) -> dict:
+        """Contagem por valor de `coluna` sob os filtros ativos das demais colunas."""
+        if coluna not in self.motor.df.columns:
+            return {}
+        outros = [f for f in filtros if not (f[0] in ("valores", "lista") and f[1] == coluna)]
+        mascara = self.motor.mascara(outros)
+        if mascara.all():
+            chave = (coluna, como_texto)
+            with self._lock:
+                if chave in self._totais:
+                    return self._totais[chave]
+            totais = self._contar(coluna, como_texto, None)
+            with self._lock:
+                self._totais[chave] = totais
+            return totais
+        return self._contar(coluna, como_texto, mascara)
+
+
+def rotulo_com_contagem(contagens: dict) -> Callable[[object], str]:
+    """`format_func` para widgets: exibe "Valor (123)"."""
+    def formatar(valor) -> str:
+        return f"{valor} ({contagens.get(valor, 0)})"
+    return formatar
+
+
+_FACETAS: "weakref.WeakKeyDictionary[MotorFiltros, Facetas]" = weakref.WeakKeyDictionary()
+_FACETAS_LOCK = threading.Lock()
+
+
+def obter_facetas(motor: MotorFiltros) -> Facetas:
+    """Serviço de facetas associado ao motor (e portanto à versão do dataset)."""
+    with _FACETAS_LOCK:
+        facetas = _FACETAS.get(motor)
+        if facetas is None:
+            facetas = Facetas(motor)
+            _FACETAS[motor] = facetas
+        return facetas
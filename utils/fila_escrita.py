@@ -0,0 +1,276 @@
+import atexit
+import threading
+import time
+from collections import OrderedDict
+from uuid import uuid4
+
+import streamlit as st
+from google.api_core import exceptions
+from google.cloud.firestore import Increment
+
+
+LIMITE_LOTE = 500
+INTERVALO_PADRAO = 0.5
+MAX_TENTATIVAS = 5
+ESPERA_BASE = 1.0
+MAX_RESULTADOS = 5000
+
+# Erros em que o Firestore recusou a escrita: é seguro reenviar, mesmo com `Increment`
+ERROS_NAO_APLICADOS = (
+    exceptions.Aborted,
+    exceptions.AlreadyExists,
+    exceptions.FailedPrecondition,
+    exceptions.InvalidArgument,
+    exceptions.NotFound,
+    exceptions.OutOfRange,
+    exceptions.PermissionDenied,
+    exceptions.ResourceExhausted,
+    exceptions.Unauthenticated,
+)
+
+PENDENTE = "pendente"
+CONFIRMADA = "confirmada"
+FALHOU = "falhou"
+# Id fora do histórico: descartado após `MAX_RESULTADOS` resultados ou de outro processo
+DESCONHECIDA = "desconhecida"
+
+
+def _mesclar_campos(base: dict, novos: dict) -> dict:
+    """Combina edições pendentes do mesmo documento: mapas são mesclados,
+    `Increment` são somados e os demais valores mais recentes prevalecem."""
+    for campo, valor in novos.items():
+        anterior = base.get(campo)
+        if isinstance(anterior, dict) and isinstance(valor, dict):
+            base[campo] = _mesclar_campos(dict(anterior), valor)
+        elif isinstance(anterior, Increment) and isinstance(valor, Increment):
+            base[campo] = Increment(anterior.value + valor.value)
+        else:
+            base[campo] = valor
+    return base
+
+
+def _tem_incremento(campos: dict) -> bool:
+    return any(
+        isinstance(valor, Increment) or (isinstance(valor, dict) and _tem_incremento(valor))
+        for valor in campos.values()
+    )
+
+
+def _resultado_incerto(erro: Exception) -> bool:
+    """Falha em que a escrita pode ter sido aplicada (tempo esgotado, conexão caída, erro interno)."""
+    if isinstance(erro, ERROS_NAO_APLICADOS):
+        return False
+    return isinstance(erro, (exceptions.GoogleAPICallError, exceptions.RetryError, TimeoutError, ConnectionError))
+
+
+class _Operacao:
+    __slots__ = ("colecao", "doc_id", "modo", "campos", "ids", "tentativas", "proxima")
+
+    def __init__(self, colecao: str, doc_id: str, modo: str, campos: dict, ids: list[str]):
+        self.colecao = colecao
+        self.doc_id = doc_id
+        self.modo = modo
+        self.campos = campos
+        self.ids = ids
+        self.tentativas = 0
+        self.proxima = 0.0
+
+
+class FilaEscrita:
+    """Fila de escrita em segundo plano (write-behind) para o Firestore.
+
+    Edições do mesmo documento são combinadas enquanto aguardam; uma thread
+    gravadora envia tudo em lotes (`db.batch()`) a cada `intervalo` segundos.
+    Se um lote falha, cada documento é regravado isoladamente e, persistindo
+    o erro, volta à fila com espera exponencial até `MAX_TENTATIVAS`.
+    Operações com `Increment` não são idempotentes: só são reenviadas quando o erro
+    garante que a escrita não foi aplicada (`ERROS_NAO_APLICADOS`); com resultado
+    incerto, falham sem novo envio. O resultado de cada edição fica disponível em `status`.
+    """
+
+    def __init__(self, db, intervalo: float = INTERVALO_PADRAO):
+        self.db = db
+        self.intervalo = intervalo
+        self._pendentes: OrderedDict[tuple, _Operacao] = OrderedDict()
+        self._resultados: OrderedDict[str, tuple[str, str]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._acordar = threading.Event()
+        self._ocioso = threading.Event()
+        self._ocioso.set()
+        self._thread: threading.Thread | None = None
+
+    def enfileirar(self, colecao: str, doc_id: str, campos: dict, modo: str = "update") -> str:
+        """Agenda a gravação de `campos` no documento; retorna o id da edição.
+
+        `modo` "update" exige documento existente; "merge" cria o documento se faltar.
+        """
+        if modo not in ("update", "merge"):
+            raise ValueError(f"Modo de escrita desconhecido: {modo}")
+        id_edicao = uuid4().hex
+        chave = (colecao, str(doc_id), modo)
+        with self._lock:
+            operacao = self._pendentes.get(chave)
+            if operacao is None:
+                self._pendentes[chave] = _Operacao(colecao, str(doc_id), modo, dict(campos), [id_edicao])
+            else:
+                _mesclar_campos(operacao.campos, campos)
+                operacao.ids.append(id_edicao)
+            self._registrar(id_edicao, PENDENTE, "")
+            self._ocioso.clear()
+        self._iniciar()
+        return id_edicao
+
+    def status(self, ids) -> dict[str, tuple[str, str]]:
+        """Situação (pendente/confirmada/falhou/desconhecida, mensagem de erro) de cada edição."""
+        with self._lock:
+            return {i: self._resultados.get(i, (DESCONHECIDA, "")) for i in ids}
+
+    def esvaziar(self, timeout: float | None = None) -> bool:
+        """Força o envio imediato e aguarda a fila esvaziar."""
+        self._acordar.set()
+        return self._ocioso.wait(timeout)
+
+    def _registrar(self, id_edicao: str, situacao: str, erro: str) -> None:
+        self._resultados[id_edicao] = (situacao, erro)
+        self._resultados.move_to_end(id_edicao)
+        while len(self._resultados) > MAX_RESULTADOS:
+            self._resultados.popitem(last=False)
+
+    def _iniciar(self) -> None:
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._executar, name="fila-escrita", daemon=True)
+            self._thread.start()
+
+    def _executar(self) -> None:
+        while True:
+            self._acordar.wait(self.intervalo)
+            self._acordar.clear()
+            agora = time.monotonic()
+            with self._lock:
+                prontas = [op for op in self._pendentes.values() if op.proxima <= agora]
+                for op in prontas:
+                    del self._pendentes[(op.colecao, op.doc_id, op.modo)]
+            for inicio in range(0, len(prontas), LIMITE_LOTE):
+                self._gravar_lote(prontas[inicio:inicio + LIMITE_LOTE])
+            with self._lock:
+                if not self._pendentes:
+                    self._ocioso.set()
+
+    def _referencia(self, op: _Operacao):
+        return self.db.collection(op.colecao).document(op.doc_id)
+
+    def _gravar_lote(self, lote: list[_Operacao]) -> None:
+        try:
+            batch = self.db.batch()
+            for op in lote:
+                if op.modo == "merge":
+                    batch.set(self._referencia(op), op.campos, merge=True)
+                else:
+                    batch.update(self._referencia(op), op.campos)
+            batch.commit()
+        except Exception as exc:
+            incerto = _resultado_incerto(exc)
+            for op in lote:
+                if incerto and _tem_incremento(op.campos):
+                    self._falhar(op, exc)
+                else:
+                    self._gravar_individual(op)
+            return
+        self._confirmar(lote)
+
+    def _gravar_individual(self, op: _Operacao) -> None:
+        try:
+            if op.modo == "merge":
+                self._referencia(op).set(op.campos, merge=True)
+            else:
+                self._referencia(op).update(op.campos)
+        except Exception as exc:
+            if _resultado_incerto(exc) and _tem_incremento(op.campos):
+                self._falhar(op, exc)
+            else:
+                self._reagendar(op, exc)
+            return
+        self._confirmar([op])
+
+    def _confirmar(self, lote: list[_Operacao]) -> None:
+        with self._lock:
+            for op in lote:
+                for id_edicao in op.ids:
+                    self._registrar(id_edicao, CONFIRMADA, "")
+
+    def _falhar(self, op: _Operacao, erro: Exception) -> None:
+        """Encerra sem reenvio uma operação com `Increment` cujo resultado é incerto."""
+        mensagem = f"{erro} (resultado incerto; incrementos não reenviados)"
+        with self._lock:
+            for id_edicao in op.ids:
+                self._registrar(id_edicao, FALHOU, mensagem)
+
+    def _reagendar(self, op: _Operacao, erro: Exception) -> None:
+        op.tentativas += 1
+        with self._lock:
+            if op.tentativas >= MAX_TENTATIVAS:
+                for id_edicao in op.ids:
+                    self._registrar(id_edicao, FALHOU, str(erro))
+                return
+            chave = (op.colecao, op.doc_id, op.modo)
+            recente = self._pendentes.get(chave)
+            if recente is not None:
+                # Edições posteriores prevalecem sobre os campos que falharam
+                recente.campos = _mesclar_campos(dict(op.campos), recente.campos)
+                recente.ids = op.ids + recente.ids
+                recente.tentativas = max(recente.tentativas, op.tentativas)
+                return
+            op.proxima = time.monotonic() + ESPERA_BASE * (2 ** (op.tentativas - 1))
+            self._pendentes[chave] = op
+
+
+_FILAS: dict[int, FilaEscrita] = {}
+_FILAS_LOCK = threading.Lock()
+
+
+def obter_fila(db) -> FilaEscrita:
+    """Fila de escrita do processo para o cliente Firestore `db`."""
+    with _FILAS_LOCK:
+        fila = _FILAS.get(id(db))
+        if fila is None:
+            fila = FilaEscrita(db)
+            _FILAS[id(db)] = fila
+        return fila
+
+
+@atexit.register
+def _esvaziar_filas() -> None:
+    for fila in list(_FILAS.values()):
+        fila.esvaziar(timeout=5)
+
+
+def acompanhar_edicoes(chave_sessao: str, ids) -> None:
+    """Guarda na sessão os ids de edições enviadas à fila, para conferência posterior."""
+    pendentes = st.session_state.setdefault(chave_sessao, [])
+    pendentes.extend(ids)
+
+
+def coletar_confirmacoes(chave_sessao: str, fila: FilaEscrita) -> tuple[int, list[str]]:
+    """Retira da sessão as edições concluídas; retorna (confirmadas, mensagens de falha).
+
+    Ids que a fila não conhece mais (`DESCONHECIDA`) também saem da sessão, sem contagem.
+    """
+    ids = st.session_state.get(chave_sessao) or []
+    if not ids:
+        return 0, []
+    situacoes = fila.status(ids)
+    confirmadas = 0
+    falhas: list[str] = []
+    restantes = []
+    for id_edicao in ids:
+        situacao, erro = situacoes[id_edicao]
+        if situacao == CONFIRMADA:
+            confirmadas += 1
+        elif situacao == FALHOU:
+            falhas.append(erro)
+        elif situacao == PENDENTE:
+            restantes.append(id_edicao)
+    st.session_state[chave_sessao] = restantes
+    return confirmadas, falhas
@@ -0,0 +1,201 @@
+import threading
+from collections import OrderedDict
+from typing import Iterable, Sequence
+
+import numpy as np
+import pandas as pd
+
+from utils.indice_busca import IndiceBusca
+from utils.versao_dados import obter_versao
+
+
+MAX_MEMO_MASCARAS = 32
+MAX_MOTORES = 8
+
+
+def filtro_texto(colunas: Iterable[str], termo: str | None) -> tuple:
+    """Busca sem acentos/maiúsculas: o termo deve estar contido em alguma das colunas."""
+    return ("texto", tuple(colunas), termo or "")
+
+
+def filtro_valores(coluna: str, valores: Iterable | None, como_texto: bool = False) -> tuple:
+    """Equivalente a `df[coluna].isin(valores)` (ou `astype(str).isin` com `como_texto`)."""
+    return ("valores", coluna, tuple(valores or ()), como_texto)
+
+
+def filtro_lista(coluna: str, valores: Iterable | None, separador: str = ",") -> tuple:
+    """Coluna multivalorada (ex.: "A, B"): casa se algum item da linha estiver em `valores`."""
+    return ("lista", coluna, tuple(valores or ()), separador)
+
+
+def filtro_contem(colunas: Iterable[str], termo: str | None) -> tuple:
+    """Equivalente a `str.contains(termo, case=False)` em alguma das colunas (aceita regex)."""
+    return ("contem", tuple(colunas), termo or "")
+
+
+def filtro_intervalo(coluna: str, minimo: float | None, maximo: float | None) -> tuple:
+    """Mantém linhas com `minimo <= coluna <= maximo`."""
+    limites = (minimo, maximo) if minimo is not None and maximo is not None else ()
+    return ("intervalo", coluna, limites)
+
+
+def _filtro_ativo(filtro: tuple) -> bool:
+    return bool(filtro[2])
+
+
+def _itens_lista(valor, separador: str) -> set[str]:
+    if valor is None:
+        return set()
+    try:
+        if pd.isna(valor):
+            return set()
+    except (TypeError, ValueError):
+        pass
+    return {n.strip() for n in str(valor).split(separador) if n.strip()}
+
+
+class MotorFiltros:
+    """Compila seleções de filtros em máscaras booleanas sobre colunas pré-processadas.
+
+    As estruturas auxiliares (índices de busca, códigos fatorizados, itens de colunas
+    multivaloradas) são montadas sob demanda uma única vez; as máscaras resultantes
+    ficam memorizadas pelo estado dos filtros.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self.tamanho = len(df)
+        self._indices_busca: dict[tuple, IndiceBusca] = {}
+        self._codigos: dict[tuple, tuple[np.ndarray, dict]] = {}
+        self._listas: dict[tuple, tuple[np.ndarray, dict[str, np.ndarray]]] = {}
+        self._memo: OrderedDict[tuple, np.ndarray] = OrderedDict()
+        self._lock = threading.RLock()
+
+    def _tudo(self) -> np.ndarray:
+        return np.ones(self.tamanho, dtype=bool)
+
+    def codigos(self, coluna: str, como_texto: bool = False) -> tuple[np.ndarray, dict]:
+        """Códigos fatorizados da coluna (-1 para nulos) e o mapa valor -> código."""
+        chave = (coluna, como_texto)
+        with self._lock:
+            if chave not in self._codigos:
+                serie = self.df[coluna]
+                if como_texto:
+                    serie = serie.astype(str)
+                codigos, unicos = pd.factorize(serie)
+                self._codigos[chave] = (codigos, {v: i for i, v in enumerate(unicos)})
+            return self._codigos[chave]
+
+    def _mascara_texto(self, colunas: tuple, termo: str) -> np.ndarray:
+        with self._lock:
+            if colunas not in self._indices_busca:
+                self._indices_busca[colunas] = IndiceBusca(self.df, colunas)
+            indice = self._indices_busca[colunas]
+        return indice.mascara(termo)
+
+    def _mascara_valores(self, coluna: str, valores: tuple, como_texto: bool) -> np.ndarray:
+        if coluna not in self.df.columns:
+            return self._tudo()
+        codigos, mapa = self.codigos(coluna, como_texto)
+        selecionados = []
+        for v in valores:
+            try:
+                if v in mapa:
+                    selecionados.append(mapa[v])
+            except TypeError:
+                continue
+        return np.isin(codigos, np.asarray(selecionados, dtype=codigos.dtype))
+
+    def _mascara_lista(self, coluna: str, valores: tuple, separador: str) -> np.ndarray:
+        if coluna not in self.df.columns:
+            return self._tudo()
+        chave = (coluna, separador)
+        with self._lock:
+            if chave not in self._listas:
+                codigos, unicos = pd.factorize(self.df[coluna])
+                por_item: dict[str, list[int]] = {}
+                for i, valor in enumerate(unicos):
+                    for item in _itens_lista(valor, separador):
+                        por_item.setdefault(item, []).append(i)
+                self._listas[chave] = (
+                    codigos,
+                    {item: np.asarray(cods, dtype=codigos.dtype) for item, cods in por_item.items()},
+                )
+            codigos, por_item = self._listas[chave]
+        vazios = np.empty(0, dtype=codigos.dtype)
+        selecionados = np.concatenate([por_item.get(str(v), vazios) for v in valores] or [vazios])
+        return np.isin(codigos, selecionados)
+
+    def _mascara_contem(self, colunas: tuple, termo: str) -> np.ndarray:
+        resultado = np.zeros(self.tamanho, dtype=bool)
+        for coluna in colunas:
+            if coluna in self.df.columns:
+                resultado |= self.df[coluna].astype(str).str.contains(termo, case=False, na=False).to_numpy(dtype=bool)
+        return resultado
+
+    def _mascara_intervalo(self, coluna: str, limites: tuple) -> np.ndarray:
+        if coluna not in self.df.columns:
+            return self._tudo()
+        minimo, maximo = limites
+        valores = self.df[coluna]
+        return ((valores >= minimo) & (valores <= maximo)).to_numpy(dtype=bool)
+
+    def _mascara_filtro(self, filtro: tuple) -> np.ndarray:
+        tipo = filtro[0]
+        if tipo == "texto":
+            return self._mascara_texto(filtro[1], filtro[2])
+        if tipo == "valores":
+            return self._mascara_valores(filtro[1], filtro[2], filtro[3])
+        if tipo == "lista":
+            return self._mascara_lista(filtro[1], filtro[2], filtro[3])
+        if tipo == "contem":
+            return self._mascara_contem(filtro[1], filtro[2])
+        if tipo == "intervalo":
+            return self._mascara_intervalo(filtro[1], filtro[2])
+        raise ValueError(f"Tipo de filtro desconhecido: {tipo}")
+
+    def mascara(self, filtros: Sequence[tuple]) -> np.ndarray:
+        """Máscara posicional (alinhada a `self.df`) com todos os filtros ativos combinados."""
+        chave = tuple(f for f in filtros if _filtro_ativo(f))
+        if not chave:
+            return self._tudo()
+        with self._lock:
+            if chave in self._memo:
+                self._memo.move_to_end(chave)
+                return self._memo[chave]
+        resultado = self._tudo()
+        for filtro in chave:
+            resultado &= self._mascara_filtro(filtro)
+        resultado.setflags(write=False)
+        with self._lock:
+            self._memo[chave] = resultado
+            while len(self._memo) > MAX_MEMO_MASCARAS:
+                self._memo.popitem(last=False)
+        return resultado
+
+    def filtrar(self, filtros: Sequence[tuple], df: pd.DataFrame | None = None) -> pd.DataFrame:
+        """Aplica os filtros a `self.df` ou a um subconjunto dele (alinhado pelo índice)."""
+        mascara = self.mascara(filtros)
+        if df is None or df is self.df:
+            return self.df[mascara]
+        serie = pd.Series(mascara, index=self.df.index)
+        return df[serie.reindex(df.index, fill_value=False).to_numpy(dtype=bool)]
+
+
+_MOTORES: OrderedDict[tuple, MotorFiltros] = OrderedDict()
+_MOTORES_LOCK = threading.Lock()
+
+
+def obter_motor(df: pd.DataFrame) -> MotorFiltros:
+    """Retorna o motor de filtros do DataFrame, reaproveitado por versão do dataset."""
+    chave = (obter_versao(df), df.shape)
+    with _MOTORES_LOCK:
+        motor = _MOTORES.get(chave)
+        if motor is not None and motor.df.index.equals(df.index):
+            _MOTORES.move_to_end(chave)
+            return motor
+        motor = MotorFiltros(df)
+        _MOTORES[chave] = motor
+        while len(_MOTORES) > MAX_MOTORES:
+            _MOTORES.popitem(last=False)
+        return motor
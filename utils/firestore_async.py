@@ -0,0 +1,136 @@
+import asyncio
+import threading
+from typing import Awaitable, Callable, Iterable
+
+from firebase_admin import firestore_async
+from google.cloud.firestore import FieldPath
+
+from utils.firebase_utils import init_firestore
+from utils.instrumentacao import contar
+
+
+# Camada assíncrona do Firestore: um AsyncClient vive num event loop próprio (thread de
+# fundo) e o código do Streamlit usa apenas os wrappers síncronos abaixo.
+MAX_CONCORRENCIA = 16
+LIMITE_CONSULTA_IN = 30
+LIMITE_LOTE = 500
+
+_loop: asyncio.AbstractEventLoop | None = None
+_cliente = None
+_lock = threading.Lock()
+
+
+def _loop_fundo() -> asyncio.AbstractEventLoop:
+    global _loop
+    with _lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="firestore-async", daemon=True).start()
+        return _loop
+
+
+def executar(corrotina: Awaitable, timeout: float | None = None):
+    """Executa a corrotina no loop de fundo e devolve o resultado (bloqueia quem chama)."""
+    return asyncio.run_coroutine_threadsafe(corrotina, _loop_fundo()).result(timeout)
+
+
+async def _criar_cliente():
+    init_firestore()
+    return firestore_async.client()
+
+
+def cliente_async():
+    """AsyncClient do processo, criado dentro do loop de fundo."""
+    global _cliente
+    if _cliente is None:
+        cliente = executar(_criar_cliente())
+        with _lock:
+            if _cliente is None:
+                _cliente = cliente
+    return _cliente
+
+
+async def reunir_limitado(fabricas: Iterable[Callable[[], Awaitable]], limite: int = MAX_CONCORRENCIA) -> list:
+    """`asyncio.gather` com no máximo `limite` corrotinas em voo; exceções voltam como resultado."""
+    semaforo = asyncio.Semaphore(limite)
+
+    async def _com_limite(fabrica):
+        async with semaforo:
+            return await fabrica()
+
+    return await asyncio.gather(*(_com_limite(f) for f in fabricas), return_exceptions=True)
+
+
+async def _consultar_in(cliente, colecao: str, campo: str, valores: list) -> list:
+    # Caminho entre crases: campos com espaços ("EQUIPE DE PROJETO") são recusados sem elas
+    consulta = cliente.collection(colecao).where(FieldPath(campo).to_api_repr(), "in", valores)
+    return [doc async for doc in consulta.stream()]
+
+
+def consultar_valores(colecao: str, campo: str, valores) -> tuple[list, list]:
+    """Documentos cujo `campo` está em `valores`: consultas `in` em blocos, todas em paralelo.
+
+    Retorna (snapshots, valores dos blocos que falharam).
+    """
+    valores = list(valores)
+    blocos = [valores[i:i + LIMITE_CONSULTA_IN] for i in range(0, len(valores), LIMITE_CONSULTA_IN)]
+    if not blocos:
+        return [], []
+    cliente = cliente_async()
+    resultados = executar(reunir_limitado(
+        lambda bloco=bloco: _consultar_in(cliente, colecao, campo, bloco) for bloco in blocos
+    ))
+    docs: dict[str, object] = {}
+    falhas: list = []
+    for bloco, resultado in zip(blocos, resultados):
+        if isinstance(resultado, BaseException):
+            falhas.extend(bloco)
+            continue
+        for doc in resultado:
+            docs[doc.id] = doc
+    contar(leituras=len(docs))
+    return list(docs.values()), falhas
+
+
+async def _enviar_lote(cliente, colecao: str, operacoes: list[tuple[str, str, dict | None]]) -> None:
+    batch = cliente.batch()
+    for modo, doc_id, campos in operacoes:
+        ref = cliente.collection(colecao).document(doc_id)
+        if modo == "delete":
+            batch.delete(ref)
+        elif modo == "update":
+            batch.update(ref, campos)
+        else:
+            batch.set(ref, campos, merge=modo == "merge")
+    await batch.commit()
+
+
+def gravar_em_lotes(colecao: str, operacoes: Iterable[tuple[str, str, dict | None]]) -> dict[str, list[str]]:
+    """Grava (modo, doc_id, campos) em lotes de `LIMITE_LOTE`, com os commits em paralelo.
+
+    Modos: "update", "set", "merge" e "delete". Retorna {"gravados": [...], "falhas": [...]}.
+    """
+    operacoes = list(operacoes)
+    resultado: dict[str, list[str]] = {"gravados": [], "falhas": []}
+    if not operacoes:
+        return resultado
+    lotes = [operacoes[i:i + LIMITE_LOTE] for i in range(0, len(operacoes), LIMITE_LOTE)]
+    cliente = cliente_async()
+    enviados = executar(reunir_limitado(
+        lambda lote=lote: _enviar_lote(cliente, colecao, lote) for lote in lotes
+    ))
+    for lote, enviado in zip(lotes, enviados):
+        ids = [doc_id for _, doc_id, _ in lote]
+        resultado["falhas" if isinstance(enviado, BaseException) else "gravados"].extend(ids)
+    contar(escritas=len(resultado["gravados"]))
+    return resultado
+
+
+def excluir_em_lotes(colecao: str, ids) -> dict[str, list[str]]:
+    """Apaga os documentos em lotes paralelos; retorna {"removidos": [...], "falhas": [...]}.
+
+    Se um lote falha, todos os seus ids vão para "falhas".
+    """
+    ids = list(dict.fromkeys(str(doc_id) for doc_id in ids))
+    resultado = gravar_em_lotes(colecao, [("delete", doc_id, None) for doc_id in ids])
+    return {"removidos": resultado["gravados"], "falhas": resultado["falhas"]}
@@ -0,0 +1,105 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+
+# Figuras guardadas no processo (compartilhadas entre sessões)
+MAX_FIGURAS = 128
+# Gráficos de categorias (bar/pie/treemap) mostram no máximo estas categorias, as de maior valor
+MAX_CATEGORIAS = 30
+# Séries (line/area/scatter) acima deste número de pontos são amostradas em passo uniforme
+MAX_PONTOS = 2000
+
+_CATEGORICOS = {"bar", "pie", "treemap"}
+
+_figuras: OrderedDict[tuple, object] = OrderedDict()
+_lock = threading.Lock()
+
+
+def _impressao(df: pd.DataFrame) -> tuple:
+    """Impressão digital do conteúdo (colunas, tipos e valores) do frame agregado."""
+    try:
+        valores = int(pd.util.hash_pandas_object(df, index=False).sum())
+    except TypeError:
+        valores = int(pd.util.hash_pandas_object(df.astype(str), index=False).sum())
+    return tuple(df.columns), tuple(str(t) for t in df.dtypes), len(df), valores
+
+
+def _eixos_categoricos(tipo: str, params: dict) -> tuple[str | None, str | None]:
+    """(coluna de categoria, coluna de valor) de um gráfico de categorias."""
+    if tipo == "pie":
+        return params.get("names"), params.get("values")
+    if tipo == "treemap":
+        caminho = params.get("path") or [None]
+        return caminho[0], params.get("values")
+    if params.get("orientation") == "h":
+        return params.get("y"), params.get("x")
+    return params.get("x"), params.get("y")
+
+
+def limitar(tipo: str, df: pd.DataFrame, params: dict, limite: int | None = None) -> pd.DataFrame:
+    """Mantém as `limite` categorias de maior valor ou amostra séries longas."""
+    if tipo in _CATEGORICOS:
+        limite = limite or MAX_CATEGORIAS
+        categoria, valor = _eixos_categoricos(tipo, params)
+        if not isinstance(categoria, str) or categoria not in df.columns or df[categoria].nunique() <= limite:
+            return df
+        # `valor` pode ser uma lista de colunas (barras empilhadas em formato largo)
+        valores = [valor] if isinstance(valor, str) else list(valor or [])
+        numericos = [v for v in valores if v in df.columns and pd.api.types.is_numeric_dtype(df[v])]
+        if numericos:
+            totais = df.groupby(categoria)[numericos].sum().sum(axis=1)
+        else:
+            totais = df[categoria].value_counts()
+        return df[df[categoria].isin(totais.nlargest(limite).index)]
+
+    limite = limite or MAX_PONTOS
+    if len(df) <= limite:
+        return df
+    # Passo uniforme preservando o primeiro e o último ponto
+    posicoes = np.unique(np.linspace(0, len(df) - 1, limite).round().astype(int))
+    return df.iloc[posicoes]
+
+
+def paleta(nome: str, tipo: str = "sequential") -> list[str]:
+    """Sequência de cores do Plotly (ex.: `paleta("Bluered")`), sem importar o Plotly na view."""
+    import plotly.express as px
+
+    return list(getattr(getattr(px.colors, tipo), nome))
+
+
+def figura(
+    tipo: str,
+    df: pd.DataFrame,
+    traces: dict | None = None,
+    layout: dict | None = None,
+    limite: int | None = None,
+    **params,
+):
+    """Figura `px.<tipo>(df, **params)` memorizada pelo conteúdo de `df` e pelos parâmetros.
+
+    `traces` e `layout` são aplicados com `update_traces`/`update_layout` antes de guardar.
+    A figura devolvida é compartilhada: não a modifique depois de obtê-la.
+    """
+    df = limitar(tipo, df, params, limite)
+    chave = (tipo, repr(sorted(params.items())), repr(traces), repr(layout), _impressao(df))
+    with _lock:
+        fig = _figuras.get(chave)
+        if fig is not None:
+            _figuras.move_to_end(chave)
+            return fig
+
+    import plotly.express as px
+
+    fig = getattr(px, tipo)(df, **params)
+    if traces:
+        fig.update_traces(**traces)
+    if layout:
+        fig.update_layout(**layout)
+    with _lock:
+        _figuras[chave] = fig
+        while len(_figuras) > MAX_FIGURAS:
+            _figuras.popitem(last=False)
+    return fig
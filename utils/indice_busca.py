@@ -0,0 +1,132 @@
+import unicodedata
+from array import array
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+
+SEPARADOR_CAMPOS = "\x1f"
+TAMANHO_NGRAMA = 3
+
+# Montar o índice de trigramas custa ~150 varreduras e só se paga depois de ~350 buscas
+# distintas na mesma versão (scripts/bench_indice_busca.py); cada escrita carimba uma
+# nova versão. Monta só em frames grandes, depois de gastar em varreduras o que a
+# montagem custaria.
+MIN_LINHAS_INDICE = 20_000
+CONSULTAS_PARA_INDICE = 150
+
+
+def normalizar_busca(valor) -> str:
+    """Remove acentos e converte para minúsculas (mesma regra de `normalize_string`)."""
+    if valor is None:
+        return ""
+    try:
+        if pd.isna(valor):
+            return ""
+    except (TypeError, ValueError):
+        pass
+    return unicodedata.normalize("NFKD", str(valor)).encode("ASCII", "ignore").decode("utf-8").lower()
+
+
+def _coluna_normalizada(df: pd.DataFrame, coluna: str) -> np.ndarray:
+    if coluna not in df.columns:
+        return np.full(len(df), "", dtype=object)
+    serie = df[coluna]
+    try:
+        codigos, unicos = pd.factorize(serie)
+    except TypeError:
+        return np.array([normalizar_busca(v) for v in serie], dtype=object)
+    # Normaliza cada valor distinto uma única vez; código -1 (nulo) aponta para "".
+    normalizados = np.array([normalizar_busca(v) for v in unicos] + [""], dtype=object)
+    return normalizados[codigos]
+
+
+class IndiceBusca:
+    """Índice de busca textual pré-normalizado sobre colunas de um DataFrame.
+
+    Mantém um "palheiro" por linha (campos normalizados concatenados) e busca nele com
+    `str.contains`. Em frames com `MIN_LINHAS_INDICE`+ linhas, depois de
+    `CONSULTAS_PARA_INDICE` buscas, monta um índice invertido de trigramas para os
+    termos com 3+ caracteres.
+    """
+
+    def __init__(self, df: pd.DataFrame, colunas: Iterable[str]):
+        self.colunas = tuple(colunas)
+        self.tamanho = len(df)
+        partes = [pd.Series(_coluna_normalizada(df, c), dtype=object) for c in self.colunas]
+        if not partes:
+            partes = [pd.Series([""] * self.tamanho, dtype=object)]
+        palheiro = partes[0].str.cat(partes[1:], sep=SEPARADOR_CAMPOS) if len(partes) > 1 else partes[0]
+        self._serie = palheiro.reset_index(drop=True)
+        self.palheiro = self._serie.to_numpy(dtype=object)
+        self._ngramas: dict[str, np.ndarray] | None = None
+        self._consultas = 0
+
+    def _indice_ngramas(self) -> dict[str, np.ndarray]:
+        if self._ngramas is not None:
+            return self._ngramas
+        ids: dict[str, int] = {}
+        linhas = array("i")
+        ngramas = array("i")
+        n = TAMANHO_NGRAMA
+        for pos, texto in enumerate(self.palheiro):
+            for ng in {texto[i:i + n] for i in range(len(texto) - n + 1)}:
+                if SEPARADOR_CAMPOS in ng:
+                    continue
+                linhas.append(pos)
+                ngramas.append(ids.setdefault(ng, len(ids)))
+        arr_linhas = np.frombuffer(linhas, dtype=np.int32) if linhas else np.empty(0, dtype=np.int32)
+        arr_ngramas = np.frombuffer(ngramas, dtype=np.int32) if ngramas else np.empty(0, dtype=np.int32)
+        ordem = np.argsort(arr_ngramas, kind="stable")
+        cortes = np.searchsorted(arr_ngramas[ordem], np.arange(len(ids) + 1))
+        linhas_ordenadas = arr_linhas[ordem]
+        self._ngramas = {
+            ng: linhas_ordenadas[cortes[i]:cortes[i + 1]] for ng, i in ids.items()
+        }
+        return self._ngramas
+
+    def _contem_vetorizado(self, termo: str) -> np.ndarray:
+        return self._serie.str.contains(termo, regex=False).to_numpy(dtype=bool)
+
+    def _usar_ngramas(self) -> bool:
+        if self._ngramas is not None:
+            return True
+        if self.tamanho < MIN_LINHAS_INDICE:
+            return False
+        self._consultas += 1
+        return self._consultas > CONSULTAS_PARA_INDICE
+
+    def mascara(self, termo: str) -> np.ndarray:
+        """Máscara booleana (posicional) das linhas cujo algum campo contém `termo`."""
+        nq = normalizar_busca(termo)
+        if not nq or not self.tamanho:
+            return np.ones(self.tamanho, dtype=bool)
+        if len(nq) < TAMANHO_NGRAMA or not self._usar_ngramas():
+            return self._contem_vetorizado(nq)
+        return self._mascara_ngramas(nq)
+
+    def _mascara_ngramas(self, nq: str) -> np.ndarray:
+        indice = self._indice_ngramas()
+        listas = []
+        for i in range(len(nq) - TAMANHO_NGRAMA + 1):
+            postagens = indice.get(nq[i:i + TAMANHO_NGRAMA])
+            if postagens is None:
+                return np.zeros(self.tamanho, dtype=bool)
+            listas.append(postagens)
+        listas.sort(key=len)
+        candidatos = listas[0]
+        for postagens in listas[1:]:
+            candidatos = np.intersect1d(candidatos, postagens, assume_unique=True)
+            if not len(candidatos):
+                return np.zeros(self.tamanho, dtype=bool)
+
+        # Muitos candidatos: a varredura vetorizada é mais barata que a conferência linha a linha.
+        if len(candidatos) > self.tamanho // 4:
+            return self._contem_vetorizado(nq)
+        mascara = np.zeros(self.tamanho, dtype=bool)
+        palheiro = self.palheiro
+        for pos in candidatos:
+            if nq in palheiro[pos]:
+                mascara[pos] = True
+        return mascara
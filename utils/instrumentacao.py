@@ -0,0 +1,209 @@
+import functools
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Callable
+
+import pandas as pd
+
+
+# Execuções (reruns) guardadas por sessão para o painel de desempenho
+MAX_EXECUCOES = 20
+
+
+@dataclass
+class Chamada:
+    nome: str
+    duracao: float = 0.0
+    leituras: int = 0
+    escritas: int = 0
+    linhas: int = 0
+    erro: bool = False
+
+
+@dataclass
+class Execucao:
+    """Uma execução do script (rerun) de uma página, com as chamadas medidas dentro dela."""
+
+    pagina: str
+    inicio: float = field(default_factory=time.time)
+    duracao: float = 0.0
+    chamadas: list[Chamada] = field(default_factory=list)
+
+
+@dataclass
+class Agregado:
+    chamadas: int = 0
+    tempo_total: float = 0.0
+    tempo_max: float = 0.0
+    leituras: int = 0
+    escritas: int = 0
+    linhas: int = 0
+    erros: int = 0
+
+    def somar(self, chamada: Chamada) -> None:
+        self.chamadas += 1
+        self.tempo_total += chamada.duracao
+        self.tempo_max = max(self.tempo_max, chamada.duracao)
+        self.leituras += chamada.leituras
+        self.escritas += chamada.escritas
+        self.linhas += chamada.linhas
+        self.erros += int(chamada.erro)
+
+
+def _somar_em(agregados: dict[str, Agregado], chamada: Chamada) -> None:
+    agregados.setdefault(chamada.nome, Agregado()).somar(chamada)
+
+
+def tabela_agregados(agregados: dict[str, Agregado]) -> pd.DataFrame:
+    """Agregados por chamada em formato de tabela, das mais custosas para as mais baratas."""
+    linhas = [
+        {
+            "Chamada": nome,
+            "Chamadas": a.chamadas,
+            "Tempo total (s)": round(a.tempo_total, 3),
+            "Tempo médio (s)": round(a.tempo_total / a.chamadas, 3) if a.chamadas else 0.0,
+            "Tempo máx. (s)": round(a.tempo_max, 3),
+            "Leituras": a.leituras,
+            "Escritas": a.escritas,
+            "Linhas": a.linhas,
+            "Erros": a.erros,
+        }
+        for nome, a in agregados.items()
+    ]
+    if not linhas:
+        return pd.DataFrame()
+    return pd.DataFrame(linhas).sort_values("Tempo total (s)", ascending=False, ignore_index=True)
+
+
+class HistoricoSessao:
+    """Últimas execuções e agregados por chamada de uma sessão (guardado no `session_state`)."""
+
+    def __init__(self, max_execucoes: int = MAX_EXECUCOES):
+        self.execucoes: deque[Execucao] = deque(maxlen=max_execucoes)
+        self.agregados: dict[str, Agregado] = {}
+
+    def registrar(self, execucao: Execucao) -> None:
+        self.execucoes.append(execucao)
+        for chamada in execucao.chamadas:
+            _somar_em(self.agregados, chamada)
+
+    def mais_lentas(self, limite: int = 10) -> pd.DataFrame:
+        """Chamadas mais lentas das execuções guardadas."""
+        linhas = [
+            {
+                "Página": execucao.pagina,
+                "Chamada": chamada.nome,
+                "Tempo (s)": round(chamada.duracao, 3),
+                "Leituras": chamada.leituras,
+                "Escritas": chamada.escritas,
+                "Linhas": chamada.linhas,
+                "Erro": "⚠️" if chamada.erro else "",
+            }
+            for execucao in self.execucoes
+            for chamada in execucao.chamadas
+        ]
+        if not linhas:
+            return pd.DataFrame()
+        return pd.DataFrame(linhas).nlargest(limite, "Tempo (s)").reset_index(drop=True)
+
+
+# Agregados do processo (todas as sessões e threads de fundo)
+_processo: dict[str, Agregado] = {}
+_processo_lock = threading.Lock()
+
+_execucao: ContextVar[Execucao | None] = ContextVar("execucao", default=None)
+_pilha: ContextVar[tuple["medir", ...]] = ContextVar("pilha_medicoes", default=())
+
+
+def agregados_processo() -> dict[str, Agregado]:
+    with _processo_lock:
+        return {nome: Agregado(**vars(a)) for nome, a in _processo.items()}
+
+
+def contar(leituras: int = 0, escritas: int = 0) -> None:
+    """Soma leituras/escritas do Firestore à medição ativa (e às que a envolvem)."""
+    for medicao in _pilha.get():
+        medicao.chamada.leituras += leituras
+        medicao.chamada.escritas += escritas
+
+
+def _linhas(resultado) -> int:
+    if isinstance(resultado, tuple) and resultado:
+        resultado = resultado[0]
+    if isinstance(resultado, (pd.DataFrame, list, dict, set)):
+        return len(resultado)
+    return 0
+
+
+class medir:
+    """Mede tempo, leituras, escritas e linhas de um trecho; serve como decorator ou `with`.
+
+    Com `leituras_por_linha`, cada linha devolvida conta como uma leitura de documento
+    (listagens por `stream`), salvo se o trecho já tiver contado leituras com `contar`.
+    `escritas` fixa quantas escritas a chamada faz quando não são contadas por dentro.
+    """
+
+    def __init__(self, nome: str | None = None, leituras_por_linha: bool = False, escritas: int = 0):
+        self.nome = nome
+        self.leituras_por_linha = leituras_por_linha
+        self.escritas = escritas
+        self.chamada: Chamada | None = None
+
+    def __call__(self, funcao: Callable) -> Callable:
+        nome = self.nome or f"{funcao.__module__.rsplit('.', 1)[-1]}.{funcao.__name__}"
+
+        @functools.wraps(funcao)
+        def medida(*args, **kwargs):
+            with medir(nome, self.leituras_por_linha, self.escritas) as medicao:
+                resultado = funcao(*args, **kwargs)
+                medicao.resultado(resultado)
+                return resultado
+
+        return medida
+
+    def __enter__(self) -> "medir":
+        self.chamada = Chamada(self.nome or "trecho")
+        self._inicio = time.perf_counter()
+        self._token = _pilha.set(_pilha.get() + (self,))
+        return self
+
+    def resultado(self, resultado) -> None:
+        self.chamada.linhas = _linhas(resultado)
+
+    def __exit__(self, tipo, erro, rastro) -> None:
+        _pilha.reset(self._token)
+        chamada = self.chamada
+        chamada.duracao = time.perf_counter() - self._inicio
+        chamada.erro = tipo is not None and issubclass(tipo, Exception)
+        if self.leituras_por_linha and not chamada.leituras:
+            chamada.leituras = chamada.linhas
+            for externa in _pilha.get():
+                externa.chamada.leituras += chamada.linhas
+        if self.escritas and not chamada.escritas and not chamada.erro:
+            chamada.escritas = self.escritas
+            for externa in _pilha.get():
+                externa.chamada.escritas += self.escritas
+        with _processo_lock:
+            _somar_em(_processo, chamada)
+        execucao = _execucao.get()
+        if execucao is not None:
+            execucao.chamadas.append(chamada)
+
+
+class medir_execucao:
+    """Marca uma execução do script da `pagina`: as chamadas medidas nela ficam associadas a ela."""
+
+    def __init__(self, pagina: str):
+        self.execucao = Execucao(pagina)
+
+    def __enter__(self) -> Execucao:
+        self._inicio = time.perf_counter()
+        self._token = _execucao.set(self.execucao)
+        return self.execucao
+
+    def __exit__(self, tipo, erro, rastro) -> None:
+        _execucao.reset(self._token)
+        self.execucao.duracao = time.perf_counter() - self._inicio
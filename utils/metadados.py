@@ -0,0 +1,63 @@
+import threading
+from datetime import datetime
+
+
+# Documentos de controle (marcadores de migração, versões de esquema)
+COLLECTION_METADADOS = "metadados_gp"
+
+_CONCLUIDOS: set[str] = set()
+_LOCK = threading.Lock()
+
+
+def ler_metadado(db, nome: str) -> dict | None:
+    doc = db.collection(COLLECTION_METADADOS).document(nome).get()
+    return (doc.to_dict() or {}) if doc.exists else None
+
+
+def gravar_metadado(db, nome: str, dados: dict) -> None:
+    dados = {**dados, "DATA ATUALIZACAO": datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
+    db.collection(COLLECTION_METADADOS).document(nome).set(dados, merge=True)
+
+
+def marcar_concluido(db, nome: str) -> None:
+    """Registra que a migração `nome` terminou."""
+    gravar_metadado(db, nome, {"CONCLUIDO": True})
+    with _LOCK:
+        _CONCLUIDOS.add(nome)
+
+
+def migracao_concluida(db, nome: str) -> bool:
+    """Consulta o marcador de `nome`; uma vez concluído, não é relido no processo."""
+    with _LOCK:
+        if nome in _CONCLUIDOS:
+            return True
+    dados = ler_metadado(db, nome) or {}
+    if not dados.get("CONCLUIDO"):
+        return False
+    with _LOCK:
+        _CONCLUIDOS.add(nome)
+    return True
+
+
+def esquema_atualizado(db, nome: str, versao: int) -> bool:
+    """Indica se o esquema `nome` já está na `versao` (ou acima); o resultado positivo fica memorizado."""
+    chave = f"{nome}@{versao}"
+    with _LOCK:
+        if chave in _CONCLUIDOS:
+            return True
+    dados = ler_metadado(db, nome) or {}
+    try:
+        atual = int(dados.get("VERSAO_ESQUEMA") or 0)
+    except (TypeError, ValueError):
+        atual = 0
+    if atual < versao:
+        return False
+    with _LOCK:
+        _CONCLUIDOS.add(chave)
+    return True
+
+
+def registrar_versao_esquema(db, nome: str, versao: int) -> None:
+    gravar_metadado(db, nome, {"VERSAO_ESQUEMA": versao})
+    with _LOCK:
+        _CONCLUIDOS.add(f"{nome}@{versao}")
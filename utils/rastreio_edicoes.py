@@ -0,0 +1,81 @@
+from numbers import Real
+from typing import Iterable, Iterator
+
+import pandas as pd
+import streamlit as st
+
+
+def _vazio(valor) -> bool:
+    if valor is None:
+        return True
+    try:
+        if pd.isna(valor):
+            return True
+    except (TypeError, ValueError):
+        return False
+    return isinstance(valor, str) and not valor.strip()
+
+
+def valores_equivalentes(antes, depois) -> bool:
+    """Compara valores do editor: nulos e vazios se equivalem; números por valor; demais por texto."""
+    if _vazio(antes) and _vazio(depois):
+        return True
+    if isinstance(antes, Real) and isinstance(depois, Real) \
+            and not isinstance(antes, bool) and not isinstance(depois, bool):
+        return float(antes) == float(depois)
+    return str(antes) == str(depois)
+
+
+def _chave_linha(df: pd.DataFrame, posicao: int, coluna_chave: str | None):
+    if coluna_chave is None:
+        return df.index[posicao]
+    return df.iloc[posicao][coluna_chave]
+
+
+def iterar_alteracoes(
+    editor_key: str,
+    df_original: pd.DataFrame,
+    coluna_chave: str | None = None,
+    campos: Iterable[str] | None = None,
+) -> Iterator[tuple[object, str, object]]:
+    """Percorre o delta `edited_rows` do `st.data_editor` e gera triplas (chave, campo, valor).
+
+    `df_original` é o DataFrame entregue ao editor; a chave de cada linha vem de
+    `coluna_chave` (ou do índice, quando None). Edições que voltam ao valor original
+    e campos fora de `campos` são ignorados.
+    """
+    estado = st.session_state.get(editor_key)
+    if not isinstance(estado, dict):
+        return
+    permitidos = set(campos) if campos is not None else None
+    for posicao, valores in (estado.get("edited_rows") or {}).items():
+        posicao = int(posicao)
+        if posicao >= len(df_original):
+            continue
+        chave = _chave_linha(df_original, posicao, coluna_chave)
+        for campo, valor in valores.items():
+            if permitidos is not None and campo not in permitidos:
+                continue
+            if campo not in df_original.columns:
+                continue
+            if valores_equivalentes(df_original.iloc[posicao][campo], valor):
+                continue
+            yield chave, campo, valor
+
+
+def agrupar_alteracoes(triplas: Iterable[tuple[object, str, object]]) -> dict[object, dict[str, object]]:
+    """Agrupa triplas em {chave: {campo: valor}} (a última edição de cada campo prevalece)."""
+    agrupado: dict[object, dict[str, object]] = {}
+    for chave, campo, valor in triplas:
+        agrupado.setdefault(chave, {})[campo] = valor
+    return agrupado
+
+
+def alteracoes_editor(
+    editor_key: str,
+    df_original: pd.DataFrame,
+    coluna_chave: str | None = None,
+    campos: Iterable[str] | None = None,
+) -> dict[object, dict[str, object]]:
+    """Atalho: alterações efetivas do editor agrupadas por chave de linha."""
+    return agrupar_alteracoes(iterar_alteracoes(editor_key, df_original, coluna_chave, campos))
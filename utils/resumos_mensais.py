@@ -0,0 +1,168 @@
+import threading
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+from utils.versao_dados import obter_versao
+
+
+# Código de período das linhas sem data válida (ficam fora das séries, mas entram nos totais)
+SEM_PERIODO = -1
+
+# Tabela sem dimensão: conta todos os registros, inclusive os de dimensão vazia
+TABELA_TOTAL = "total"
+
+
+def codigo_periodo(ano: int, mes: int) -> int:
+    return int(ano) * 12 + int(mes) - 1
+
+
+def _periodos(datas: pd.Series | None, tamanho: int) -> np.ndarray:
+    if datas is None:
+        return np.full(tamanho, SEM_PERIODO, dtype=np.int64)
+    datas = pd.to_datetime(datas, errors="coerce")
+    codigos = (datas.dt.year * 12 + datas.dt.month - 1).fillna(SEM_PERIODO)
+    return codigos.to_numpy(dtype=np.int64)
+
+
+def _rotulo(codigo: int) -> str:
+    return f"{codigo // 12:04d}-{codigo % 12 + 1:02d}"
+
+
+def _sem_zeros(serie: pd.Series) -> pd.Series:
+    return serie[serie != 0].sort_values(ascending=False)
+
+
+class ResumoMensal:
+    """Agregados mensais (período x dimensão) de um dataset, montados uma vez por versão.
+
+    Cada tabela guarda, por medida, a matriz mensal e a sua soma acumulada; os filtros de
+    mês/ano só localizam uma linha (busca binária nos períodos), sem reagrupar o DataFrame.
+    """
+
+    def __init__(self):
+        self._mensal: dict[tuple[str, str], pd.DataFrame] = {}
+        self._acumulado: dict[tuple[str, str], pd.DataFrame] = {}
+        self._sem_periodo: dict[tuple[str, str], pd.Series] = {}
+
+    def adicionar(self, nome: str, periodos: np.ndarray, dimensao: pd.Series, medidas: dict[str, object]) -> None:
+        """Agrupa (período, dimensão) somando cada medida; dimensões vazias são descartadas."""
+        base = pd.DataFrame({"PERIODO": periodos, "DIMENSAO": dimensao.to_numpy()})
+        for medida, valores in medidas.items():
+            base[medida] = pd.to_numeric(pd.Series(np.asarray(valores)), errors="coerce").fillna(0).to_numpy()
+        base["DIMENSAO"] = base["DIMENSAO"].fillna("").astype(str).str.strip()
+        base = base[base["DIMENSAO"] != ""]
+        agrupado = base.groupby(["PERIODO", "DIMENSAO"], sort=True)[list(medidas)].sum()
+        for medida in medidas:
+            tabela = agrupado[medida].unstack("DIMENSAO", fill_value=0) if not agrupado.empty else pd.DataFrame()
+            sem_data = tabela.loc[SEM_PERIODO] if SEM_PERIODO in tabela.index else pd.Series(dtype=float)
+            mensal = tabela.drop(index=SEM_PERIODO, errors="ignore")
+            self._mensal[(nome, medida)] = mensal
+            self._acumulado[(nome, medida)] = mensal.cumsum()
+            self._sem_periodo[(nome, medida)] = sem_data
+
+    def adicionar_total(self, periodos: np.ndarray, medidas: dict[str, object]) -> None:
+        """Tabela `TABELA_TOTAL`, com uma única dimensão: base das séries e dos totais do mês."""
+        self.adicionar(TABELA_TOTAL, periodos, pd.Series(["TOTAL"] * len(periodos), dtype=object), medidas)
+
+    def _tabelas(self, nome: str, medida: str) -> tuple[pd.DataFrame, pd.DataFrame]:
+        chave = (nome, medida)
+        if chave not in self._mensal:
+            raise KeyError(f"Resumo sem a tabela {nome}/{medida}")
+        return self._mensal[chave], self._acumulado[chave]
+
+    def periodos(self) -> list[tuple[int, int]]:
+        """(ano, mês) de todos os períodos com algum registro."""
+        codigos = sorted({int(c) for tabela in self._mensal.values() for c in tabela.index})
+        return [(c // 12, c % 12 + 1) for c in codigos]
+
+    def no_mes(self, nome: str, ano: int, mes: int, medida: str) -> pd.Series:
+        """Valores por dimensão no mês (série vazia se o mês não tem registros)."""
+        mensal, _ = self._tabelas(nome, medida)
+        codigo = codigo_periodo(ano, mes)
+        if codigo not in mensal.index:
+            return pd.Series(dtype=float)
+        return _sem_zeros(mensal.loc[codigo])
+
+    def ate_mes(self, nome: str, ano: int, mes: int, medida: str) -> pd.Series:
+        """Valores por dimensão acumulados até o fim do mês (registros sem data ficam de fora)."""
+        mensal, acumulado = self._tabelas(nome, medida)
+        posicao = int(mensal.index.searchsorted(codigo_periodo(ano, mes), side="right")) - 1
+        if posicao < 0:
+            return pd.Series(dtype=float)
+        return _sem_zeros(acumulado.iloc[posicao])
+
+    def total(self, nome: str, medida: str) -> pd.Series:
+        """Valores por dimensão de todo o dataset, incluindo os registros sem data."""
+        _, acumulado = self._tabelas(nome, medida)
+        sem_data = self._sem_periodo[(nome, medida)]
+        if acumulado.empty:
+            return _sem_zeros(sem_data)
+        return _sem_zeros(acumulado.iloc[-1].add(sem_data, fill_value=0))
+
+    def serie(self, nome: str, medida: str) -> pd.Series:
+        """Total mensal ("AAAA-MM" -> valor) dos registros com data."""
+        mensal, _ = self._tabelas(nome, medida)
+        serie = mensal.sum(axis=1)
+        serie.index = [_rotulo(int(c)) for c in serie.index]
+        return serie
+
+
+def resumir_membros(df: pd.DataFrame) -> ResumoMensal:
+    """Membros por mês de DATA CADASTRO: tabelas "total", "status", "equipe" e "curso" (medida "MEMBROS")."""
+    resumo = ResumoMensal()
+    vazio = pd.Series([""] * len(df), index=df.index, dtype=object)
+    periodos = _periodos(df.get("DATA CADASTRO"), len(df))
+    uns = np.ones(len(df))
+    resumo.adicionar_total(periodos, {"MEMBROS": uns})
+    resumo.adicionar("status", periodos, df.get("STATUS", vazio), {"MEMBROS": uns})
+    resumo.adicionar("curso", periodos, df.get("CURSO", vazio), {"MEMBROS": uns})
+
+    # EQUIPE DE PROJETO é multivalorada ("A;B"): o membro conta em cada equipe
+    equipes = df.get("EQUIPE DE PROJETO", vazio).fillna("").astype(str).str.split(";")
+    posicoes = np.repeat(np.arange(len(df)), equipes.str.len().fillna(0).astype(int).to_numpy())
+    explodidas = equipes.explode()
+    resumo.adicionar("equipe", periodos[posicoes], explodidas, {"MEMBROS": np.ones(len(explodidas))})
+    return resumo
+
+
+def resumir_patrimonio(df: pd.DataFrame) -> ResumoMensal:
+    """Patrimônio por mês de DATA_ATUALIZACAO: tabelas "total", "categoria" e "estado" (medidas "ITENS" e "VALOR")."""
+    resumo = ResumoMensal()
+    vazio = pd.Series([""] * len(df), index=df.index, dtype=object)
+    periodos = _periodos(df.get("DATA_ATUALIZACAO"), len(df))
+    medidas = {
+        "ITENS": df.get("QUANTIDADE", pd.Series(0, index=df.index)),
+        "VALOR": df.get("VALOR_TOTAL", pd.Series(0, index=df.index)),
+    }
+    resumo.adicionar_total(periodos, medidas)
+    resumo.adicionar("categoria", periodos, df.get("CATEGORIA", vazio), medidas)
+    resumo.adicionar("estado", periodos, df.get("ESTADO", vazio), medidas)
+    return resumo
+
+
+_memo: dict[str, tuple[str, ResumoMensal]] = {}
+_lock = threading.Lock()
+
+
+def _memorizado(nome: str, df: pd.DataFrame, montar: Callable[[pd.DataFrame], ResumoMensal]) -> ResumoMensal:
+    versao = obter_versao(df)
+    with _lock:
+        atual = _memo.get(nome)
+        if atual is not None and atual[0] == versao:
+            return atual[1]
+    resumo = montar(df)
+    with _lock:
+        _memo[nome] = (versao, resumo)
+    return resumo
+
+
+def resumo_membros(df: pd.DataFrame) -> ResumoMensal:
+    """Resumo mensal de membros, recalculado só quando a versão do dataset muda."""
+    return _memorizado("membros", df, resumir_membros)
+
+
+def resumo_patrimonio(df: pd.DataFrame) -> ResumoMensal:
+    """Resumo mensal de patrimônio, recalculado só quando a versão do dataset muda."""
+    return _memorizado("patrimonio", df, resumir_patrimonio)
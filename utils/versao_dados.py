@@ -0,0 +1,25 @@
+from uuid import uuid4
+
+import pandas as pd
+
+
+ATRIBUTO_VERSAO = "versao_dados"
+
+
+def carimbar_versao(df: pd.DataFrame, versao: str | None = None) -> pd.DataFrame:
+    """Marca o DataFrame com uma versão de dataset (preservada em cópias e no cache)."""
+    df.attrs[ATRIBUTO_VERSAO] = versao or uuid4().hex
+    return df
+
+
+def obter_versao(df: pd.DataFrame) -> str:
+    """Retorna a versão carimbada; sem carimbo, usa um hash do conteúdo."""
+    versao = df.attrs.get(ATRIBUTO_VERSAO)
+    if versao:
+        return str(versao)
+    if df.empty:
+        return "vazio"
+    try:
+        return f"hash-{int(pd.util.hash_pandas_object(df, index=True).sum())}"
+    except TypeError:
+        return f"hash-{int(pd.util.hash_pandas_object(df.astype(str), index=True).sum())}"
@@ -0,0 +1,42 @@
+import pandas as pd
+import streamlit as st
+
+from utils.instrumentacao import HistoricoSessao, agregados_processo, tabela_agregados
+
+
+def _tabela_execucoes(historico: HistoricoSessao) -> pd.DataFrame:
+    linhas = [
+        {
+            "Página": execucao.pagina,
+            "Tempo (s)": round(execucao.duracao, 3),
+            "Chamadas": len(execucao.chamadas),
+            "Leituras": sum(c.leituras for c in execucao.chamadas),
+            "Escritas": sum(c.escritas for c in execucao.chamadas),
+        }
+        for execucao in reversed(historico.execucoes)
+    ]
+    return pd.DataFrame(linhas)
+
+
+def _mostrar(df: pd.DataFrame, vazio: str) -> None:
+    if df.empty:
+        st.caption(vazio)
+    else:
+        st.dataframe(df, use_container_width=True, hide_index=True)
+
+
+def painel_desempenho(historico: HistoricoSessao) -> None:
+    """Painel (só administradores) com o tempo das últimas execuções e as chamadas mais lentas."""
+    with st.expander("⏱️ Desempenho", expanded=True):
+        st.markdown(f"**Últimas {len(historico.execucoes)} execuções desta sessão**")
+        _mostrar(_tabela_execucoes(historico), "Nenhuma execução medida ainda.")
+
+        st.markdown("**Chamadas mais lentas**")
+        _mostrar(historico.mais_lentas(), "Nenhuma chamada medida ainda.")
+
+        aba_sessao, aba_processo = st.tabs(["Sessão", "Processo"])
+        with aba_sessao:
+            _mostrar(tabela_agregados(historico.agregados), "Sem chamadas nesta sessão.")
+        with aba_processo:
+            st.caption("Todas as sessões e atualizações em segundo plano desde o início do servidor.")
+            _mostrar(tabela_agregados(agregados_processo()), "Sem chamadas no processo.")
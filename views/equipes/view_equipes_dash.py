@@ -1,15 +1,22 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
 from datetime import date
 
+from controllers.dataset_controller import obter_equipes
 from controllers.equipes_controller import (
-    listar_equipes_firestore,
+    COLUNAS_EQUIPES,
+    enfileirar_atualizacao_equipe,
+    fila_equipes,
     salvar_equipe_firestore,
     listar_equipes_cadastradas,
 )
 from controllers.membros_controller import listar_membros_firestore
 from views.projetos.view_projetos_dash import _add_extra  # reutiliza registrador de opções globais
+from utils.cache_frames import invalidar_frames
+from utils.fila_escrita import acompanhar_edicoes, coletar_confirmacoes
+from utils.filtros import MotorFiltros, filtro_lista, filtro_valores, obter_motor
+from utils.graficos import figura
+from utils.rastreio_edicoes import alteracoes_editor
 
 ORIENTADORES_FIXOS = [
     "ANDERSON SEIXAS",
@@ -22,6 +29,11 @@ ORIENTADORES_FIXOS = [
     "CLEDENILSON SOUZA",
 ]
 
+# Coluna do editor -> campo do documento da equipe
+CAMPOS_EDITAVEIS_EQUIPES = {"Orientadores": "ORIENTADOR", "Status": "STATUS"}
+
+CHAVE_FILA_EQUIPES = "fila_equipes_pendentes"
+
 
 def _inject_dialog_css():
     st.markdown(
@@ -47,19 +59,14 @@ def _inject_dialog_css():
     )
 
 
-@st.cache_data(show_spinner=False, ttl=60)
 def carregar_equipes_df() -> pd.DataFrame:
     try:
-        df = listar_equipes_firestore()
-        if not isinstance(df, pd.DataFrame) or df.empty:
-            return pd.DataFrame(columns=[
-                "EQUIPE", "Membros Ativos", "Membros Inativos", "Total", "Status", "Orientadores"
-            ])
+        df = obter_equipes()
+        if df.empty:
+            return pd.DataFrame(columns=COLUNAS_EQUIPES)
         return df
     except Exception:
-        return pd.DataFrame(columns=[
-            "EQUIPE", "Membros Ativos", "Membros Inativos", "Total", "Status", "Orientadores"
-        ])
+        return pd.DataFrame(columns=COLUNAS_EQUIPES)
 
 
 def _indicadores(df: pd.DataFrame) -> None:
@@ -128,7 +135,6 @@ def _dialog_cadastro_equipe():
                         _add_extra("ORIENTADOR", ori)
                     st.session_state["toast_equipes"] = {"text": "Equipe cadastrada!", "icon": "✅"}
                     st.success("✅ Equipe salva com sucesso no Firebase!")
-                    st.cache_data.clear()
                     st.rerun()
                 except Exception as e:
                     st.error(f"Falha ao salvar equipe: {e}")
@@ -136,7 +142,7 @@ def _dialog_cadastro_equipe():
     modal()
 
 
-def _aplicar_filtros(df: pd.DataFrame) -> pd.DataFrame:
+def _aplicar_filtros(df: pd.DataFrame, motor: MotorFiltros | None = None) -> pd.DataFrame:
     if df.empty:
         return df
     sb = st.sidebar
@@ -164,14 +170,14 @@ def _aplicar_filtros(df: pd.DataFrame) -> pd.DataFrame:
                 | df2.get("Orientadores", pd.Series(dtype=str)).astype(str).str.contains(q, case=False, na=False)
             )
             df2 = df2[mask]
-    if status != "Todos" and "Status" in df2.columns:
-        df2 = df2[df2["Status"] == status]
-    if ori_sel:
-        def has_any(row):
-            atual = set(n.strip() for n in str(row.get("Orientadores", "")).split(",") if n.strip())
-            return any(o in atual for o in ori_sel)
-        df2 = df2[df2.apply(has_any, axis=1)]
-    return df2
+    motor = motor or obter_motor(df)
+    return motor.filtrar(
+        [
+            filtro_valores("Status", [status] if status != "Todos" else []),
+            filtro_lista("Orientadores", ori_sel, separador=","),
+        ],
+        df2,
+    )
 
 
 def _graficos(df: pd.DataFrame) -> None:
@@ -180,11 +186,12 @@ def _graficos(df: pd.DataFrame) -> None:
     with st.expander("📈 Ver gráficos"):
         c1, c2 = st.columns(2)
         if "Status" in df.columns:
-            fig1 = px.pie(df, names="Status", title="Status das Equipes", hole=0.35)
+            por_status = df["Status"].value_counts().rename_axis("Status").reset_index(name="Equipes")
+            fig1 = figura("pie", por_status, names="Status", values="Equipes", title="Status das Equipes", hole=0.35)
             c1.plotly_chart(fig1, use_container_width=True)
         if "Membros Ativos" in df.columns:
             top = df.sort_values(by=["Membros Ativos", "Total"], ascending=[False, False]).head(10)
-            fig2 = px.bar(top, x="EQUIPE", y="Membros Ativos", title="Top 10 — Membros Ativos por Equipe")
+            fig2 = figura("bar", top, x="EQUIPE", y="Membros Ativos", title="Top 10 — Membros Ativos por Equipe")
             c2.plotly_chart(fig2, use_container_width=True)
 
 
@@ -203,10 +210,18 @@ def gestao_equipes():
         _dialog_cadastro_equipe()
     if a2.button("🔄 Recarregar dados"):
         try:
+            invalidar_frames()
             st.cache_data.clear()
         finally:
             st.rerun()
 
+    # Confirmações de gravações em segundo plano
+    confirmadas, falhas = coletar_confirmacoes(CHAVE_FILA_EQUIPES, fila_equipes())
+    for erro in falhas:
+        st.warning(f"Falha ao gravar alteração de equipe: {erro}")
+    if confirmadas:
+        st.toast(f"{confirmadas} alteração(ões) de equipe gravada(s)", icon="✅")
+
     # Dados
     df = carregar_equipes_df()
     if not df.empty and "EQUIPE" in df.columns:
@@ -224,6 +239,8 @@ def gestao_equipes():
         st.info("Nenhuma equipe encontrada. Cadastre uma nova equipe para começar.")
     else:
         _indicadores(df)
+        # Motor montado sobre o dataset completo; a busca abaixo apenas restringe as linhas
+        motor = obter_motor(df)
 
         # Busca principal (vetorizada)
         busca_top = st.text_input("Buscar por nome de equipe ou orientador", key="busca_top_equipes")
@@ -237,7 +254,7 @@ def gestao_equipes():
                 df = df[mask]
 
         # Filtros (sidebar)
-        df_filtrado = _aplicar_filtros(df)
+        df_filtrado = _aplicar_filtros(df, motor)
 
         # Abas por status
         abas = st.tabs(["Todas", "Ativas", "Inativas"])
@@ -300,51 +317,37 @@ def gestao_equipes():
                     st.rerun()
                 b_info.caption(f"Página {page_num}/{total_pages} • Mostrando {start+1}–{end} de {total_rows}")
 
-                # Autosave: detecta e salva alterações imediatamente
+                # Autosave: grava apenas os campos alterados no editor
                 try:
-                    campos_editaveis = [c for c in ["Orientadores", "Status"] if c in retorno.columns]
-                    if campos_editaveis and not retorno.empty:
-                        orig_idx = df_page.set_index("EQUIPE")
-                        ret_idx = retorno.set_index("EQUIPE")
-
-                        # Normaliza Status no retorno para garantir apenas duas opções ao salvar
-                        if "Status" in ret_idx.columns:
-                            ret_idx.loc[:, "Status"] = ret_idx["Status"].astype(str).replace({"": "Inativa"})
-                            ret_idx.loc[:, "Status"] = ret_idx["Status"].where(ret_idx["Status"].isin(["Ativa", "Inativa"]), "Inativa")
-
-                        alteradas = []
-                        for equipe, row in ret_idx.iterrows():
-                            if equipe not in orig_idx.index:
-                                continue
-                            before = orig_idx.loc[equipe]
-                            changed = any(str(row.get(c, "")) != str(before.get(c, "")) for c in campos_editaveis)
-                            if changed:
-                                alteradas.append(equipe)
-
-                        updated_key = f"updated_eq_{nome_tab}_{page_num}"
-                        already = set(st.session_state.get(updated_key, []))
-                        to_save = [eq for eq in alteradas if eq not in already]
-
-                        if to_save:
-                            ok = 0
-                            for eq in to_save:
-                                payload = {
-                                    "NOME": eq,
-                                    "ORIENTADOR": str(ret_idx.loc[eq].get("Orientadores", "")),
-                                    "STATUS": str(ret_idx.loc[eq].get("Status", "")),
-                                }
-                                try:
-                                    salvar_equipe_firestore(payload)
-                                    ok += 1
-                                except Exception as e:
-                                    st.warning(f"Falha ao salvar '{eq}': {e}")
-                            if ok:
-                                st.session_state[updated_key] = list(already.union(to_save))
-                                st.toast(f"{ok} equipe(s) atualizada(s)", icon="✅")
-                                try:
-                                    st.cache_data.clear()
-                                except Exception:
-                                    pass
+                    alteracoes = {}
+                    if "EQUIPE" in df_page.columns:
+                        alteracoes = alteracoes_editor(
+                            f"editor_equipes_{nome_tab}",
+                            df_page,
+                            coluna_chave="EQUIPE",
+                            campos=CAMPOS_EDITAVEIS_EQUIPES,
+                        )
+
+                    # Edições já gravadas continuam no delta do editor; não regrava o mesmo valor
+                    updated_key = f"updated_eq_{nome_tab}_{page_num}"
+                    already = st.session_state.get(updated_key, {})
+                    to_save = {eq: campos for eq, campos in alteracoes.items() if already.get(eq) != campos}
+
+                    if to_save:
+                        # Grava em segundo plano; a confirmação é conferida nas próximas execuções
+                        salvas = {}
+                        ids = []
+                        for eq, campos in to_save.items():
+                            payload = {CAMPOS_EDITAVEIS_EQUIPES[c]: str(v or "") for c, v in campos.items()}
+                            try:
+                                ids.append(enfileirar_atualizacao_equipe(eq, payload))
+                                salvas[eq] = campos
+                            except Exception as e:
+                                st.warning(f"Falha ao salvar '{eq}': {e}")
+                        acompanhar_edicoes(CHAVE_FILA_EQUIPES, ids)
+                        if salvas:
+                            st.session_state[updated_key] = {**already, **salvas}
+                            st.toast(f"{len(salvas)} equipe(s) enviada(s) para gravação", icon="⏳")
                 except Exception as e:
                     st.warning(f"Não foi possível verificar alterações: {e}")
 
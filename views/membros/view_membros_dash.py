@@ -1,19 +1,29 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
 from datetime import date
 from math import ceil
 import unicodedata
 import sys, os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../../")))
 
+from controllers.dataset_controller import obter_membros, versao_atual
 from controllers.membros_controller import (
+    atualizar_membro_campos,
+    contar_membros,
     deletar_membros,
-    listar_membros_firestore,
+    enfileirar_atualizacao_membro,
+    fila_membros,
+    listar_membros_pagina,
     salvar_membro_firestore,
-    salvar_dataframe_completo,
-    substituir_valor_campo,
+    substituir_valores_campo,
 )
+from utils.cache_frames import invalidar_frames
+from utils.facetas import obter_facetas, rotulo_com_contagem
+from utils.fila_escrita import acompanhar_edicoes, coletar_confirmacoes
+from utils.filtros import filtro_texto, filtro_valores, obter_motor
+from utils.graficos import figura
+from utils.rastreio_edicoes import alteracoes_editor
+from utils.versao_dados import obter_versao
 ## Limpeza de CSV será feita fora da UI (one-off)
 
 def _inject_dialog_css():
@@ -41,6 +51,26 @@ def _inject_dialog_css():
 
 CSV_PATH = os.path.join("data/membros_gp/tratados/membros_gp_tratados_.csv")
 
+COLUNAS_BUSCA = ["NOME", "CPF", "EMAIL", "ORIENTADOR", "EQUIPE DE PROJETO", "PROJETO ATUAL"]
+
+CHAVE_FILA_MEMBROS = "fila_membros_pendentes"
+
+CAMPOS_EDITAVEIS_MEMBROS = [
+    "NOME", "DATA NASCIMENTO", "EMAIL", "CONTATO", "LATTES", "MATRÍCULA",
+    "EQUIPE DE PROJETO", "PROJETO ATUAL", "ORIENTADOR", "SÉRIE", "ANO",
+    "Rank GP", "STATUS",
+]
+
+# (rótulo, coluna, chave de sessão) dos filtros de múltipla escolha da barra lateral
+FACETAS_MEMBROS = [
+    ("Rank GP", "Rank GP", "filtro_ranks"),
+    ("Equipe", "EQUIPE DE PROJETO", "filtro_equipes"),
+    ("Tipo Membro", "TIPO MEMBRO", "filtro_tipos"),
+    ("Orientador", "ORIENTADOR", "filtro_orientadores"),
+    ("Curso", "CURSO", "filtro_cursos"),
+    ("Projeto Atual", "PROJETO ATUAL", "filtro_projetos"),
+]
+
 def normalize_string(s):
     return unicodedata.normalize("NFKD", str(s)).encode("ASCII", "ignore").decode("utf-8").lower()
 
@@ -163,22 +193,9 @@ def _validar_e_preparar_membro(
 
     return payload, erros
 
-@st.cache_data(show_spinner=False, ttl=60)
 def carregar_membros_df():
-    try:
-        df = listar_membros_firestore()
-        if not isinstance(df, pd.DataFrame) or df.empty:
-            raise ValueError("Sem dados do Firestore")
-        if "PROJETO ATUAL" not in df.columns:
-            df["PROJETO ATUAL"] = ""
-        return df
-    except Exception:
-        if os.path.exists(CSV_PATH):
-            df_csv = pd.read_csv(CSV_PATH)
-            if "PROJETO ATUAL" not in df_csv.columns:
-                df_csv["PROJETO ATUAL"] = ""
-            return df_csv
-        return pd.DataFrame()
+    """Membros do serviço de datasets compartilhado (Firestore, com contingência no CSV)."""
+    return obter_membros()
 
 
 def _opcoes_textuais(df: pd.DataFrame) -> dict[str, list[str]]:
@@ -239,25 +256,33 @@ def gerenciar_opcoes_textuais(df: pd.DataFrame):
                     key=f"editor_{campo}",
                 )
                 if st.button(f"💾 Salvar {label}s", key=f"save_{campo}"):
-                    alterados = 0
                     orig_set = {_normalizar_opcao(v) for v in lista}
                     novos_norm = set()
+                    # Exclusões e renomes da coluna vão ao Firestore numa única reescrita em massa
+                    mapeamento: dict[str, str] = {}
                     for valor_antigo in lista:
                         # localizar linha correspondente
                         linha = df_edit[df_edit["VALOR"].apply(_normalizar_opcao) == _normalizar_opcao(valor_antigo)]
                         if linha.empty:
                             # removido
-                            alterados += substituir_valor_campo(campo, valor_antigo, "")
+                            mapeamento[valor_antigo] = ""
                             continue
                         novo_valor = linha.iloc[0].get("VALOR", "").strip()
                         excluir = bool(linha.iloc[0].get("EXCLUIR"))
                         if excluir:
-                            alterados += substituir_valor_campo(campo, valor_antigo, "")
+                            mapeamento[valor_antigo] = ""
                         elif novo_valor and novo_valor != valor_antigo:
                             if _normalizar_opcao(novo_valor) in orig_set:
                                 st.warning(f"Ignorado renome de '{valor_antigo}' para '{novo_valor}' (já existe).")
                             else:
-                                alterados += substituir_valor_campo(campo, valor_antigo, novo_valor)
+                                mapeamento[valor_antigo] = novo_valor
+                    resultado = substituir_valores_campo(campo, mapeamento)
+                    alterados = sum(resultado["alterados"].values())
+                    if resultado["falhas"]:
+                        st.toast(
+                            f"Falha ao atualizar no Firestore: {', '.join(map(str, resultado['falhas']))}",
+                            icon="⚠️",
+                        )
                     # novos valores (linhas extras)
                     for _, row in df_edit.iterrows():
                         val = (row.get("VALOR") or "").strip()
@@ -271,7 +296,6 @@ def gerenciar_opcoes_textuais(df: pd.DataFrame):
                                 atuais.append(val)
                                 novos_norm.add(_normalizar_opcao(val))
                     st.session_state["opcoes_textuais_extras"] = extras
-                    st.cache_data.clear()
                     st.success(f"{label}s atualizados; {alterados} registro(s) ajustado(s) no Firestore.")
                     st.rerun()
 
@@ -454,10 +478,44 @@ def cadastrar_membro():
 
     modal()
 
+def _opcoes_anos(df: pd.DataFrame) -> list[str]:
+    # Filtro: Ano (valores únicos, ordenados numericamente)
+    anos_col = df.get("ANO", pd.Series())
+    if anos_col.empty:
+        return []
+    anos_numeric = pd.to_numeric(anos_col, errors="coerce").dropna().astype(int)
+    anos_opts_sorted = [str(a) for a in sorted(pd.Series(anos_numeric).unique().tolist())]
+    # Fallback textual se não houver anos numéricos
+    if not anos_opts_sorted:
+        anos_opts_sorted = sorted(
+            pd.Series(anos_col.astype(str).map(str.strip))
+            .replace("", pd.NA)
+            .dropna()
+            .unique()
+            .tolist()
+        )
+    return anos_opts_sorted
+
+
+def _filtros_membros(q: str, selecoes: dict) -> list[tuple]:
+    status_sel = selecoes.get("filtro_status") or "Todos"
+    filtros = [
+        filtro_texto(COLUNAS_BUSCA, q),
+        filtro_valores("STATUS", [status_sel] if status_sel != "Todos" else []),
+        filtro_valores("ANO", [str(a) for a in selecoes.get("filtro_anos") or []], como_texto=True),
+    ]
+    for _, coluna, chave in FACETAS_MEMBROS:
+        filtros.append(filtro_valores(coluna, selecoes.get(chave) or []))
+    return filtros
+
+
 def aplicar_filtros(df, q_external: str | None = None):
     if df.empty:
         return df
 
+    motor = obter_motor(df)
+    facetas = obter_facetas(motor)
+
     sb = st.sidebar
     sb.markdown("### 🔎 Filtros — Membros")
     # Busca principal pode vir de fora (topo da página)
@@ -465,58 +523,36 @@ def aplicar_filtros(df, q_external: str | None = None):
         q = sb.text_input("Buscar por nome, CPF, email, orientador, equipe", key="filtro_q")
     else:
         q = q_external
-    status_sel = sb.selectbox("Status", ["Todos", "Ativo", "Inativo", "Pendente"], index=0, key="filtro_status")
-    
-    # Filtro: Ano (valores únicos, ordenados numericamente)
-    anos_col = df.get("ANO", pd.Series())
-    if not anos_col.empty:
-        anos_numeric = pd.to_numeric(anos_col, errors="coerce").dropna().astype(int)
-        anos_unique_sorted = sorted(pd.Series(anos_numeric).unique().tolist())
-        anos_opts_sorted = [str(a) for a in anos_unique_sorted]
-        # Fallback textual se não houver anos numéricos
-        if not anos_opts_sorted:
-            anos_opts_sorted = sorted(
-                pd.Series(anos_col.astype(str).map(str.strip))
-                .replace("", pd.NA)
-                .dropna()
-                .unique()
-                .tolist()
-            )
-    else:
-        anos_opts_sorted = []
-    anos = sb.multiselect("Ano", anos_opts_sorted, key="filtro_anos")
-    
-    ranks = sb.multiselect(
-        "Rank GP",
-        sorted(df.get("Rank GP", pd.Series()).dropna().unique().tolist()),
-        key="filtro_ranks",
-    )
-    equipes = sb.multiselect(
-        "Equipe",
-        sorted(df.get("EQUIPE DE PROJETO", pd.Series()).dropna().unique().tolist()),
-        key="filtro_equipes",
-    )
-    tipos = sb.multiselect(
-        "Tipo Membro",
-        sorted(df.get("TIPO MEMBRO", pd.Series()).dropna().unique().tolist()),
-        key="filtro_tipos",
-    )
-    orientadores = sb.multiselect(
-        "Orientador",
-        sorted(df.get("ORIENTADOR", pd.Series()).dropna().unique().tolist()),
-        key="filtro_orientadores",
-    )
-    cursos = sb.multiselect(
-        "Curso",
-        sorted(df.get("CURSO", pd.Series()).dropna().unique().tolist()),
-        key="filtro_cursos",
+
+    # Contagens refletem a seleção atual (valores já presentes na sessão antes dos widgets)
+    chaves = ["filtro_status", "filtro_anos"] + [chave for _, _, chave in FACETAS_MEMBROS]
+    filtros_atuais = _filtros_membros(q, {c: st.session_state.get(c) for c in chaves})
+
+    rotulo_status = rotulo_com_contagem(facetas.contagens("STATUS", filtros_atuais))
+    status_sel = sb.selectbox(
+        "Status",
+        ["Todos", "Ativo", "Inativo", "Pendente"],
+        index=0,
+        key="filtro_status",
+        format_func=lambda s: s if s == "Todos" else rotulo_status(s),
     )
-    projetos = sb.multiselect(
-        "Projeto Atual",
-        sorted(df.get("PROJETO ATUAL", pd.Series()).dropna().unique().tolist()),
-        key="filtro_projetos",
+
+    anos_opts_sorted = facetas.memo("opcoes_anos", _opcoes_anos)
+    anos = sb.multiselect(
+        "Ano",
+        anos_opts_sorted,
+        key="filtro_anos",
+        format_func=rotulo_com_contagem(facetas.contagens("ANO", filtros_atuais, como_texto=True)),
     )
 
+    selecoes = {"filtro_status": status_sel, "filtro_anos": anos}
+    for rotulo, coluna, chave in FACETAS_MEMBROS:
+        selecoes[chave] = sb.multiselect(
+            rotulo,
+            facetas.opcoes(coluna),
+            key=chave,
+            format_func=rotulo_com_contagem(facetas.contagens(coluna, filtros_atuais)),
+        )
 
     # Removido filtro de Série conforme solicitado
 
@@ -533,37 +569,19 @@ def aplicar_filtros(df, q_external: str | None = None):
         st.session_state["filtro_anos"] = []
         st.rerun()
 
-    df_filtrado = df.copy()
-    if q:
-        nq = normalize_string(q)
-        def match_row(row):
-            campos = [
-                row.get("NOME", ""),
-                row.get("CPF", ""),
-                row.get("EMAIL", ""),
-                row.get("ORIENTADOR", ""),
-                row.get("EQUIPE DE PROJETO", ""),
-                row.get("PROJETO ATUAL", ""),
-            ]
-            return any(nq in normalize_string(v) for v in campos)
-        df_filtrado = df_filtrado[df_filtrado.apply(match_row, axis=1)]
-    if status_sel != "Todos" and "STATUS" in df_filtrado.columns:
-        df_filtrado = df_filtrado[df_filtrado["STATUS"] == status_sel]
-    if anos:
-        df_filtrado = df_filtrado[df_filtrado.get("ANO").astype(str).isin([str(a) for a in anos])]
-    if ranks:
-        df_filtrado = df_filtrado[df_filtrado.get("Rank GP").isin(ranks)]
-    if equipes:
-        df_filtrado = df_filtrado[df_filtrado.get("EQUIPE DE PROJETO").isin(equipes)]
-    if tipos:
-        df_filtrado = df_filtrado[df_filtrado.get("TIPO MEMBRO").isin(tipos)]
-    if orientadores:
-        df_filtrado = df_filtrado[df_filtrado.get("ORIENTADOR").isin(orientadores)]
-    if cursos:
-        df_filtrado = df_filtrado[df_filtrado.get("CURSO").isin(cursos)]
-    if projetos:
-        df_filtrado = df_filtrado[df_filtrado.get("PROJETO ATUAL").isin(projetos)]
-    return df_filtrado
+    return motor.filtrar(_filtros_membros(q, selecoes), df)
+
+@st.fragment
+def _bloco_indicadores(df: pd.DataFrame):
+    """Indicadores da página; só mudam numa execução completa (nova versão ou novos filtros)."""
+    mostrar_indicadores(df)
+
+
+@st.fragment
+def _bloco_graficos(df: pd.DataFrame):
+    """Gráficos da página; interações na tabela não os reexecutam."""
+    graficos(df)
+
 
 def graficos(df):
     if df.empty:
@@ -571,24 +589,360 @@ def graficos(df):
     with st.expander("📈 Ver gráficos"): 
         c1, c2 = st.columns(2)
         if "STATUS" in df.columns:
-            fig1 = px.pie(df, names="STATUS", title="Distribuição por Status", hole=0.35)
+            por_status = df["STATUS"].value_counts().rename_axis("STATUS").reset_index(name="Qtd")
+            fig1 = figura("pie", por_status, names="STATUS", values="Qtd", title="Distribuição por Status", hole=0.35)
             c1.plotly_chart(fig1, use_container_width=True)
         if "Rank GP" in df.columns:
-            fig2 = px.bar(df.groupby("Rank GP").size().reset_index(name="Qtd"), x="Rank GP", y="Qtd", title="Membros por Rank GP")
+            fig2 = figura("bar", df.groupby("Rank GP").size().reset_index(name="Qtd"), x="Rank GP", y="Qtd", title="Membros por Rank GP")
             c2.plotly_chart(fig2, use_container_width=True)
 
         c3, c4 = st.columns(2)
         if "CURSO" in df.columns:
             top_cursos = df["CURSO"].value_counts().head(10).reset_index()
             top_cursos.columns = ["CURSO", "Qtd"]
-            fig3 = px.bar(top_cursos, x="CURSO", y="Qtd", title="Top Cursos")
+            fig3 = figura("bar", top_cursos, x="CURSO", y="Qtd", title="Top Cursos")
             c3.plotly_chart(fig3, use_container_width=True)
         if "EQUIPE DE PROJETO" in df.columns:
             top_eq = df["EQUIPE DE PROJETO"].value_counts().head(10).reset_index()
             top_eq.columns = ["EQUIPE", "Qtd"]
-            fig4 = px.bar(top_eq, x="EQUIPE", y="Qtd", title="Membros por Equipe")
+            fig4 = figura("bar", top_eq, x="EQUIPE", y="Qtd", title="Membros por Equipe")
             c4.plotly_chart(fig4, use_container_width=True)
 
+def _definir_estado(chave: str, valor) -> None:
+    st.session_state[chave] = valor
+
+
+def _copiar_estado(origem: str, destino: str) -> None:
+    st.session_state[destino] = st.session_state[origem]
+
+
+def _salvar_alteracoes_membros(alteracoes: dict) -> list:
+    """Grava os campos alterados de cada membro; retorna os CPFs salvos."""
+    salvos = []
+    for cpf, campos in alteracoes.items():
+        try:
+            atualizar_membro_campos(cpf, campos)
+            salvos.append(cpf)
+        except Exception as e:
+            st.warning(f"Falha ao salvar CPF {cpf}: {e}")
+    return salvos
+
+
+def _enfileirar_alteracoes_membros(alteracoes: dict) -> list:
+    """Agenda as alterações na fila de escrita; retorna os CPFs enviados."""
+    enviados = []
+    ids = []
+    for cpf, campos in alteracoes.items():
+        try:
+            ids.append(enfileirar_atualizacao_membro(cpf, campos))
+            enviados.append(cpf)
+        except Exception as e:
+            st.warning(f"Falha ao salvar CPF {cpf}: {e}")
+    acompanhar_edicoes(CHAVE_FILA_MEMBROS, ids)
+    return enviados
+
+
+def _conferir_fila_membros() -> None:
+    confirmadas, falhas = coletar_confirmacoes(CHAVE_FILA_MEMBROS, fila_membros())
+    for erro in falhas:
+        st.warning(f"Falha ao gravar alteração no Firebase: {erro}")
+    if confirmadas:
+        st.toast(f"{confirmadas} alteração(ões) gravada(s) no Firebase", icon="✅")
+
+
+def _formatar_data_nascimento(df: pd.DataFrame) -> pd.DataFrame:
+    if "DATA NASCIMENTO" not in df.columns:
+        return df
+    df = df.copy()
+    data_col = pd.to_datetime(df["DATA NASCIMENTO"], errors="coerce", dayfirst=True)
+    df["DATA NASCIMENTO"] = data_col.dt.strftime("%d/%m/%Y").fillna("")
+    return df
+
+
+def _status_servidor(q: str, status_aba: str | None) -> tuple[bool, str | None]:
+    """(paginar no Firestore?, STATUS da consulta).
+
+    Só pagina no servidor sem busca e sem filtros da barra lateral além do status: os
+    demais filtros (inclusive equipes, que casam o valor exato da coluna) são locais.
+    """
+    if (q or "").strip() or st.session_state.get("filtro_anos"):
+        return False, None
+    if any(st.session_state.get(chave) for _, _, chave in FACETAS_MEMBROS):
+        return False, None
+    status_lateral = st.session_state.get("filtro_status") or "Todos"
+    status_lateral = None if status_lateral == "Todos" else status_lateral
+    if status_aba and status_lateral and status_aba != status_lateral:
+        return False, None
+    return True, status_aba or status_lateral
+
+
+def _sobrepor_frame_local(pagina: pd.DataFrame, df_local: pd.DataFrame) -> pd.DataFrame:
+    """Linhas da página lida do Firestore com os valores do frame local (edições ainda em gravação)."""
+    if pagina.empty or "CPF" not in pagina.columns or "CPF" not in df_local.columns:
+        return pagina
+    locais = df_local.drop_duplicates("CPF").set_index("CPF")
+    base = pagina.set_index("CPF")
+    return locais.reindex(base.index).combine_first(base)[base.columns].reset_index()
+
+
+def _pagina_servidor(nome_tab: str, status: str | None, page_size: int, page_num: int, versao: str) -> dict:
+    """Página da tabela lida do Firestore com cursores guardados na sessão.
+
+    Cada página lida (e o cursor para a seguinte) fica em cache até mudar a versão dos
+    dados, o status ou o tamanho da página; navegar de volta não gera novas leituras.
+    """
+    estado = (versao, status, page_size)
+    caches = st.session_state.setdefault("paginacao_membros", {})
+    cache = caches.get(nome_tab)
+    if cache is None or cache["estado"] != estado:
+        cache = {"estado": estado, "cursores": {1: None}, "paginas": {}, "total": None}
+        caches[nome_tab] = cache
+
+    if cache["total"] is None:
+        cache["total"] = contar_membros(status=status)
+
+    if page_num not in cache["paginas"]:
+        pagina = max(p for p in cache["cursores"] if p <= page_num)
+        cursor = cache["cursores"][pagina]
+        while pagina <= page_num:
+            df_pagina, cursor = listar_membros_pagina(page_size, apos=cursor, status=status)
+            cache["paginas"][pagina] = df_pagina
+            cache["cursores"][pagina + 1] = cursor
+            if cursor is None:
+                break
+            pagina += 1
+    return {"df": cache["paginas"].get(page_num, pd.DataFrame()), "total": cache["total"]}
+
+
+@st.fragment
+def _tabela_membros(df: pd.DataFrame, nome_tab: str, status: str | None, busca_top: str, versao_membros: str):
+    """Tabela de uma aba com sua paginação; navegar ou editar reexecuta só este fragmento.
+
+    Depende da versão do dataset usada na execução completa: se o frame compartilhado
+    mudou desde então (edição gravada, outra sessão), refaz a página inteira para
+    alinhar indicadores e gráficos.
+    """
+    atual = versao_atual("membros")
+    if atual is not None and atual != versao_membros:
+        st.rerun(scope="app")
+
+    alteracoes = None
+    df_tab = df
+    if status and "STATUS" in df_tab.columns:
+        df_tab = df_tab[df_tab["STATUS"] == status]
+
+    colunas_visiveis = [
+        "NOME", "CPF", "DATA NASCIMENTO", "EMAIL", "CONTATO",
+        "LATTES", "MATRÍCULA", "EQUIPE DE PROJETO",
+        "PROJETO ATUAL", "ORIENTADOR", "SÉRIE", "ANO", "Rank GP",
+        "STATUS"
+    ]
+    colunas_visiveis = [c for c in colunas_visiveis if c in df_tab.columns]
+    df_tab = df_tab[colunas_visiveis]
+
+    # Paginação no Firestore por cursores quando só há filtro de status; senão local
+    total_rows = len(df_tab)
+    ps_key = f"ps_{nome_tab}"
+    pn_key = f"pn_{nome_tab}"
+    page_size = st.session_state.get(ps_key, 25)
+    page_num = st.session_state.get(pn_key, 1)
+    no_servidor, status_servidor = _status_servidor(busca_top, status)
+    pagina_servidor = None
+    if no_servidor:
+        try:
+            pagina_servidor = _pagina_servidor(nome_tab, status_servidor, page_size, page_num, versao_membros)
+            total_rows = pagina_servidor["total"]
+        except Exception:
+            pagina_servidor = None
+    total_pages = max(1, ceil(max(1, total_rows) / page_size))
+    if page_num > total_pages:
+        # Sem rerun: este trecho também roda em execuções completas (filtros, exclusões)
+        page_num = total_pages
+        st.session_state[pn_key] = page_num
+        if pagina_servidor is not None:
+            try:
+                pagina_servidor = _pagina_servidor(nome_tab, status_servidor, page_size, page_num, versao_membros)
+            except Exception:
+                pagina_servidor = None
+    start = (page_num - 1) * page_size
+    end = start + page_size
+    if pagina_servidor is not None:
+        df_page = _sobrepor_frame_local(
+            _formatar_data_nascimento(pagina_servidor["df"]), df
+        ).reindex(columns=colunas_visiveis, fill_value="").fillna("")
+    else:
+        df_page = df_tab.iloc[start:end]
+    # Sinalizar linhas atualizadas recentemente (persistidas) nesta página
+    updated_key = f"last_updated_{nome_tab}_p{page_num}"
+    last_updated_cpfs = set(st.session_state.get(updated_key, []))
+    df_page_display = df_page.copy()
+    editavel = (nome_tab == "Todos")
+    if editavel:
+        df_page_display["EXCLUIR"] = False
+        # garante coluna no fim
+        base_cols = [c for c in df_page_display.columns if c != "EXCLUIR"]
+        df_page_display = df_page_display[base_cols + ["EXCLUIR"]]
+    if "CPF" in df_page_display.columns:
+        df_page_display["ATUALIZADO"] = df_page_display["CPF"].apply(
+            lambda c: "✅" if c in last_updated_cpfs else ""
+        )
+        # Garante coluna no final
+        colunas_visiveis_with_status = colunas_visiveis.copy()
+        if editavel and "EXCLUIR" not in colunas_visiveis_with_status:
+            colunas_visiveis_with_status.append("EXCLUIR")
+        if "ATUALIZADO" not in colunas_visiveis_with_status:
+            colunas_visiveis_with_status.append("ATUALIZADO")
+        df_page_display = df_page_display[colunas_visiveis_with_status]
+    else:
+        df_page_display = df_page
+    first_row = start + 1 if total_rows else 0
+    last_row = min(end, total_rows)
+
+    retorno = st.data_editor(
+        df_page_display,
+        use_container_width=True,
+        hide_index=True,
+        num_rows="fixed",
+        column_config={
+            "EXCLUIR": st.column_config.CheckboxColumn("Excluir", help="Marque para remover este membro"),
+            "NOME": st.column_config.TextColumn("Nome Completo", disabled=not editavel),
+            "CPF": st.column_config.TextColumn("CPF", disabled=True),
+            "DATA NASCIMENTO": st.column_config.TextColumn("Data Nasc.", disabled=not editavel),
+            "EMAIL": st.column_config.TextColumn("Email", disabled=not editavel),
+            "CONTATO": st.column_config.TextColumn("Telefone", disabled=not editavel),
+            "LATTES": st.column_config.LinkColumn("Currículo Lattes"),
+            "MATRÍCULA": st.column_config.TextColumn("Matrícula", disabled=not editavel),
+            "EQUIPE DE PROJETO": st.column_config.TextColumn("Equipe", disabled=not editavel),
+            "PROJETO ATUAL": st.column_config.TextColumn("Projeto Atual", disabled=not editavel),
+            "ORIENTADOR": st.column_config.TextColumn("Orientador", disabled=not editavel),
+            "SÉRIE": st.column_config.TextColumn("Série", disabled=not editavel),
+            "ANO": st.column_config.TextColumn("Ano", disabled=not editavel),
+            "Rank GP": st.column_config.TextColumn("Rank GP", disabled=not editavel),
+            "STATUS": st.column_config.SelectboxColumn("Status", options=["Ativo", "Inativo", "Pendente"], disabled=not editavel),
+            "ATUALIZADO": st.column_config.TextColumn("Atualizado", disabled=True, help="Última edição persistida"),
+        },
+        key=f"editor_{nome_tab}_p{page_num}"
+    )
+    if editavel:
+        # Alternar entre autosave e salvar em lote
+        autosave_key = f"autosave_{nome_tab}"
+        if autosave_key not in st.session_state:
+            st.session_state[autosave_key] = True
+        autosave = st.checkbox("Salvar automaticamente", key=autosave_key)
+
+        try:
+            # Apenas o delta do editor (campo a campo), sem comparar a página inteira
+            alteracoes = {}
+            if "CPF" in df_page_display.columns:
+                alteracoes = alteracoes_editor(
+                    f"editor_{nome_tab}_p{page_num}",
+                    df_page_display,
+                    coluna_chave="CPF",
+                    campos=CAMPOS_EDITAVEIS_MEMBROS,
+                )
+            # Edições já gravadas continuam no delta do editor; não regrava o mesmo valor
+            gravadas_key = f"gravadas_{nome_tab}_p{page_num}"
+            gravadas = st.session_state.get(gravadas_key, {})
+            alteracoes = {cpf: campos for cpf, campos in alteracoes.items() if gravadas.get(cpf) != campos}
+            changed_cpfs = list(alteracoes)
+
+            pending_key = f"pending_{nome_tab}_p{page_num}"
+            st.session_state[pending_key] = changed_cpfs
+
+            if autosave and changed_cpfs:
+                # Grava em segundo plano; a confirmação é conferida nas próximas execuções
+                enviados = _enfileirar_alteracoes_membros(alteracoes)
+                if enviados:
+                    st.session_state[gravadas_key] = {**gravadas, **{c: alteracoes[c] for c in enviados}}
+                    st.session_state[updated_key] = enviados
+                    st.toast(f"{len(enviados)} registro(s) enviado(s) para gravação", icon="⏳")
+            elif not autosave:
+                # Modo lote: botão aciona um rerun com flag para salvar na próxima execução
+                n_pending = len(changed_cpfs)
+                do_batch_key = f"do_batch_{nome_tab}_p{page_num}"
+                c_b1, _ = st.columns([2,5])
+                if c_b1.button(
+                    f"💾 Salvar alterações desta página ({n_pending})",
+                    disabled=(n_pending == 0),
+                    key=f"batchsave_{nome_tab}_p{page_num}",
+                ):
+                    st.session_state[do_batch_key] = True
+
+                # Se a flag estiver marcada nesta execução, salva usando os diffs atuais
+                if st.session_state.get(do_batch_key, False):
+                    salvos = _salvar_alteracoes_membros(alteracoes)
+                    st.session_state[gravadas_key] = {**gravadas, **{c: alteracoes[c] for c in salvos}}
+                    st.session_state[updated_key] = salvos
+                    st.session_state[pending_key] = []
+                    st.session_state[do_batch_key] = False
+                    if salvos:
+                        st.toast(f"{len(salvos)} registro(s) atualizado(s) no Firebase", icon="✅")
+                        st.rerun(scope="app")
+        except Exception as e:
+            st.warning(f"Não foi possível verificar alterações: {e}")
+
+        cpfs_excluir = []
+        if "EXCLUIR" in retorno.columns and "CPF" in retorno.columns:
+            cpfs_excluir = retorno[retorno["EXCLUIR"] == True]["CPF"].astype(str).tolist()
+        if cpfs_excluir:
+            st.warning(f"{len(cpfs_excluir)} membro(s) marcados para exclusão")
+        if st.button(
+            f"🗑️ Excluir selecionados ({len(cpfs_excluir)})",
+            disabled=len(cpfs_excluir) == 0,
+            key=f"delete_members_{nome_tab}_p{page_num}",
+            type="secondary",
+        ):
+            resultado = deletar_membros(cpfs_excluir)
+            st.toast(f"{len(resultado['removidos'])} membro(s) removido(s)", icon="✅")
+            if resultado["falhas"]:
+                st.toast(f"{len(resultado['falhas'])} membro(s) não removido(s)", icon="⚠️")
+            st.rerun(scope="app")
+
+    # Controles de navegação e info abaixo da tabela
+    b_prev, b_next, b_info = st.columns([1,1,6])
+    prev_disabled = page_num <= 1
+    next_disabled = page_num >= total_pages
+    # Navegação por callbacks: o clique já reexecuta o fragmento com a nova página
+    b_prev.button(
+        "◀️ Anterior",
+        disabled=prev_disabled,
+        key=f"prev_bottom_{nome_tab}",
+        on_click=_definir_estado,
+        args=(pn_key, max(1, page_num - 1)),
+    )
+    b_next.button(
+        "Próxima ▶️",
+        disabled=next_disabled,
+        key=f"next_bottom_{nome_tab}",
+        on_click=_definir_estado,
+        args=(pn_key, min(total_pages, page_num + 1)),
+    )
+    b_info.caption(f"Página {page_num}/{total_pages} • Mostrando {first_row}–{last_row} de {total_rows}")
+
+    # Itens por página abaixo da tabela
+    c_ps = st.columns([1])[0]
+    with c_ps:
+        st.caption("Itens por página")
+        st.selectbox(
+            "",
+            options=[10, 25, 50, 100],
+            index={10:0,25:1,50:2,100:3}.get(page_size, 1),
+            key=f"{ps_key}_below",
+            label_visibility="collapsed",
+            on_change=_copiar_estado,
+            args=(f"{ps_key}_below", ps_key),
+        )
+
+    # Persistir alterações do editor principal
+    if alteracoes is not None:
+        csave1, _ = st.columns([1,5])
+        if csave1.button("📤 Salvar alterações no Firebase", key=f"salvar_todas_{nome_tab}_p{page_num}"):
+            salvos = _salvar_alteracoes_membros(alteracoes)
+            if len(salvos) == len(alteracoes):
+                st.success("✅ Alterações salvas no Firebase!")
+            st.rerun(scope="app")
+
+
 def gestao_membros():
     st.markdown("# Gestão de Membros do GP Mecatrônica")
     _toast_once("toast_membros")
@@ -602,10 +956,13 @@ def gestao_membros():
         cadastrar_membro()
     if a2.button("🔄 Recarregar dados"):
         try:
+            invalidar_frames()
             st.cache_data.clear()
         finally:
             st.rerun()
 
+    _conferir_fila_membros()
+
     # Carregar dados (Firestore preferencialmente)
     df = carregar_membros_df()
     if df.empty:
@@ -613,13 +970,10 @@ def gestao_membros():
         return
 
     gerenciar_opcoes_textuais(df)
+    versao_membros = obter_versao(df)
+    df = _formatar_data_nascimento(df)
 
-    if "DATA NASCIMENTO" in df.columns:
-        df = df.copy()
-        data_col = pd.to_datetime(df["DATA NASCIMENTO"], errors="coerce", dayfirst=True)
-        df["DATA NASCIMENTO"] = data_col.dt.strftime("%d/%m/%Y").fillna("")
-
-    mostrar_indicadores(df)
+    _bloco_indicadores(df)
 
     # Busca principal abaixo dos indicadores, acima das abas
     busca_top = st.text_input("Buscar por nome, CPF, email, orientador, equipe", key="busca_top")
@@ -631,232 +985,11 @@ def gestao_membros():
     abas = st.tabs(["Todos", "Ativo", "Inativo", "Pendente"])
     status_map = {"Todos": None, "Ativo": "Ativo", "Inativo": "Inativo", "Pendente": "Pendente"}
 
-    edited_df_master = None
     for i, nome_tab in enumerate(status_map.keys()):
         with abas[i]:
-            df_tab = df
-            status = status_map[nome_tab]
-            if status and "STATUS" in df_tab.columns:
-                df_tab = df_tab[df_tab["STATUS"] == status]
-
-            colunas_visiveis = [
-                "NOME", "CPF", "DATA NASCIMENTO", "EMAIL", "CONTATO",
-                "LATTES", "MATRÍCULA", "EQUIPE DE PROJETO",
-                "PROJETO ATUAL", "ORIENTADOR", "SÉRIE", "ANO", "Rank GP",
-                "STATUS"
-            ]
-            colunas_visiveis = [c for c in colunas_visiveis if c in df_tab.columns]
-            df_tab = df_tab[colunas_visiveis]
-
-            # Paginação
-            total_rows = len(df_tab)
-            ps_key = f"ps_{nome_tab}"
-            pn_key = f"pn_{nome_tab}"
-            page_size = st.session_state.get(ps_key, 25)
-            total_pages = max(1, ceil(max(1, total_rows) / page_size))
-            page_num = st.session_state.get(pn_key, 1)
-            if page_num > total_pages:
-                st.session_state[pn_key] = total_pages
-                st.rerun()
-            start = (page_num - 1) * page_size
-            end = start + page_size
-            df_page = df_tab.iloc[start:end]
-            # Sinalizar linhas atualizadas recentemente (persistidas) nesta página
-            updated_key = f"last_updated_{nome_tab}_p{page_num}"
-            last_updated_cpfs = set(st.session_state.get(updated_key, []))
-            df_page_display = df_page.copy()
-            editavel = (nome_tab == "Todos")
-            if editavel:
-                df_page_display["EXCLUIR"] = False
-                # garante coluna no fim
-                base_cols = [c for c in df_page_display.columns if c != "EXCLUIR"]
-                df_page_display = df_page_display[base_cols + ["EXCLUIR"]]
-            if "CPF" in df_page_display.columns:
-                df_page_display["ATUALIZADO"] = df_page_display["CPF"].apply(
-                    lambda c: "✅" if c in last_updated_cpfs else ""
-                )
-                # Garante coluna no final
-                colunas_visiveis_with_status = colunas_visiveis.copy()
-                if editavel and "EXCLUIR" not in colunas_visiveis_with_status:
-                    colunas_visiveis_with_status.append("EXCLUIR")
-                if "ATUALIZADO" not in colunas_visiveis_with_status:
-                    colunas_visiveis_with_status.append("ATUALIZADO")
-                df_page_display = df_page_display[colunas_visiveis_with_status]
-            else:
-                df_page_display = df_page
-            first_row = start + 1 if total_rows else 0
-            last_row = min(end, total_rows)
-
-            retorno = st.data_editor(
-                df_page_display,
-                use_container_width=True,
-                hide_index=True,
-                num_rows="fixed",
-                column_config={
-                    "EXCLUIR": st.column_config.CheckboxColumn("Excluir", help="Marque para remover este membro"),
-                    "NOME": st.column_config.TextColumn("Nome Completo", disabled=not editavel),
-                    "CPF": st.column_config.TextColumn("CPF", disabled=True),
-                    "DATA NASCIMENTO": st.column_config.TextColumn("Data Nasc.", disabled=not editavel),
-                    "EMAIL": st.column_config.TextColumn("Email", disabled=not editavel),
-                    "CONTATO": st.column_config.TextColumn("Telefone", disabled=not editavel),
-                    "LATTES": st.column_config.LinkColumn("Currículo Lattes"),
-                    "MATRÍCULA": st.column_config.TextColumn("Matrícula", disabled=not editavel),
-                    "EQUIPE DE PROJETO": st.column_config.TextColumn("Equipe", disabled=not editavel),
-                    "PROJETO ATUAL": st.column_config.TextColumn("Projeto Atual", disabled=not editavel),
-                    "ORIENTADOR": st.column_config.TextColumn("Orientador", disabled=not editavel),
-                    "SÉRIE": st.column_config.TextColumn("Série", disabled=not editavel),
-                    "ANO": st.column_config.TextColumn("Ano", disabled=not editavel),
-                    "Rank GP": st.column_config.TextColumn("Rank GP", disabled=not editavel),
-                    "STATUS": st.column_config.SelectboxColumn("Status", options=["Ativo", "Inativo", "Pendente"], disabled=not editavel),
-                    "ATUALIZADO": st.column_config.TextColumn("Atualizado", disabled=True, help="Última edição persistida"),
-                },
-                key=f"editor_{nome_tab}_p{page_num}"
-            )
-            if editavel:
-                edited_df_master = retorno
-                # Alternar entre autosave e salvar em lote
-                autosave_key = f"autosave_{nome_tab}"
-                if autosave_key not in st.session_state:
-                    st.session_state[autosave_key] = True
-                autosave = st.checkbox("Salvar automaticamente", key=autosave_key)
-
-                try:
-                    # Remover colunas de UI do retorno para comparar
-                    retorno_clean = retorno.drop(columns=[c for c in ["DETALHES", "ATUALIZADO", "EXCLUIR"] if c in retorno.columns])
-                    orig_clean = df_page.drop(columns=[c for c in ["DETALHES", "ATUALIZADO", "EXCLUIR"] if c in df_page.columns], errors='ignore')
-                    if "CPF" in retorno_clean.columns and "CPF" in orig_clean.columns:
-                        retorno_idx = retorno_clean.set_index("CPF")
-                        orig_idx = orig_clean.set_index("CPF")
-                        campos_editaveis = [
-                            c for c in [
-                                "NOME","EMAIL","CONTATO","LATTES","MATRÍCULA",
-                                "EQUIPE DE PROJETO","ORIENTADOR","SÉRIE","ANO",
-                                "Rank GP","STATUS"
-                            ] if c in retorno_idx.columns
-                        ]
-                        changed_cpfs = []
-                        for cpf, row in retorno_idx.iterrows():
-                            if cpf not in orig_idx.index:
-                                continue
-                            before = orig_idx.loc[cpf]
-                            changed = any(str(row.get(col, "")) != str(before.get(col, "")) for col in campos_editaveis)
-                            if changed:
-                                changed_cpfs.append(cpf)
-
-                        pending_key = f"pending_{nome_tab}_p{page_num}"
-                        st.session_state[pending_key] = changed_cpfs
-
-                        if autosave and changed_cpfs:
-                            saved = 0
-                            for cpf in changed_cpfs:
-                                row = retorno_idx.loc[cpf]
-                                payload = row.to_dict()
-                                try:
-                                    salvar_membro_firestore({**payload, "CPF": cpf})
-                                    saved += 1
-                                except Exception as e:
-                                    st.warning(f"Falha ao salvar CPF {cpf}: {e}")
-                            if saved:
-                                st.session_state[updated_key] = changed_cpfs
-                                st.toast(f"{saved} registro(s) atualizado(s) no Firebase", icon="✅")
-                                try:
-                                    st.cache_data.clear()
-                                except Exception:
-                                    pass
-                        elif not autosave:
-                            # Modo lote: botão aciona um rerun com flag para salvar na próxima execução
-                            n_pending = len(changed_cpfs)
-                            do_batch_key = f"do_batch_{nome_tab}_p{page_num}"
-                            c_b1, _ = st.columns([2,5])
-                            if c_b1.button(
-                                f"💾 Salvar alterações desta página ({n_pending})",
-                                disabled=(n_pending == 0),
-                                key=f"batchsave_{nome_tab}_p{page_num}",
-                            ):
-                                st.session_state[do_batch_key] = True
-                                st.rerun()
-
-                            # Se a flag estiver marcada nesta execução, salva usando os diffs atuais
-                            if st.session_state.get(do_batch_key, False):
-                                saved = 0
-                                for cpf in changed_cpfs:
-                                    row = retorno_idx.loc[cpf]
-                                    payload = row.to_dict()
-                                    try:
-                                        salvar_membro_firestore({**payload, "CPF": cpf})
-                                        saved += 1
-                                    except Exception as e:
-                                        st.warning(f"Falha ao salvar CPF {cpf}: {e}")
-                                st.session_state[updated_key] = changed_cpfs
-                                st.session_state[pending_key] = []
-                                st.session_state[do_batch_key] = False
-                                if saved:
-                                    st.toast(f"{saved} registro(s) atualizado(s) no Firebase", icon="✅")
-                                    try:
-                                        st.cache_data.clear()
-                                    except Exception:
-                                        pass
-                except Exception as e:
-                    st.warning(f"Não foi possível verificar alterações: {e}")
-
-                cpfs_excluir = []
-                if "EXCLUIR" in retorno.columns and "CPF" in retorno.columns:
-                    cpfs_excluir = retorno[retorno["EXCLUIR"] == True]["CPF"].astype(str).tolist()
-                if cpfs_excluir:
-                    st.warning(f"{len(cpfs_excluir)} membro(s) marcados para exclusão")
-                if st.button(
-                    f"🗑️ Excluir selecionados ({len(cpfs_excluir)})",
-                    disabled=len(cpfs_excluir) == 0,
-                    key=f"delete_members_{nome_tab}_p{page_num}",
-                    type="secondary",
-                ):
-                    removidos = deletar_membros(cpfs_excluir)
-                    st.toast(f"{removidos} membro(s) removido(s)", icon="✅")
-                    try:
-                        st.cache_data.clear()
-                    finally:
-                        st.rerun()
-
-            # Controles de navegação e info abaixo da tabela
-            b_prev, b_next, b_info = st.columns([1,1,6])
-            prev_disabled = page_num <= 1
-            next_disabled = page_num >= total_pages
-            if b_prev.button("◀️ Anterior", disabled=prev_disabled, key=f"prev_bottom_{nome_tab}"):
-                st.session_state[pn_key] = max(1, page_num - 1)
-                st.rerun()
-            if b_next.button("Próxima ▶️", disabled=next_disabled, key=f"next_bottom_{nome_tab}"):
-                st.session_state[pn_key] = min(total_pages, page_num + 1)
-                st.rerun()
-            b_info.caption(f"Página {page_num}/{total_pages} • Mostrando {first_row}–{last_row} de {total_rows}")
-
-            # Itens por página abaixo da tabela
-            c_ps = st.columns([1])[0]
-            with c_ps:
-                st.caption("Itens por página")
-                novo_ps = st.selectbox(
-                    "",
-                    options=[10, 25, 50, 100],
-                    index={10:0,25:1,50:2,100:3}.get(page_size, 1),
-                    key=f"{ps_key}_below",
-                    label_visibility="collapsed",
-                )
-            if novo_ps != page_size:
-                st.session_state[ps_key] = novo_ps
-                st.rerun()
+            _tabela_membros(df, nome_tab, status_map[nome_tab], busca_top, versao_membros)
 
-    # Persistir alterações do editor principal
-    if edited_df_master is not None:
-        csave1, _ = st.columns([1,5])
-        if csave1.button("📤 Salvar alterações no Firebase"):
-            try:
-                salvar_dataframe_completo(edited_df_master)
-                st.success("✅ Alterações salvas no Firebase!")
-                st.cache_data.clear()
-            except Exception as e:
-                st.error(f"Falha ao salvar no Firebase: {e}")
-
-    # Gráficos
-    graficos(df)
+    _bloco_graficos(df)
 
     st.markdown("---")
     st.caption(f"📌 Desenvolvido por: Equipe Vingadores — GP Mecatrônica - IFRO Calama • {date.today().year}")
@@ -1,7 +1,8 @@
 import streamlit as st
 import pandas as pd
 from datetime import date
-from controllers.membros_controller import listar_membros_firestore
+from controllers.dataset_controller import obter_membros
+from controllers.membros_controller import obter_membro
 
 
 def _chip(texto: str, color: str = "#4c6fff"):
@@ -30,6 +31,32 @@ def _info_row(label: str, value: str):
     """
 
 
+def _data_atualizacao(dados: pd.Series) -> str:
+    data = pd.to_datetime(dados.get("DATA ATUALIZACAO") or dados.get("DATA CADASTRO"), errors="coerce")
+    if pd.isna(data):
+        return date.today().strftime("%d/%m/%Y")
+    return data.strftime("%d/%m/%Y")
+
+
+def _carregar_membro(cpf: str) -> pd.Series | None:
+    """Busca o documento do membro; sem sucesso, procura na base em cache da listagem."""
+    try:
+        membro = obter_membro(cpf)
+    except Exception:
+        membro = None
+    if membro is not None:
+        return pd.Series(membro)
+    try:
+        df = obter_membros()
+    except Exception as e:
+        st.error(f"❌ Erro ao acessar o Firestore: {e}")
+        return None
+    if df.empty or "CPF" not in df.columns:
+        return None
+    encontrado = df[df["CPF"].astype(str) == str(cpf)]
+    return None if encontrado.empty else encontrado.iloc[0]
+
+
 def view_perfil_membro():
     st.markdown(
         """
@@ -52,19 +79,11 @@ def view_perfil_membro():
         st.warning("⚠️ Nenhum CPF fornecido na URL.")
         return
 
-    try:
-        df = listar_membros_firestore()
-    except Exception as e:
-        st.error(f"❌ Erro ao acessar o Firestore: {e}")
-        return
-
-    membro = df[df["CPF"] == cpf]
-
-    if membro.empty:
+    dados = _carregar_membro(cpf)
+    if dados is None:
         st.error(f"❌ Nenhum membro encontrado com CPF: {cpf}")
         return
 
-    dados = membro.iloc[0]
     nome = dados.get("NOME", "Membro")
     status = dados.get("STATUS", "Pendente")
     projeto = dados.get("PROJETO ATUAL", "")
@@ -90,7 +109,7 @@ def view_perfil_membro():
                 <div style="margin-bottom:6px;">{_chip(status, '#10b981')}</div>
                 <div style="color:#6b7280;font-size:13px;">Rank GP: <b>{rank or '-'}</b></div>
                 <div style="color:#6b7280;font-size:13px;">Curso: <b>{curso or '-'}</b></div>
-                <div style="margin-top:10px;font-size:12px;color:#6b7280;">Atualizado: {date.today().strftime('%d/%m/%Y')}</div>
+                <div style="margin-top:10px;font-size:12px;color:#6b7280;">Atualizado: {_data_atualizacao(dados)}</div>
             </div>
             """,
             unsafe_allow_html=True,
@@ -5,53 +5,52 @@ import math
 from datetime import date
 
 import pandas as pd
-import plotly.express as px
 import streamlit as st
 
+from controllers.dataset_controller import obter_patrimonios, versao_atual
 from controllers.patrimonio_controller import (
     agrupar_por_categoria,
     agrupar_por_estado,
     agrupar_por_situacao,
+    atualizar_patrimonio_campos,
     cadastrar_patrimonio,
     calcular_indicadores,
     deletar_patrimonios,
     evolucao_por_mes,
-    listar_patrimonios,
-    salvar_ou_atualizar_patrimonio,
     top_itens_por_valor,
 )
+from utils.cache_frames import invalidar_frames
+from utils.facetas import obter_facetas, rotulo_com_contagem
+from utils.filtros import filtro_contem, filtro_intervalo, filtro_valores, obter_motor
+from utils.graficos import figura
+from utils.rastreio_edicoes import alteracoes_editor
+from utils.versao_dados import obter_versao
+
+
+# (rótulo, coluna, chave de sessão) dos filtros de múltipla escolha da barra lateral
+FACETAS_PATRIMONIO = [
+    ("Categorias", "CATEGORIA_NORMALIZADA", "patrimonio_categorias"),
+    ("Estado de conservação", "ESTADO_NORMALIZADO", "patrimonio_estados"),
+    ("Situação de uso", "SITUACAO_NORMALIZADA", "patrimonio_situacoes"),
+    ("Marcas específicas", "MARCA", "patrimonio_marcas"),
+    ("Modelos específicos", "MODELO", "patrimonio_modelos"),
+]
+
+CAMPOS_EDITAVEIS_PATRIMONIO = [
+    "ITEM", "CATEGORIA", "MARCA", "MODELO", "QUANTIDADE", "PRECO_ESTIMADO",
+    "ESTADO", "SITUACAO_USO", "VIDA_UTIL", "OBSERVACOES", "LOCAL_OBJETO",
+]
 
 
 def _format_currency(valor: float | int) -> str:
     return f"R$ {valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
 
 
-@st.cache_data(ttl=120, show_spinner=False)
 def _carregar_patrimonios() -> pd.DataFrame:
-    return listar_patrimonios()
+    return obter_patrimonios()
 
 
-def _aplicar_filtros(df: pd.DataFrame) -> pd.DataFrame:
-    if df.empty:
-        return df
-
-    sb = st.sidebar
-    sb.markdown("### 🔎 Filtros — Patrimônio")
-    busca = sb.text_input("Buscar por item / marca / código", key="patrimonio_busca")
-    busca_item = sb.text_input("Nome do item contém", key="patrimonio_item_nome")
-    busca_marca = sb.text_input("Marca contém", key="patrimonio_marca_nome")
-    busca_modelo = sb.text_input("Modelo contém", key="patrimonio_modelo_nome")
-    categorias = sorted(c for c in df["CATEGORIA_NORMALIZADA"].dropna().unique() if c)
-    categorias_sel = sb.multiselect("Categorias", categorias, key="patrimonio_categorias")
-    estados = sorted(c for c in df["ESTADO_NORMALIZADO"].dropna().unique() if c)
-    estados_sel = sb.multiselect("Estado de conservação", estados, key="patrimonio_estados")
-    situacoes = sorted(c for c in df["SITUACAO_NORMALIZADA"].dropna().unique() if c)
-    situacoes_sel = sb.multiselect("Situação de uso", situacoes, key="patrimonio_situacoes")
-    marcas = sorted(c for c in df["MARCA"].dropna().astype(str).str.strip().unique() if c)
-    marcas_sel = sb.multiselect("Marcas específicas", marcas, key="patrimonio_marcas")
-    modelos = sorted(c for c in df["MODELO"].dropna().astype(str).str.strip().unique() if c)
-    modelos_sel = sb.multiselect("Modelos específicos", modelos, key="patrimonio_modelos")
-
+def _faixa_preco(df: pd.DataFrame) -> tuple[float, float, float]:
     preco_min = df["PRECO_ESTIMADO"].min()
     preco_max = df["PRECO_ESTIMADO"].max()
     if pd.isna(preco_min):
@@ -69,16 +68,84 @@ def _aplicar_filtros(df: pd.DataFrame) -> pd.DataFrame:
     valor_max_padrao = float(round(preco_max, 2))
     if valor_min_padrao >= valor_max_padrao:
         valor_max_padrao = valor_min_padrao + passo_slider
-    faixa_preco = sb.slider(
+    return valor_min_padrao, float(round(valor_max_padrao, 2)), passo_slider
+
+
+def _filtros_patrimonio(selecoes: dict) -> list[tuple]:
+    faixa = selecoes.get("patrimonio_faixa_preco") or (None, None)
+    filtros = [
+        filtro_contem(["ITEM", "MARCA", "MODELO", "CODIGO", "CATEGORIA"], (selecoes.get("patrimonio_busca") or "").strip()),
+        filtro_contem(["ITEM"], selecoes.get("patrimonio_item_nome")),
+        filtro_contem(["MARCA"], selecoes.get("patrimonio_marca_nome")),
+        filtro_contem(["MODELO"], selecoes.get("patrimonio_modelo_nome")),
+        filtro_intervalo("PRECO_ESTIMADO", faixa[0], faixa[1]),
+        filtro_valores("ANO_ATUALIZACAO", selecoes.get("patrimonio_anos") or []),
+    ]
+    for _, coluna, chave in FACETAS_PATRIMONIO:
+        filtros.append(filtro_valores(coluna, selecoes.get(chave) or []))
+    return filtros
+
+
+def _aplicar_filtros(df: pd.DataFrame) -> pd.DataFrame:
+    if df.empty:
+        return df
+
+    motor = obter_motor(df)
+    facetas = obter_facetas(motor)
+    valor_min_padrao, valor_max_padrao, passo_slider = facetas.memo("faixa_preco", _faixa_preco)
+
+    # Mantém a faixa salva na sessão dentro dos limites do dataset atual
+    faixa_sessao = st.session_state.get("patrimonio_faixa_preco")
+    if faixa_sessao:
+        faixa_ajustada = (
+            min(max(faixa_sessao[0], valor_min_padrao), valor_max_padrao),
+            min(max(faixa_sessao[1], valor_min_padrao), valor_max_padrao),
+        )
+        if faixa_ajustada != tuple(faixa_sessao):
+            st.session_state["patrimonio_faixa_preco"] = faixa_ajustada
+
+    # Contagens refletem a seleção atual (valores já presentes na sessão antes dos widgets)
+    chaves = [
+        "patrimonio_busca", "patrimonio_item_nome", "patrimonio_marca_nome", "patrimonio_modelo_nome",
+        "patrimonio_faixa_preco", "patrimonio_anos",
+    ] + [chave for _, _, chave in FACETAS_PATRIMONIO]
+    filtros_atuais = _filtros_patrimonio({c: st.session_state.get(c) for c in chaves})
+
+    sb = st.sidebar
+    sb.markdown("### 🔎 Filtros — Patrimônio")
+    selecoes = {
+        "patrimonio_busca": sb.text_input("Buscar por item / marca / código", key="patrimonio_busca"),
+        "patrimonio_item_nome": sb.text_input("Nome do item contém", key="patrimonio_item_nome"),
+        "patrimonio_marca_nome": sb.text_input("Marca contém", key="patrimonio_marca_nome"),
+        "patrimonio_modelo_nome": sb.text_input("Modelo contém", key="patrimonio_modelo_nome"),
+    }
+    for rotulo, coluna, chave in FACETAS_PATRIMONIO:
+        selecoes[chave] = sb.multiselect(
+            rotulo,
+            facetas.opcoes(coluna, excluir_vazios=True),
+            key=chave,
+            format_func=rotulo_com_contagem(facetas.contagens(coluna, filtros_atuais)),
+        )
+
+    valor_inicial = {} if "patrimonio_faixa_preco" in st.session_state else {
+        "value": (valor_min_padrao, valor_max_padrao)
+    }
+    selecoes["patrimonio_faixa_preco"] = sb.slider(
         "Faixa de preço unitário (R$)",
         min_value=valor_min_padrao,
-        max_value=float(round(valor_max_padrao, 2)),
-        value=(valor_min_padrao, float(round(valor_max_padrao, 2))),
+        max_value=valor_max_padrao,
         step=passo_slider,
+        key="patrimonio_faixa_preco",
+        **valor_inicial,
     )
 
-    anos = sorted(df["ANO_ATUALIZACAO"].dropna().astype(int).unique().tolist())
-    ano_sel = sb.multiselect("Ano de atualização", anos, key="patrimonio_anos")
+    anos = facetas.memo("anos", lambda d: sorted(d["ANO_ATUALIZACAO"].dropna().astype(int).unique().tolist()))
+    selecoes["patrimonio_anos"] = sb.multiselect(
+        "Ano de atualização",
+        anos,
+        key="patrimonio_anos",
+        format_func=rotulo_com_contagem(facetas.contagens("ANO_ATUALIZACAO", filtros_atuais)),
+    )
 
     if sb.button("Limpar filtros", type="secondary"):
         for chave, valor in {
@@ -96,38 +163,7 @@ def _aplicar_filtros(df: pd.DataFrame) -> pd.DataFrame:
             st.session_state[chave] = valor
         st.rerun()
 
-    df_filtrado = df.copy()
-    if busca:
-        termo = busca.strip().lower()
-        if termo:
-            colunas_busca = ["ITEM", "MARCA", "MODELO", "CODIGO", "CATEGORIA"]
-            mask = pd.Series(False, index=df_filtrado.index)
-            for coluna in colunas_busca:
-                if coluna in df_filtrado.columns:
-                    mask = mask | df_filtrado[coluna].astype(str).str.lower().str.contains(termo, na=False)
-            df_filtrado = df_filtrado[mask]
-    if categorias_sel:
-        df_filtrado = df_filtrado[df_filtrado["CATEGORIA_NORMALIZADA"].isin(categorias_sel)]
-    if estados_sel:
-        df_filtrado = df_filtrado[df_filtrado["ESTADO_NORMALIZADO"].isin(estados_sel)]
-    if situacoes_sel:
-        df_filtrado = df_filtrado[df_filtrado["SITUACAO_NORMALIZADA"].isin(situacoes_sel)]
-    if marcas_sel:
-        df_filtrado = df_filtrado[df_filtrado["MARCA"].isin(marcas_sel)]
-    if modelos_sel:
-        df_filtrado = df_filtrado[df_filtrado["MODELO"].isin(modelos_sel)]
-    if busca_item:
-        df_filtrado = df_filtrado[df_filtrado["ITEM"].astype(str).str.contains(busca_item, case=False, na=False)]
-    if busca_marca:
-        df_filtrado = df_filtrado[df_filtrado["MARCA"].astype(str).str.contains(busca_marca, case=False, na=False)]
-    if busca_modelo:
-        df_filtrado = df_filtrado[df_filtrado["MODELO"].astype(str).str.contains(busca_modelo, case=False, na=False)]
-    if faixa_preco and "PRECO_ESTIMADO" in df_filtrado.columns:
-        minimo, maximo = faixa_preco
-        df_filtrado = df_filtrado[(df_filtrado["PRECO_ESTIMADO"] >= minimo) & (df_filtrado["PRECO_ESTIMADO"] <= maximo)]
-    if ano_sel and "ANO_ATUALIZACAO" in df_filtrado.columns:
-        df_filtrado = df_filtrado[df_filtrado["ANO_ATUALIZACAO"].isin(ano_sel)]
-    return df_filtrado
+    return motor.filtrar(_filtros_patrimonio(selecoes), df)
 
 
 def _download_button(df: pd.DataFrame):
@@ -191,7 +227,6 @@ def _dialog_novo_patrimonio(categorias: list[str], estados: list[str], situacoes
                     )
                     st.session_state["toast_patrimonio"] = {"text": "Patrimônio cadastrado!", "icon": "✅"}
                     st.success("Patrimônio cadastrado com sucesso!")
-                    st.cache_data.clear()
                     st.rerun()
                 except Exception as exc:
                     st.error(f"Não foi possível salvar o patrimônio: {exc}")
@@ -199,36 +234,9 @@ def _dialog_novo_patrimonio(categorias: list[str], estados: list[str], situacoes
     modal()
 
 
-def gestao_patrimonios():
-    st.markdown("# 📦 Gestão de Patrimônios")
-    msg = st.session_state.pop("toast_patrimonio", None)
-    if msg:
-        st.toast(msg.get("text", ""), icon=msg.get("icon", "✅"))
-    st.caption("Inventário atualizado dos ativos do GP Mecatrônica")
-
-    df = _carregar_patrimonios()
-    categorias_base = sorted(df["CATEGORIA"].dropna().astype(str).str.strip().unique().tolist()) if not df.empty else []
-    estados_base = sorted(df["ESTADO"].dropna().astype(str).str.strip().unique().tolist()) if not df.empty else []
-    situacoes_base = sorted(df["SITUACAO_USO"].dropna().astype(str).str.strip().unique().tolist()) if not df.empty else []
-
-    ac1, ac2, _ = st.columns([1, 1, 4])
-    if ac1.button("➕ Novo patrimônio"):
-        _dialog_novo_patrimonio(categorias_base, estados_base, situacoes_base)
-    if ac2.button("🔄 Recarregar inventário"):
-        try:
-            st.cache_data.clear()
-        finally:
-            st.rerun()
-
-    if df.empty:
-        st.warning("Inventário de patrimônios não encontrado. Verifique o arquivo em `data/patrimonio_gp/`.")
-        return
-
-    df_filtrado = _aplicar_filtros(df)
-    if df_filtrado.empty:
-        st.info("Nenhum patrimônio encontrado com os filtros selecionados.")
-        return
-
+@st.fragment
+def _bloco_indicadores(df_filtrado: pd.DataFrame):
+    """Indicadores do recorte filtrado; só mudam numa execução completa."""
     indicadores = calcular_indicadores(df_filtrado)
     st.markdown("### Indicadores gerais")
     c1, c2, c3, c4 = st.columns(4)
@@ -241,26 +249,21 @@ def gestao_patrimonios():
     c5.metric("Valor em uso", _format_currency(indicadores["valor_em_uso"]), border=True)
     c6.metric("Valor com avarias", _format_currency(indicadores["valor_danificado"]), border=True)
 
-    st.markdown("### Inventário detalhado")
-    busca_direta = st.text_input(
-        "🔍 Busca rápida (item, marca, modelo ou código)",
-        key="patrimonio_busca_direta",
-        placeholder="Digite para filtrar instantaneamente a tabela...",
-    )
-    df_resultado = df_filtrado.copy()
-    if busca_direta:
-        termo = busca_direta.strip().lower()
-        if termo:
-            campos = ["ITEM", "MARCA", "MODELO", "CODIGO", "CATEGORIA"]
-            mask = pd.Series(False, index=df_resultado.index)
-            for campo in campos:
-                if campo in df_resultado.columns:
-                    mask = mask | df_resultado[campo].astype(str).str.lower().str.contains(termo, na=False)
-            df_resultado = df_resultado[mask]
 
-    if df_resultado.empty:
-        st.info("Nenhum item encontrado com a busca rápida aplicada.")
-        return
+def _copiar_estado(origem: str, destino: str) -> None:
+    st.session_state[destino] = st.session_state[origem]
+
+
+@st.fragment
+def _tabela_patrimonios(df_resultado: pd.DataFrame, versao_patrimonios: str):
+    """Tabela editável com paginação e exportação; navegar reexecuta só este fragmento.
+
+    Se o frame compartilhado mudou desde a execução completa (gravação, outra sessão),
+    refaz a página inteira para alinhar indicadores e gráficos.
+    """
+    atual = versao_atual("patrimonios")
+    if atual is not None and atual != versao_patrimonios:
+        st.rerun(scope="app")
 
     colunas_visiveis = [
         "CODIGO",
@@ -326,65 +329,53 @@ def gestao_patrimonios():
         disabled=len(selecionados) == 0,
         type="secondary",
     ):
-        removidos = deletar_patrimonios(selecionados)
-        st.toast(f"{removidos} patrimônio(s) removido(s)", icon="✅")
-        st.cache_data.clear()
-        st.rerun()
-
-    retorno_clean = retorno.drop(columns=["EXCLUIR"])
-    orig_clean = df_paginado.drop(columns=["EXCLUIR"])
-    alterados = []
-    for codigo, row in retorno_clean.iterrows():
-        if codigo not in orig_clean.index:
-            continue
-        base = orig_clean.loc[codigo]
-        if not row.equals(base):
-            payload = row.to_dict()
-            payload["CODIGO"] = codigo
-            try:
-                payload["QUANTIDADE"] = int(payload.get("QUANTIDADE") or 0)
-            except Exception:
-                payload["QUANTIDADE"] = 0
-            try:
-                payload["PRECO_ESTIMADO"] = float(payload.get("PRECO_ESTIMADO") or 0.0)
-            except Exception:
-                payload["PRECO_ESTIMADO"] = 0.0
-            payload["VALOR_TOTAL"] = payload["QUANTIDADE"] * payload["PRECO_ESTIMADO"]
-            alterados.append(payload)
+        resultado = deletar_patrimonios(selecionados)
+        st.toast(f"{len(resultado['removidos'])} patrimônio(s) removido(s)", icon="✅")
+        if resultado["falhas"]:
+            st.toast(f"{len(resultado['falhas'])} patrimônio(s) não removido(s) no Firestore", icon="⚠️")
+        st.rerun(scope="app")
+
+    alterados = alteracoes_editor(
+        f"patrimonio_editor_p{pagina}",
+        df_paginado,
+        campos=CAMPOS_EDITAVEIS_PATRIMONIO,
+    )
 
     if alterados:
         if st.button(f"💾 Salvar alterações desta página ({len(alterados)})", type="primary"):
-            for payload in alterados:
+            for codigo, campos in alterados.items():
                 try:
-                    salvar_ou_atualizar_patrimonio(payload)
+                    atualizar_patrimonio_campos(codigo, campos, atual=df_paginado.loc[codigo].to_dict())
                 except Exception as exc:
-                    st.warning(f"Falha ao salvar código {payload.get('CODIGO')}: {exc}")
+                    st.warning(f"Falha ao salvar código {codigo}: {exc}")
             st.toast("Alterações salvas", icon="✅")
-            st.cache_data.clear()
-            st.rerun()
+            st.rerun(scope="app")
 
     st.caption(f"Exibindo {len(df_paginado)} de {total_registros} registros (página {int(pagina)}/{total_paginas}).")
     page_col1, page_col2 = st.columns(2)
+    # Os widgets espelham o estado já ajustado à página válida; as mudanças chegam por
+    # callbacks, sem rerun explícito (este trecho também roda em execuções completas)
+    st.session_state["patrimonio_page_number"] = int(pagina)
+    st.session_state["patrimonio_page_size_select"] = page_size
+    st.session_state["patrimonio_page_number_input"] = int(pagina)
     with page_col1:
-        novo_page_size = st.selectbox(
+        st.selectbox(
             "Itens por página",
             [20, 50, 100],
-            index=[20, 50, 100].index(page_size) if page_size in [20, 50, 100] else 0,
             key="patrimonio_page_size_select",
+            on_change=_copiar_estado,
+            args=("patrimonio_page_size_select", "patrimonio_page_size"),
         )
     with page_col2:
-        nova_pagina = st.number_input(
+        st.number_input(
             "Página",
             min_value=1,
             max_value=total_paginas,
-            value=int(pagina),
             step=1,
             key="patrimonio_page_number_input",
+            on_change=_copiar_estado,
+            args=("patrimonio_page_number_input", "patrimonio_page_number"),
         )
-    if novo_page_size != page_size or nova_pagina != pagina:
-        st.session_state["patrimonio_page_size"] = novo_page_size
-        st.session_state["patrimonio_page_number"] = nova_pagina
-        st.rerun()
 
     df_download = df_resultado[existentes].copy()
     if "DATA_ATUALIZACAO_BR" in df_download.columns:
@@ -392,6 +383,10 @@ def gestao_patrimonios():
         df_download = df_download.drop(columns=["DATA_ATUALIZACAO_BR"])
     _download_button(df_download)
 
+
+@st.fragment
+def _bloco_graficos(df_resultado: pd.DataFrame):
+    """Gráficos do recorte; interações na tabela não os reexecutam."""
     estado_colors = {
         "Em bom estado": "#22c55e",
         "Em ótimo estado": "#16a34a",
@@ -404,7 +399,8 @@ def gestao_patrimonios():
         col_a, col_b = st.columns(2)
         df_situacao = agrupar_por_situacao(df_resultado)
         if not df_situacao.empty:
-            fig_situacao = px.pie(
+            fig_situacao = figura(
+                "pie",
                 df_situacao,
                 names="Situação",
                 values="Itens",
@@ -415,7 +411,8 @@ def gestao_patrimonios():
 
         df_estado = agrupar_por_estado(df_resultado)
         if not df_estado.empty:
-            fig_estado = px.bar(
+            fig_estado = figura(
+                "bar",
                 df_estado,
                 x="Estado",
                 y="Itens",
@@ -428,7 +425,8 @@ def gestao_patrimonios():
 
         df_categoria = agrupar_por_categoria(df_resultado)
         if not df_categoria.empty:
-            fig_cat = px.treemap(
+            fig_cat = figura(
+                "treemap",
                 df_categoria,
                 path=["Categoria"],
                 values="Valor_Total",
@@ -439,7 +437,8 @@ def gestao_patrimonios():
 
         df_evolucao = evolucao_por_mes(df_resultado)
         if not df_evolucao.empty:
-            fig_evo = px.line(
+            fig_evo = figura(
+                "line",
                 df_evolucao,
                 x="MES",
                 y="Valor_Total",
@@ -456,3 +455,62 @@ def gestao_patrimonios():
                 if coluna in df_top_display.columns:
                     df_top_display[coluna] = df_top_display[coluna].apply(_format_currency)
             st.dataframe(df_top_display, use_container_width=True, hide_index=True)
+
+
+def gestao_patrimonios():
+    st.markdown("# 📦 Gestão de Patrimônios")
+    msg = st.session_state.pop("toast_patrimonio", None)
+    if msg:
+        st.toast(msg.get("text", ""), icon=msg.get("icon", "✅"))
+    st.caption("Inventário atualizado dos ativos do GP Mecatrônica")
+
+    df = _carregar_patrimonios()
+    categorias_base = sorted(df["CATEGORIA"].dropna().astype(str).str.strip().unique().tolist()) if not df.empty else []
+    estados_base = sorted(df["ESTADO"].dropna().astype(str).str.strip().unique().tolist()) if not df.empty else []
+    situacoes_base = sorted(df["SITUACAO_USO"].dropna().astype(str).str.strip().unique().tolist()) if not df.empty else []
+
+    ac1, ac2, _ = st.columns([1, 1, 4])
+    if ac1.button("➕ Novo patrimônio"):
+        _dialog_novo_patrimonio(categorias_base, estados_base, situacoes_base)
+    if ac2.button("🔄 Recarregar inventário"):
+        try:
+            invalidar_frames()
+            st.cache_data.clear()
+        finally:
+            st.rerun()
+
+    if df.empty:
+        st.warning("Inventário de patrimônios não encontrado. Verifique o arquivo em `data/patrimonio_gp/`.")
+        return
+
+    df_filtrado = _aplicar_filtros(df)
+    if df_filtrado.empty:
+        st.info("Nenhum patrimônio encontrado com os filtros selecionados.")
+        return
+
+    versao_patrimonios = obter_versao(df)
+    _bloco_indicadores(df_filtrado)
+
+    st.markdown("### Inventário detalhado")
+    busca_direta = st.text_input(
+        "🔍 Busca rápida (item, marca, modelo ou código)",
+        key="patrimonio_busca_direta",
+        placeholder="Digite para filtrar instantaneamente a tabela...",
+    )
+    df_resultado = df_filtrado.copy()
+    if busca_direta:
+        termo = busca_direta.strip().lower()
+        if termo:
+            campos = ["ITEM", "MARCA", "MODELO", "CODIGO", "CATEGORIA"]
+            mask = pd.Series(False, index=df_resultado.index)
+            for campo in campos:
+                if campo in df_resultado.columns:
+                    mask = mask | df_resultado[campo].astype(str).str.lower().str.contains(termo, na=False)
+            df_resultado = df_resultado[mask]
+
+    if df_resultado.empty:
+        st.info("Nenhum item encontrado com a busca rápida aplicada.")
+        return
+
+    _tabela_patrimonios(df_resultado, versao_patrimonios)
+    _bloco_graficos(df_resultado)
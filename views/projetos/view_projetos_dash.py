@@ -1,11 +1,14 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-from controllers.membros_controller import listar_membros_firestore, remover_projetos
+from controllers.dataset_controller import obter_membros
+from controllers.membros_controller import remover_projetos
+from controllers.projetos_controller import COLUNAS_ESTATISTICAS, estatisticas_projetos
+from utils.cache_frames import invalidar_frames
+from utils.filtros import filtro_texto, filtro_valores, obter_motor
+from utils.graficos import figura
+from utils.versao_dados import carimbar_versao, obter_versao
 
 
-CSV_PATH = "data/membros_gp/tratados/membros_gp_tratados_.csv"
-
 ORIENTADORES_FIXOS = [
     "ANDERSON SEIXAS",
     "CAMILA SERRÃO",
@@ -121,49 +124,12 @@ def _dialog_novo_projeto():
     modal()
 
 
-@st.cache_data(show_spinner=False, ttl=60)
 def carregar_membros_para_projetos() -> pd.DataFrame:
-    try:
-        df = listar_membros_firestore()
-        if not isinstance(df, pd.DataFrame) or df.empty:
-            raise ValueError("Sem dados do Firestore")
-    except Exception:
-        try:
-            df = pd.read_csv(CSV_PATH)
-        except Exception:
-            return pd.DataFrame()
-
-    if "PROJETO ATUAL" not in df.columns:
-        df["PROJETO ATUAL"] = ""
-    return df.fillna("")
-
-
-def _agrupar_por_projeto(df: pd.DataFrame) -> pd.DataFrame:
+    df = obter_membros()
     if df.empty:
-        return pd.DataFrame()
-
-    agrupado = (
-        df.groupby("PROJETO ATUAL")
-        .agg(
-            TOTAL_MEMBROS=("CPF", "nunique"),
-            ATIVOS=("STATUS", lambda s: int((s == "Ativo").sum())),
-            INATIVOS=("STATUS", lambda s: int((s == "Inativo").sum())),
-            PENDENTES=("STATUS", lambda s: int((s == "Pendente").sum())),
-            EQUIPES=(
-                "EQUIPE DE PROJETO",
-                lambda s: s.replace("", pd.NA).dropna().nunique(),
-            ),
-            ORIENTADORES=(
-                "ORIENTADOR",
-                lambda s: s.replace("", pd.NA).dropna().nunique(),
-            ),
-        )
-        .reset_index()
-        .sort_values(by=["TOTAL_MEMBROS", "ATIVOS"], ascending=[False, False])
-    )
-
-    agrupado.rename(columns={"PROJETO ATUAL": "Projeto"}, inplace=True)
-    return agrupado
+        return df
+    # Versão própria: o frame preenchido não deve compartilhar motor de filtros com o original
+    return carimbar_versao(df.fillna(""), f"{obter_versao(df)}-projetos")
 
 
 def gestao_projetos():
@@ -176,6 +142,7 @@ def gestao_projetos():
     ac1, ac2, _ = st.columns([1, 1, 4])
     if ac1.button("🔄 Recarregar dados"):
         try:
+            invalidar_frames()
             st.cache_data.clear()
         finally:
             st.rerun()
@@ -217,37 +184,22 @@ def gestao_projetos():
         key="equipes_proj",
     )
 
-    filtrado = df_com_projeto
-    if busca:
-        termo = _normalize_text(busca)
-
-        def _match(row):
-            campos = [
-                row.get("PROJETO ATUAL", ""),
-                row.get("EQUIPE DE PROJETO", ""),
-                row.get("ORIENTADOR", ""),
-            ]
-            return any(termo in _normalize_text(c) for c in campos)
-
-        filtrado = filtrado[filtrado.apply(_match, axis=1)]
-
-    if status_sel != "Todos" and "STATUS" in filtrado.columns:
-        filtrado = filtrado[filtrado["STATUS"] == status_sel]
-    if orientadores:
-        filtrado = filtrado[filtrado["ORIENTADOR"].isin(orientadores)]
-    if equipes:
-        filtrado = filtrado[filtrado["EQUIPE DE PROJETO"].isin(equipes)]
+    filtrado = obter_motor(df_com_projeto).filtrar([
+        # Mesmo tratamento do termo que a busca linha a linha antiga (normaliza e depois apara)
+        filtro_texto(["PROJETO ATUAL", "EQUIPE DE PROJETO", "ORIENTADOR"], _normalize_text(busca)),
+        filtro_valores("STATUS", [status_sel] if status_sel != "Todos" else []),
+        filtro_valores("ORIENTADOR", orientadores),
+        filtro_valores("EQUIPE DE PROJETO", equipes),
+    ], df_com_projeto)
 
     if filtrado.empty and not extras_proj:
         st.info("Nenhum projeto encontrado com os filtros atuais.")
         return
 
     if filtrado.empty:
-        agrupado = pd.DataFrame(
-            columns=["Projeto", "TOTAL_MEMBROS", "ATIVOS", "INATIVOS", "PENDENTES", "EQUIPES", "ORIENTADORES"]
-        )
+        agrupado = pd.DataFrame(columns=COLUNAS_ESTATISTICAS)
     else:
-        agrupado = _agrupar_por_projeto(filtrado)
+        agrupado = estatisticas_projetos(filtrado)
     if extras_proj:
         existentes = set(agrupado["Projeto"].tolist()) if not agrupado.empty else set()
         for proj in extras_proj:
@@ -303,9 +255,10 @@ def gestao_projetos():
         disabled=len(projetos_excluir) == 0,
         type="secondary",
     ):
-        alterados = remover_projetos(projetos_excluir)
-        st.toast(f"Projeto(s) removido(s) do cadastro de {alterados} membro(s)", icon="✅")
-        st.cache_data.clear()
+        resultado = remover_projetos(projetos_excluir)
+        st.toast(f"Projeto(s) removido(s) do cadastro de {resultado['alterados']} membro(s)", icon="✅")
+        if resultado["falhas"]:
+            st.toast(f"Falha ao atualizar membros de: {', '.join(map(str, resultado['falhas']))}", icon="⚠️")
         st.rerun()
 
     st.markdown("## Visão Geral")
@@ -318,7 +271,8 @@ def gestao_projetos():
     with st.expander("📊 Insights gerais por projeto", expanded=False):
         status_cols = [c for c in ["ATIVOS", "INATIVOS", "PENDENTES"] if c in agrupado.columns]
         if status_cols:
-            fig_status = px.bar(
+            fig_status = figura(
+                "bar",
                 agrupado,
                 x="Projeto",
                 y=status_cols,
@@ -338,7 +292,8 @@ def gestao_projetos():
                 .reset_index(name="Qtd")
             )
         if not rank_counts.empty:
-            fig_rank = px.bar(
+            fig_rank = figura(
+                "bar",
                 rank_counts,
                 x="PROJETO ATUAL",
                 y="Qtd",
@@ -388,7 +343,8 @@ def gestao_projetos():
         )
         contagem_status.columns = ["STATUS", "Qtd"]
         if not contagem_status.empty:
-            grafico = px.pie(
+            grafico = figura(
+                "pie",
                 contagem_status,
                 names="STATUS",
                 values="Qtd",
@@ -408,14 +364,15 @@ def gestao_projetos():
             )
             rank_proj.columns = ["Rank GP", "Qtd"]
             if not rank_proj.empty:
-                fig_rank_proj = px.bar(
+                fig_rank_proj = figura(
+                    "bar",
                     rank_proj,
                     x="Rank GP",
                     y="Qtd",
                     text="Qtd",
                     title="Distribuição de Rank no projeto",
+                    traces=dict(textposition="outside"),
                 )
-                fig_rank_proj.update_traces(textposition="outside")
                 st.plotly_chart(fig_rank_proj, use_container_width=True)
             else:
                 st.info("Nenhum rank informado para os membros deste projeto.")
@@ -432,7 +389,8 @@ def gestao_projetos():
                 .reset_index(name="Qtd")
             )
             if not tipo_status.empty:
-                fig_tipo = px.bar(
+                fig_tipo = figura(
+                    "bar",
                     tipo_status,
                     x="TIPO MEMBRO",
                     y="Qtd",